@@ -1,12 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List
+from typing import Callable, Iterable, List, Tuple
 from ..database import get_supabase_client
 from ..security.validator import SecurityValidator
+from ..engine.chess_engine import parse_engine_options
+from .. import version_cache
+from ..eval_pool import evaluate_positions, read_positions
 import chess
 from typing import Optional
 import hashlib
 import json
+import os
+import shutil
+import tempfile
 
 router = APIRouter()
 validator = SecurityValidator()
@@ -20,6 +27,21 @@ class BotVersionCreate(BaseModel):
     bot_id: str
     rules: List[Rule]
     search_depth: int
+    engine_options: Optional[dict] = None
+
+
+def validate_engine_options(options: Optional[dict]) -> dict:
+    """Check `engine_options` (search budgets etc.) and return them as they should be stored."""
+    if not options:
+        return {}
+    if not isinstance(options, dict):
+        raise HTTPException(status_code=400, detail="engine_options must be an object")
+    try:
+        parse_engine_options(options)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return options
+
 
 @router.post("/versions")
 async def create_version(version_data: BotVersionCreate):
@@ -28,6 +50,8 @@ async def create_version(version_data: BotVersionCreate):
         if not validator.validate(rule.code):
             raise HTTPException(status_code=400, detail=f"Invalid or unsafe code in rule: {rule.name}")
 
+    engine_options = validate_engine_options(version_data.engine_options)
+
     # Calculate hash of rules for immutability check/reference
     rules_json = [r.dict() for r in version_data.rules]
     rules_str = json.dumps(rules_json, sort_keys=True)
@@ -39,7 +63,8 @@ async def create_version(version_data: BotVersionCreate):
         "bot_id": version_data.bot_id,
         "rules_json": rules_json,
         "rules_hash": rules_hash,
-        "search_depth": version_data.search_depth
+        "search_depth": version_data.search_depth,
+        "engine_options": engine_options
     }).execute()
 
     if not result.data:
@@ -84,6 +109,8 @@ async def upload_bot_file(bot_id: str, file: UploadFile = File(...), search_dept
 
         normalized.append({"name": name, "code": code, "weight": weight})
 
+    engine_options = validate_engine_options(payload.get("engine_options"))
+
     # Calculate hash and insert similar to create_version
     rules_str = json.dumps(normalized, sort_keys=True)
     rules_hash = hashlib.sha256(rules_str.encode()).hexdigest()
@@ -93,7 +120,8 @@ async def upload_bot_file(bot_id: str, file: UploadFile = File(...), search_dept
         "bot_id": bot_id,
         "rules_json": normalized,
         "rules_hash": rules_hash,
-        "search_depth": search_depth
+        "search_depth": search_depth,
+        "engine_options": engine_options
     }).execute()
 
     if not result.data:
@@ -109,6 +137,7 @@ class ScriptUpload(BaseModel):
     bot_id: str
     code: str
     search_depth: Optional[int] = 3
+    engine_options: Optional[dict] = None
 
 
 @router.post("/upload-script")
@@ -118,6 +147,7 @@ async def upload_script(data: ScriptUpload):
     NOTE: This endpoint intentionally does not validate or sandbox code. Use only in trusted/dev environments.
     """
     supabase = get_supabase_client()
+    engine_options = validate_engine_options(data.engine_options)
 
     rules_json = [{"script": data.code}]
     rules_str = json.dumps(rules_json, sort_keys=True)
@@ -127,7 +157,8 @@ async def upload_script(data: ScriptUpload):
         "bot_id": data.bot_id,
         "rules_json": rules_json,
         "rules_hash": rules_hash,
-        "search_depth": data.search_depth or 3
+        "search_depth": data.search_depth or 3,
+        "engine_options": engine_options
     }).execute()
 
     if not result.data:
@@ -142,48 +173,67 @@ async def upload_script(data: ScriptUpload):
 class EvalBatchRequest(BaseModel):
     bot_version: str
     fens: List[str]
+    # Score across a process pool and stream NDJSON results as they finish
+    stream: bool = False
+    workers: Optional[int] = None
+
+
+def script_version(version_id: str) -> dict:
+    """The `bot_versions` row of a script bot whose script compiles, else the matching HTTP error."""
+    # Row and compiled script come from the process-wide caches
+    bot_data = version_cache.get_version(version_id)
+    if not bot_data:
+        raise HTTPException(status_code=404, detail="Bot version not found")
+
+    rjson = bot_data.get("rules_json")
+    if not (isinstance(rjson, list) and len(rjson) > 0 and isinstance(rjson[0], dict) and rjson[0].get("script")):
+        raise HTTPException(status_code=400, detail="No script found for this bot version")
+
+    evaluator = version_cache.get_evaluator(bot_data)
+    if evaluator.script_error is not None:
+        raise HTTPException(status_code=400, detail=f"Error compiling script: {evaluator.script_error}")
+    if evaluator.script_callable is None:
+        raise HTTPException(status_code=400, detail="Script must define a callable 'evaluate(board)' function")
+    return bot_data
+
+
+def stream_scores(bot_data: dict, positions: Iterable[Tuple[int, str]], workers: Optional[int],
+                  on_close: Optional[Callable[[], None]] = None) -> StreamingResponse:
+    """NDJSON: one `{"index", "fen", "score"}` or `{"index", "fen", "error"}` line per position, then a summary."""
+    cpus = os.cpu_count() or 1
+    workers = min(max(1, workers or cpus), cpus)
+
+    def lines():
+        evaluated = errors = 0
+        try:
+            for result in evaluate_positions(bot_data["rules_json"], positions, workers):
+                if "error" in result:
+                    errors += 1
+                else:
+                    evaluated += 1
+                yield json.dumps(result) + "\n"
+            yield json.dumps({"done": True, "evaluated": evaluated, "errors": errors}) + "\n"
+        finally:
+            if on_close is not None:
+                on_close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @router.post("/eval_batch")
-async def eval_batch(req: EvalBatchRequest):
+def eval_batch(req: EvalBatchRequest):
     """Evaluate a bot script on a batch of FEN strings and return scores.
 
     This executes user-provided code unsafely in-process. Only use in dev/trusted environments.
     The script must define a function `evaluate(board)` that returns a numeric score.
+    With `stream`, positions are scored in parallel and errors are reported per FEN.
     """
-    supabase = get_supabase_client()
-    res = supabase.table("bot_versions").select("*").eq("id", req.bot_version).single().execute()
-    if not res.data:
-        raise HTTPException(status_code=404, detail="Bot version not found")
-
-    bot_data = res.data
-    code = None
-    try:
-        rjson = bot_data.get("rules_json")
-        if isinstance(rjson, list) and len(rjson) > 0 and isinstance(rjson[0], dict) and "script" in rjson[0]:
-            code = rjson[0]["script"]
-    except Exception:
-        code = None
-
-    if not code:
-        raise HTTPException(status_code=400, detail="No script found for this bot version")
-
-    # Unsafe execution environment (intentionally permissive per request)
-    # Inject helpers into script namespace for convenience
-    from ..engine import helpers as helpers_module
-    namespace: dict = {"chess": chess, "helpers": helpers_module}
-    for name in dir(helpers_module):
-        if not name.startswith("_"):
-            namespace[name] = getattr(helpers_module, name)
-    try:
-        exec(code, namespace)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error compiling script: {e}")
+    bot_data = script_version(req.bot_version)
+    if req.stream:
+        return stream_scores(bot_data, enumerate(req.fens), req.workers)
 
-    if "evaluate" not in namespace or not callable(namespace["evaluate"]):
-        raise HTTPException(status_code=400, detail="Script must define a callable 'evaluate(board)' function")
-
-    evaluate = namespace["evaluate"]
+    # Unsafe execution environment (intentionally permissive per request); helpers are in the script namespace
+    evaluate = version_cache.get_evaluator(bot_data).script_callable
     scores = []
     for fen in req.fens:
         try:
@@ -195,6 +245,27 @@ async def eval_batch(req: EvalBatchRequest):
 
     return {"scores": scores}
 
+
+@router.post("/eval_batch/file")
+def eval_batch_file(bot_version: str, file: UploadFile = File(...), workers: Optional[int] = None):
+    """Score every position of an uploaded EPD/FEN file (one per line), streamed as NDJSON.
+
+    `index` in the results is the 0-based line number; blank and `#` lines are skipped.
+    """
+    bot_data = script_version(bot_version)
+    # Own copy of the upload: the request's file is closed once this handler returns, before the stream ends
+    spool = tempfile.TemporaryFile()
+    shutil.copyfileobj(file.file, spool)
+    spool.seek(0)
+    return stream_scores(bot_data, read_positions(spool), workers, on_close=spool.close)
+
+
+@router.get("/cache_stats")
+async def get_cache_stats():
+    """Hit rates of this process's version row and compiled evaluator caches."""
+    return version_cache.cache_stats()
+
+
 @router.get("/{bot_id}/versions")
 async def get_bot_versions(bot_id: str):
     supabase = get_supabase_client()
@@ -221,6 +292,7 @@ async def delete_version(version_id: str):
 
     # Safe to remove the version
     res = supabase.table("bot_versions").delete().eq("id", version_id).execute()
+    version_cache.invalidate(version_id)
     if res.error:
         raise HTTPException(status_code=500, detail="Failed to delete version")
     return {"deleted": True}
@@ -229,6 +301,7 @@ async def delete_version(version_id: str):
 class VersionUpdate(BaseModel):
     rules: List[dict]
     search_depth: Optional[int] = None
+    engine_options: Optional[dict] = None
 
 
 @router.patch("/versions/{version_id}")
@@ -250,8 +323,11 @@ async def update_version(version_id: str, data: VersionUpdate):
     update_payload = {"rules_json": rules_json, "rules_hash": rules_hash}
     if data.search_depth is not None:
         update_payload["search_depth"] = data.search_depth
+    if data.engine_options is not None:
+        update_payload["engine_options"] = validate_engine_options(data.engine_options)
 
     res = supabase.table("bot_versions").update(update_payload).eq("id", version_id).execute()
+    version_cache.invalidate(version_id)
     if res.error:
         raise HTTPException(status_code=500, detail="Failed to update version")
     return res.data[0]
@@ -260,6 +336,7 @@ async def update_version(version_id: str, data: VersionUpdate):
 class CloneVersionRequest(BaseModel):
     bot_id: str
     search_depth: Optional[int] = None
+    engine_options: Optional[dict] = None
 
 
 @router.post("/versions/{version_id}/clone")
@@ -272,6 +349,10 @@ async def clone_version(version_id: str, data: CloneVersionRequest):
     src = res.data
     rules_json = src.get("rules_json")
     search_depth = data.search_depth if data.search_depth is not None else src.get("search_depth", 3)
+    if data.engine_options is not None:
+        engine_options = validate_engine_options(data.engine_options)
+    else:
+        engine_options = src.get("engine_options") or {}
 
     rules_str = json.dumps(rules_json, sort_keys=True)
     rules_hash = hashlib.sha256(rules_str.encode()).hexdigest()
@@ -280,7 +361,8 @@ async def clone_version(version_id: str, data: CloneVersionRequest):
         "bot_id": data.bot_id,
         "rules_json": rules_json,
         "rules_hash": rules_hash,
-        "search_depth": search_depth
+        "search_depth": search_depth,
+        "engine_options": engine_options
     }).execute()
 
     if not inserted.data:
@@ -305,6 +387,8 @@ async def delete_bot(bot_id: str):
 
     # Safe to delete versions and bot
     supabase.table("bot_versions").delete().eq("bot_id", bot_id).execute()
+    for v in versions.data or []:
+        version_cache.invalidate(v["id"])
     res = supabase.table("bots").delete().eq("id", bot_id).execute()
     if res.error:
         raise HTTPException(status_code=500, detail="Failed to delete bot")
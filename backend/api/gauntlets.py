@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException, BackgroundTasks
+from pydantic import BaseModel
+from typing import List, Optional
+from ..database import get_supabase_client
+from ..gauntlet import MAX_GAUNTLET_GAMES, build_schedule, run_gauntlet_task
+import chess
+
+router = APIRouter()
+
+class GauntletRequest(BaseModel):
+    version_id: str
+    opponents: List[str]
+    games_per_opponent: int = 2
+    # Starting positions as FENs; each is played with both colors
+    openings: Optional[List[str]] = None
+    # Games played in parallel (default: CPU count)
+    workers: Optional[int] = None
+
+
+@router.post("")
+async def create_gauntlet(request: GauntletRequest, background_tasks: BackgroundTasks):
+    opponents = list(dict.fromkeys(request.opponents))
+    if not opponents:
+        raise HTTPException(status_code=400, detail="At least one opponent is required")
+    if request.version_id in opponents:
+        raise HTTPException(status_code=400, detail="A version cannot play a gauntlet against itself")
+    if request.games_per_opponent < 1:
+        raise HTTPException(status_code=400, detail="games_per_opponent must be at least 1")
+    if len(opponents) * request.games_per_opponent > MAX_GAUNTLET_GAMES:
+        raise HTTPException(status_code=400, detail=f"A gauntlet is limited to {MAX_GAUNTLET_GAMES} games")
+    if request.workers is not None and request.workers < 1:
+        raise HTTPException(status_code=400, detail="workers must be at least 1")
+
+    openings = []
+    for fen in request.openings or []:
+        try:
+            board = chess.Board(fen)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid opening FEN: {fen}")
+        if not board.is_valid() or board.is_game_over():
+            raise HTTPException(status_code=400, detail=f"Opening is not a playable position: {fen}")
+        openings.append(board.fen())
+
+    supabase = get_supabase_client()
+    ids = [request.version_id] + opponents
+    rows = supabase.table("bot_versions").select("*").in_("id", ids).execute().data or []
+    versions = {row["id"]: row for row in rows}
+    missing = [vid for vid in ids if vid not in versions]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Bot version(s) not found: {', '.join(missing)}")
+
+    schedule = build_schedule(request.version_id, opponents, request.games_per_opponent, openings)
+    result = supabase.table("gauntlets").insert({
+        "version_id": request.version_id,
+        "opponents": opponents,
+        "games_per_opponent": request.games_per_opponent,
+        "openings": openings,
+        "games_total": len(schedule),
+        "status": "queued"
+    }).execute()
+
+    if not result.data:
+        raise HTTPException(status_code=500, detail="Failed to create gauntlet")
+
+    gauntlet_id = result.data[0]["id"]
+    background_tasks.add_task(run_gauntlet_task, gauntlet_id, request.version_id, versions, schedule, request.workers)
+
+    return {"gauntlet_id": gauntlet_id, "status": "queued", "games_total": len(schedule)}
+
+
+@router.get("/{gauntlet_id}")
+async def get_gauntlet(gauntlet_id: str):
+    supabase = get_supabase_client()
+    result = supabase.table("gauntlets").select("*").eq("id", gauntlet_id).execute()
+    if not result.data:
+        raise HTTPException(status_code=404, detail="Gauntlet not found")
+    return result.data[0]
+
+
+@router.get("/{gauntlet_id}/games")
+async def get_gauntlet_games(gauntlet_id: str):
+    supabase = get_supabase_client()
+    result = supabase.table("gauntlet_games") \
+        .select("id, game_index, opponent, white_version, black_version, opening, result, termination, plies, score, error") \
+        .eq("gauntlet_id", gauntlet_id).order("game_index").execute()
+    return result.data or []
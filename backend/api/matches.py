@@ -1,98 +1,143 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Header
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
 from ..database import get_supabase_client
 from ..engine.chess_engine import ChessEngine
-from ..engine.evaluator import Evaluator
+from ..engine.game import play_game
+from ..engine.game_record import GameRecord, encode_game
+from ..engine.lru import LRUCache
+from ..ratings import rate_match
+from .. import live, result_cache, version_cache
+import asyncio
 import chess
 import chess.pgn
+import cProfile
 import io
+import json
+import os
+import pstats
+import tempfile
 
 router = APIRouter()
 
+SSE_KEEPALIVE_SECONDS = 15
+MAX_PLIES_PER_REQUEST = 200
+PROFILE_HELPER_SAMPLE_EVERY = 50
+PROFILE_TOP_FUNCTIONS = 25
+
+# Decoded game records of finished matches (immutable), for the per-ply endpoint
+_game_records = LRUCache(128)
+
 class MatchRequest(BaseModel):
     bot_a_version: str
     bot_b_version: str
+    priority: int = 0
+    # Play the game even if an identical pairing has a cached result
+    force: bool = False
+    # Play under cProfile with per-move instrumentation (implies force)
+    profile: bool = False
+
+def external_workers_enabled() -> bool:
+    # With EXTERNAL_MATCH_WORKERS=1 the API only queues matches and `python -m backend.worker` plays them
+    return os.environ.get("EXTERNAL_MATCH_WORKERS", "").lower() in ("1", "true", "yes")
+
+def _profiled_version(version: dict) -> dict:
+    # Instrumentation on top of the version's own engine options
+    options = dict(version.get("engine_options") or {})
+    options.update(instrument=True, helper_sample_every=PROFILE_HELPER_SAMPLE_EVERY)
+    return {**version, "engine_options": options}
 
-def run_match_task(match_id: str, bot_a_version: str, bot_b_version: str):
+
+def _save_profile(match_id: str, profiler: cProfile.Profile) -> str:
+    path = os.path.join(os.environ.get("MATCH_PROFILE_DIR", tempfile.gettempdir()), f"match_{match_id}.prof")
+    profiler.dump_stats(path)
+    print(f"Match {match_id}: profile written to {path}")
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+    return path
+
+
+def run_match_task(match_id: str, bot_a_version: str, bot_b_version: str, worker_id: Optional[str] = None,
+                   force: bool = False, profile: bool = False):
     supabase = get_supabase_client()
-    
-    # Update status to running
-    supabase.table("match_queue").update({"status": "running"}).eq("id", match_id).execute()
 
+    def set_status(status: str):
+        query = supabase.table("match_queue").update({"status": status}).eq("id", match_id)
+        if worker_id is not None:
+            # Once a stale job has been reclaimed by another worker it is no longer ours to close
+            query = query.eq("worker_id", worker_id)
+        query.execute()
+
+    # Update status to running (queue workers have already claimed the job)
+    if worker_id is None:
+        set_status("running")
+
+    engines = []
     try:
-        # Fetch bot versions
-        res_a = supabase.table("bot_versions").select("*").eq("id", bot_a_version).single().execute()
-        res_b = supabase.table("bot_versions").select("*").eq("id", bot_b_version).single().execute()
-        
-        bot_a_data = res_a.data
-        bot_b_data = res_b.data
-
-        # Initialize engines
-        engine_a = ChessEngine(Evaluator(bot_a_data["rules_json"]), bot_a_data["search_depth"])
-        engine_b = ChessEngine(Evaluator(bot_b_data["rules_json"]), bot_b_data["search_depth"])
-
-        board = chess.Board()
-        game = chess.pgn.Game()
-        game.headers["White"] = f"Bot A ({bot_a_version})"
-        game.headers["Black"] = f"Bot B ({bot_b_version})"
-        node = game
-
-        print(f"Starting match {match_id} between {bot_a_version} and {bot_b_version}")
-
-        # Game loop
-        move_count = 0
-        search_metadata = []
-        
-        while not board.is_game_over():
-            current_engine = engine_a if board.turn == chess.WHITE else engine_b
-            # get_best_move now returns (move, score, metadata)
-            move, score, metadata = current_engine.get_best_move(board)
-            
-            if move is None:
-                print(f"Match {match_id}: Engine returned no move. Ending.")
-                break
-            
-            # Store metadata for this move
-            search_metadata.append({
-                "move_idx": move_count,
-                "turn": "white" if board.turn == chess.WHITE else "black",
-                "eval": score,
-                "top_moves": metadata
-            })
-            
-            board.push(move)
-            # Standard eval is from White's perspective
-            eval_score = score if board.turn == chess.BLACK else -score
-            node = node.add_main_variation(move)
-            node.comment = f"eval: {eval_score:.2f}"
-            
-            move_count += 1
-            if move_count % 10 == 0:
-                print(f"Match {match_id}: {move_count} moves played... Sample Eval: {eval_score:.2f}")
-
-        # Result determination
-        result = board.result()
-        winner = "draw"
-        if result == "1-0": winner = "A"
-        elif result == "0-1": winner = "B"
-
-        termination = "checkmate"
-        if board.is_stalemate():
-            termination = "stalemate"
-        elif board.is_insufficient_material():
-            termination = "insufficient material"
-        elif board.is_fifty_moves():
-            termination = "fifty-move rule"
-        elif board.can_claim_threefold_repetition() or board.is_repetition():
-            termination = "threefold repetition"
-        elif result == "1/2-1/2":
-            termination = "draw"
-
-        print(f"Match {match_id} finished. Result: {result} ({winner}), Reason: {termination}")
+        # Fetch bot versions (cached per process)
+        bot_a_data = version_cache.get_version(bot_a_version)
+        bot_b_data = version_cache.get_version(bot_b_version)
+        for version_id, data in ((bot_a_version, bot_a_data), (bot_b_version, bot_b_data)):
+            if data is None:
+                raise ValueError(f"Bot version {version_id} not found")
+
+        # Identical pairings replay identical games; reuse a stored result unless forced
+        cache_key = None
+        cached = None
+        try:
+            cache_key = result_cache.result_cache_key(bot_a_data, bot_b_data)
+            if cache_key is not None and not (force or profile):
+                cached = result_cache.lookup(cache_key)
+        except Exception as cache_err:
+            print(f"Warning: result cache unavailable for match {match_id}: {cache_err}")
+
+        if cached is not None:
+            print(f"Match {match_id}: replaying cached result of match {cached['source_match_id']}")
+            winner = cached["winner"]
+            termination = cached["termination_reason"]
+            game_data = cached["game_data"]
+            pgn_str = result_cache.relabel_pgn(cached["pgn"], f"Bot A ({bot_a_version})", f"Bot B ({bot_b_version})")
+        else:
+            # Initialize engines (search depth, budgets and other engine_options come from the version rows)
+            # Instrumented engines copy the shared evaluator, so profile counters only see this match
+            engine_a = ChessEngine.from_version(_profiled_version(bot_a_data) if profile else bot_a_data,
+                                                version_cache.get_evaluator(bot_a_data))
+            engine_b = ChessEngine.from_version(_profiled_version(bot_b_data) if profile else bot_b_data,
+                                                version_cache.get_evaluator(bot_b_data))
+            engines = [engine_a, engine_b]
+
+            print(f"Starting match {match_id} between {bot_a_version} and {bot_b_version}")
+            live.publish(match_id, "start", {"white": bot_a_version, "black": bot_b_version, "fen": chess.STARTING_FEN})
+
+            profiler = cProfile.Profile() if profile else None
+            if profiler is not None:
+                profiler.enable()
+            try:
+                game = play_game(engine_a, engine_b, f"Bot A ({bot_a_version})", f"Bot B ({bot_b_version})",
+                                 label=f"Match {match_id}", on_move=lambda ply: live.publish(match_id, "move", ply))
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+            if profiler is not None:
+                _save_profile(match_id, profiler)
+            result = game["result"]
+            termination = game["termination"]
+            # Moves and per-ply search metadata in the compact columnar form (engine/game_record.py)
+            game_data = encode_game(game["moves"], game["search_metadata"])
+            pgn_str = game["pgn"]
+            winner = "draw"
+            if result == "1-0": winner = "A"
+            elif result == "0-1": winner = "B"
+
+            print(f"Match {match_id} finished. Result: {result} ({winner}), Reason: {termination}")
+            # Eval cache totals of the shared evaluators (cumulative over every match this process played)
+            for label, engine in (("A", engine_a), ("B", engine_b)):
+                cache_stats = engine.evaluator.cache_stats()
+                if cache_stats:
+                    print(f"Match {match_id}: bot {label} eval cache {cache_stats}")
 
         # Update Supabase
-        pgn_str = str(game)
-        # Attempt to store search metadata if the schema supports it.
+        # Attempt to store the encoded search metadata if the schema supports it.
         try:
             supabase.table("matches").insert({
                 "id": match_id,
@@ -101,13 +146,13 @@ def run_match_task(match_id: str, bot_a_version: str, bot_b_version: str):
                 "winner": winner,
                 "termination_reason": termination,
                 "pgn": pgn_str,
-                "search_metadata": search_metadata
+                "game_data": game_data
             }).execute()
         except Exception as insert_err:
-            # If the matches table does not have the `search_metadata` column, retry without it.
+            # If the matches table does not have the `game_data` column, retry without it.
             msg = str(insert_err)
-            if "search_metadata" in msg:
-                print(f"Warning: 'search_metadata' column missing, retrying insert without it: {msg}")
+            if "game_data" in msg:
+                print(f"Warning: 'game_data' column missing, retrying insert without it: {msg}")
                 supabase.table("matches").insert({
                     "id": match_id,
                     "bot_a_version": bot_a_version,
@@ -119,13 +164,36 @@ def run_match_task(match_id: str, bot_a_version: str, bot_b_version: str):
             else:
                 raise
 
-        supabase.table("match_queue").update({"status": "completed"}).eq("id", match_id).execute()
+        if cache_key is not None and cached is None:
+            try:
+                result_cache.store(cache_key, match_id, winner, termination, pgn_str, game_data)
+            except Exception as cache_err:
+                print(f"Warning: could not cache result of match {match_id}: {cache_err}")
+
+        try:
+            deltas = rate_match(match_id)
+            if deltas:
+                print(f"Match {match_id}: rating change A {deltas['elo_delta_a']:+.1f}, B {deltas['elo_delta_b']:+.1f}")
+        except Exception as rating_err:
+            # The game is stored; `python -m backend.ratings` can rebuild ratings later
+            print(f"Warning: rating update for match {match_id} failed: {rating_err}")
+
+        set_status("completed")
+        live.publish(match_id, "end", {"status": "completed", "winner": winner, "termination": termination})
 
     except Exception as e:
         import traceback
-        supabase.table("match_queue").update({"status": "failed"}).eq("id", match_id).execute()
+        set_status("failed")
+        live.publish(match_id, "end", {"status": "failed"})
+        # A version without matches can still be edited; don't keep a copy of it around
+        version_cache.invalidate(bot_a_version)
+        version_cache.invalidate(bot_b_version)
         print(f"Match {match_id} failed with error: {e}")
         traceback.print_exc()
+    finally:
+        # Release root-parallel worker pools
+        for engine in engines:
+            engine.close()
 
 @router.post("/trigger")
 async def trigger_match(request: MatchRequest, background_tasks: BackgroundTasks):
@@ -135,7 +203,10 @@ async def trigger_match(request: MatchRequest, background_tasks: BackgroundTasks
     result = supabase.table("match_queue").insert({
         "bot_a_version": request.bot_a_version,
         "bot_b_version": request.bot_b_version,
-        "status": "queued"
+        "status": "queued",
+        "priority": request.priority,
+        "force": request.force,
+        "profile": request.profile
     }).execute()
 
     if not result.data:
@@ -143,7 +214,89 @@ async def trigger_match(request: MatchRequest, background_tasks: BackgroundTasks
 
     match_id = result.data[0]["id"]
     
-    # Run match in background
-    background_tasks.add_task(run_match_task, match_id, request.bot_a_version, request.bot_b_version)
+    # Run match in background, unless queue workers pick it up
+    if not external_workers_enabled():
+        live.open_channel(match_id)
+        background_tasks.add_task(run_match_task, match_id, request.bot_a_version, request.bot_b_version,
+                                  force=request.force, profile=request.profile)
 
     return {"match_id": match_id, "status": "queued"}
+
+
+def _sse(entry: dict) -> str:
+    return f"id: {entry['id']}\nevent: {entry['event']}\ndata: {json.dumps(entry['data'])}\n\n"
+
+
+@router.get("/{match_id}/stream")
+async def stream_match(match_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events for a match played by this process: "start", one "move"
+    per ply (uci, san, fen, eval, top_moves, stats) and "end". Missed events are
+    replayed first, from the start or after `Last-Event-ID`. 404 if the match is
+    not live here (queued for a worker, or long finished).
+    """
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else -1
+    subscription = live.subscribe(match_id, after)
+    if subscription is None:
+        raise HTTPException(status_code=404, detail="Match is not live on this server")
+    backlog, queue = subscription
+
+    async def events():
+        try:
+            for entry in backlog:
+                yield _sse(entry)
+                if entry["event"] == "end":
+                    return
+            while True:
+                try:
+                    entry = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line: keeps proxies from closing an idle connection during long searches
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(entry)
+                if entry["event"] == "end":
+                    return
+        finally:
+            live.unsubscribe(match_id, queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _encode_legacy_match(pgn: str, search_metadata: list) -> str:
+    # Legacy steps have no played move, so the moves (and any start position) come from the PGN
+    game = chess.pgn.read_game(io.StringIO(pgn))
+    if game is None:
+        raise HTTPException(status_code=404, detail="No search metadata stored for this match")
+    start_fen = game.headers.get("FEN")
+    moves = [move.uci() for move in game.mainline_moves()]
+    return encode_game(moves, search_metadata, start_fen)
+
+
+@router.get("/{match_id}/plies")
+async def get_match_plies(match_id: str, start: int = 0, stop: Optional[int] = None):
+    """
+    Search metadata of plies [start, stop) of a finished match: the played
+    `uci`, `eval`, `top_moves` and `stats` of each. Only the requested plies
+    are decoded; at most MAX_PLIES_PER_REQUEST are returned per call.
+    """
+    record = _game_records.get(match_id)
+    if record is None:
+        supabase = get_supabase_client()
+        # "*": matches played before game_data existed keep their metadata in a search_metadata column
+        res = supabase.table("matches").select("*").eq("id", match_id).execute()
+        if not res.data:
+            raise HTTPException(status_code=404, detail="Match not found")
+        row = res.data[0]
+        if row.get("game_data"):
+            record = GameRecord(row["game_data"])
+        elif row.get("search_metadata") and row.get("pgn"):
+            record = GameRecord(_encode_legacy_match(row["pgn"], row["search_metadata"]))
+        else:
+            raise HTTPException(status_code=404, detail="No search metadata stored for this match")
+        _game_records.put(match_id, record)
+
+    start = max(0, start)
+    stop = min(len(record) if stop is None else stop, start + MAX_PLIES_PER_REQUEST)
+    return {"total": len(record), "start": start, "plies": record.plies(start, stop)}
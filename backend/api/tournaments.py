@@ -0,0 +1,100 @@
+from fastapi import APIRouter, HTTPException, BackgroundTasks
+from pydantic import BaseModel
+from typing import List, Optional
+from ..database import get_supabase_client
+from ..tournament import FORMATS, MAX_TOURNAMENT_PLAYERS, default_swiss_rounds, games_total, max_swiss_rounds, run_tournament_task
+import chess
+
+router = APIRouter()
+
+class TournamentRequest(BaseModel):
+    name: Optional[str] = None
+    version_ids: List[str]
+    format: str = "round_robin"
+    # Swiss only; defaults to ceil(log2(players))
+    rounds: Optional[int] = None
+    games_per_pairing: int = 2
+    # Starting positions as FENs, rotated across pairings and played with both colors
+    openings: Optional[List[str]] = None
+    # Games played in parallel (default: CPU count)
+    workers: Optional[int] = None
+
+
+@router.post("")
+async def create_tournament(request: TournamentRequest, background_tasks: BackgroundTasks):
+    players = list(dict.fromkeys(request.version_ids))
+    if request.format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    if len(players) < 2:
+        raise HTTPException(status_code=400, detail="A tournament needs at least two bot versions")
+    if len(players) > MAX_TOURNAMENT_PLAYERS:
+        raise HTTPException(status_code=400, detail=f"A tournament is limited to {MAX_TOURNAMENT_PLAYERS} bot versions")
+    if request.games_per_pairing < 1:
+        raise HTTPException(status_code=400, detail="games_per_pairing must be at least 1")
+    if request.workers is not None and request.workers < 1:
+        raise HTTPException(status_code=400, detail="workers must be at least 1")
+    rounds = None
+    if request.format == "swiss":
+        rounds = request.rounds if request.rounds is not None else default_swiss_rounds(len(players))
+        if rounds < 1:
+            raise HTTPException(status_code=400, detail="rounds must be at least 1")
+        if rounds > max_swiss_rounds(len(players)):
+            raise HTTPException(status_code=400,
+                                detail=f"A Swiss tournament of {len(players)} bot versions has at most "
+                                       f"{max_swiss_rounds(len(players))} rounds")
+
+    openings = []
+    for fen in request.openings or []:
+        try:
+            board = chess.Board(fen)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid opening FEN: {fen}")
+        if not board.is_valid() or board.is_game_over():
+            raise HTTPException(status_code=400, detail=f"Opening is not a playable position: {fen}")
+        openings.append(board.fen())
+
+    supabase = get_supabase_client()
+    rows = supabase.table("bot_versions").select("*").in_("id", players).execute().data or []
+    versions = {row["id"]: row for row in rows}
+    missing = [vid for vid in players if vid not in versions]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Bot version(s) not found: {', '.join(missing)}")
+
+    total = games_total(request.format, len(players), rounds or 0, request.games_per_pairing)
+    result = supabase.table("tournaments").insert({
+        "name": request.name,
+        "format": request.format,
+        "version_ids": players,
+        "rounds": rounds,
+        "games_per_pairing": request.games_per_pairing,
+        "openings": openings,
+        "games_total": total,
+        "status": "queued"
+    }).execute()
+
+    if not result.data:
+        raise HTTPException(status_code=500, detail="Failed to create tournament")
+
+    tournament_id = result.data[0]["id"]
+    background_tasks.add_task(run_tournament_task, tournament_id, request.format, players, versions, rounds or 0,
+                              request.games_per_pairing, openings, request.workers)
+
+    return {"tournament_id": tournament_id, "status": "queued", "games_total": total}
+
+
+@router.get("/{tournament_id}")
+async def get_tournament(tournament_id: str):
+    supabase = get_supabase_client()
+    result = supabase.table("tournaments").select("*").eq("id", tournament_id).execute()
+    if not result.data:
+        raise HTTPException(status_code=404, detail="Tournament not found")
+    return result.data[0]
+
+
+@router.get("/{tournament_id}/games")
+async def get_tournament_games(tournament_id: str):
+    supabase = get_supabase_client()
+    result = supabase.table("tournament_games") \
+        .select("id, round, game_index, white_version, black_version, opening, result, termination, plies, error") \
+        .eq("tournament_id", tournament_id).order("game_index").execute()
+    return result.data or []
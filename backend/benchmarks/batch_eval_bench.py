@@ -0,0 +1,122 @@
+"""
+Equivalence and speed of Evaluator.evaluate_batch (engine/batch_eval.py).
+
+Scores the leaf positions two plies below the benchmark suites with
+`evaluate_batch` and with `evaluate` one board at a time, for rule lists that
+are fully recognized, partly recognized (mostly, and too little to be
+vectorized), not recognized at all, and a script.
+Every score must be identical (not just close), and so must
+`evaluate_moves` against pushing each move and calling `evaluate`. Reports
+the time per board of both paths.
+
+    python -m backend.benchmarks.batch_eval_bench [--batch 64] [--repeats 3]
+"""
+import argparse
+import time
+from typing import List
+import chess
+from ..engine.evaluator import Evaluator
+from ..engine.tracked_board import TrackedBoard
+from .engine_bench import REFERENCE_BOTS, leaf_positions
+from .positions import SUITES
+
+RULE_SETS = {
+    "recognized": [
+        {"name": "Material", "code": "material(board, chess.WHITE)", "weight": 1.0},
+        {"name": "Center", "code": "center_control(board, chess.WHITE) - center_control(board, chess.BLACK)",
+         "weight": 20.0},
+        {"name": "Bishop pair", "code": "bishop_pair_bonus(board) - bishop_pair_bonus(board, not board.turn)",
+         "weight": 40},
+        {"name": "Knights", "code": "piece_count(board, chess.KNIGHT, chess.WHITE) * 3 / 7", "weight": 0.3},
+        {"name": "Rooks", "code": "len(board.pieces(chess.ROOK, board.turn)) - 0.5", "weight": -1.25},
+        {"name": "Side material", "code": "material(board)", "weight": 0.1},
+    ],
+    # Mostly per-board terms: scored per position
+    "mixed": REFERENCE_BOTS["rules"] + [
+        {"name": "Broken", "code": "material(board) / 0", "weight": 1.0},
+        {"name": "Pawns", "code": "pawn_structure(board)['passed']", "weight": 15.0},
+        {"name": "No color", "code": "len(board.pieces(chess.KNIGHT, None))", "weight": 5.0},
+    ],
+    # Vectorized terms and per-board terms in one batch
+    "mostly recognized": REFERENCE_BOTS["rules"] + [
+        {"name": "Side material", "code": "material(board)", "weight": 0.1},
+        {"name": "Pawns", "code": "pawn_structure(board)['passed']", "weight": 15.0},
+        # board.pieces has no default color: this raises (scores 0) and must not be vectorized as board.turn
+        {"name": "No color", "code": "len(board.pieces(chess.KNIGHT, None))", "weight": 5.0},
+    ],
+    "unrecognized": [
+        {"name": "Mobility", "code": "mobility(board)", "weight": 3.0},
+        {"name": "Check", "code": "is_check(board)", "weight": -50.0},
+    ],
+    "script": REFERENCE_BOTS["script"],
+}
+
+
+def _timed(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _parents(fens: List[str]) -> List[chess.Board]:
+    # Positions one ply below each FEN, whose children are the leaves
+    parents = []
+    for fen in fens:
+        board = TrackedBoard(fen)
+        for move in board.legal_moves:
+            board.push(move)
+            parents.append(board.copy())
+            board.pop()
+    return parents
+
+
+def _child_mismatches(evaluator: Evaluator, parents: List[chess.Board]) -> int:
+    mismatches = 0
+    for board in parents:
+        moves = list(board.legal_moves)
+        expected = []
+        for move in moves:
+            board.push(move)
+            expected.append(evaluator.evaluate(board))
+            board.pop()
+        mismatches += sum(1 for a, b in zip(expected, evaluator.evaluate_moves(board, moves)) if a != b)
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=64, help="boards per evaluate_batch call")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    fens = [fen for fens in SUITES.values() for fen in fens]
+    boards = leaf_positions(fens)
+    parents = _parents(fens)
+    batches = [boards[i:i + args.batch] for i in range(0, len(boards), args.batch)]
+    failures = 0
+    for name, rules in RULE_SETS.items():
+        evaluator = Evaluator(rules)
+        single = [evaluator.evaluate(board) for board in boards]
+        batched = [score for batch in batches for score in evaluator.evaluate_batch(batch)]
+        mismatches = sum(1 for a, b in zip(single, batched) if a != b) + abs(len(single) - len(batched))
+        mismatches += _child_mismatches(evaluator, parents)
+        failures += mismatches
+
+        single_s = _timed(lambda: [evaluator.evaluate(board) for board in boards], args.repeats)
+        batch_s = _timed(lambda: [evaluator.evaluate_batch(batch) for batch in batches], args.repeats)
+        vectorized = evaluator._batch_rules is not None
+        print(f"{name:17s} {len(boards)} boards  single {single_s / len(boards) * 1e6:7.2f} us  "
+              f"batch {batch_s / len(boards) * 1e6:7.2f} us  ({single_s / batch_s:5.2f}x)  "
+              f"{'vectorized' if vectorized else 'per position'}  "
+              f"{'ok' if not mismatches else f'{mismatches} MISMATCHES'}")
+
+    print(f"{'OK' if not failures else 'FAILED'}: {failures} mismatches")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Engine benchmark: fixed positions through get_best_move for reference bots.
+
+Every position of positions.SUITES (opening, middlegame, endgame, tactical)
+is searched by each reference bot: a legacy rule list and a script bot
+modeled on the tactical_aggressor example. Reported per bot and suite:
+  - nodes, time and nodes per second of the full-depth search
+  - time to depth: a cold search (fresh engine and TT) to each depth
+  - leaf-eval time: microseconds per Evaluator.evaluate over the positions
+    two plies below the suite
+  - peak memory of the searches (tracemalloc, in a separate untimed pass)
+
+Results are written as JSON. With --baseline, they are compared to a saved
+run: a slowdown beyond --threshold on NPS or leaf-eval time is a regression
+(exit status 1). Changed node counts are reported too, since they mean the
+search itself changed.
+
+    python -m backend.benchmarks.engine_bench --output bench.json
+    python -m backend.benchmarks.engine_bench --baseline bench.json [--threshold 0.1]
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+import chess
+from ..engine.chess_engine import ChessEngine
+from ..engine.evaluator import Evaluator
+from ..engine.tracked_board import TrackedBoard
+from .positions import SUITES
+
+REFERENCE_BOTS = {
+    "rules": [
+        {"name": "Material", "code": "material(board, chess.WHITE)", "weight": 1.0},
+        {"name": "Mobility", "code": "mobility(board)", "weight": 3.0},
+        {"name": "Center", "code": "center_control(board, chess.WHITE)", "weight": 20.0},
+        {"name": "Bishop pair", "code": "bishop_pair_bonus(board, chess.WHITE)", "weight": 40.0},
+    ],
+    # Same evaluation as project_docs/example_bots/tactical_aggressor.json
+    "script": [
+        {"script": "def evaluate(board):\n"
+                   "    s = material(board)\n"
+                   "    s += 12 * mobility(board)\n"
+                   "    s -= 250 * king_attackers(board, board.turn)\n"
+                   "    s -= 100 if is_check(board) else 0\n"
+                   "    s -= 100 * (repetition_count(board) >= 2)\n"
+                   "    return s"},
+    ],
+}
+LEAF_EVAL_REPEATS = 3
+
+
+def _engine(rules: list, depth: int, options: dict) -> ChessEngine:
+    return ChessEngine.from_version({"rules_json": rules, "search_depth": depth, "engine_options": options})
+
+
+def _search(rules: list, fen: str, depth: int, options: dict) -> dict:
+    engine = _engine(rules, depth, options)
+    board = TrackedBoard(fen)
+    start = time.perf_counter()
+    move, score, _ = engine.get_best_move(board)
+    elapsed = time.perf_counter() - start
+    engine.close()
+    stats = engine.last_search_stats
+    # Quiescence nodes are already in "nodes" ("qnodes" counts the quiescence calls separately)
+    return {"move": move.uci() if move else None, "score": score, "nodes": stats.get("nodes", 0),
+            "time_ms": elapsed * 1000}
+
+
+def leaf_positions(fens: List[str]) -> List[chess.Board]:
+    """Positions two plies below each FEN, as the search evaluates them."""
+    leaves = []
+    for fen in fens:
+        board = TrackedBoard(fen)
+        for move in board.legal_moves:
+            board.push(move)
+            for reply in board.legal_moves:
+                board.push(reply)
+                leaves.append(board.copy())
+                board.pop()
+            board.pop()
+    return leaves
+
+
+def leaf_eval_us(rules: list, leaves: List[chess.Board]) -> float:
+    evaluator = Evaluator(rules)
+    best = float("inf")
+    for _ in range(LEAF_EVAL_REPEATS):
+        start = time.perf_counter()
+        for board in leaves:
+            evaluator.evaluate(board)
+        best = min(best, time.perf_counter() - start)
+    return best / len(leaves) * 1e6 if leaves else 0.0
+
+
+def peak_memory_kib(rules: list, fens: List[str], depth: int, options: dict) -> float:
+    peak = 0
+    for fen in fens:
+        tracemalloc.start()
+        _search(rules, fen, depth, options)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def run(depth: int, options: dict, bots: List[str], suites: List[str], memory: bool = True) -> dict:
+    results: Dict[str, dict] = {}
+    for bot in bots:
+        rules = REFERENCE_BOTS[bot]
+        results[bot] = {}
+        for suite in suites:
+            fens = SUITES[suite]
+            positions = []
+            for fen in fens:
+                time_to_depth = {}
+                for d in range(1, depth + 1):
+                    search = _search(rules, fen, d, options)
+                    time_to_depth[str(d)] = round(search["time_ms"], 2)
+                positions.append({"fen": fen, "move": search["move"], "nodes": search["nodes"],
+                                  "time_ms": round(search["time_ms"], 2), "time_to_depth_ms": time_to_depth})
+            nodes = sum(p["nodes"] for p in positions)
+            time_ms = sum(p["time_ms"] for p in positions)
+            row = {
+                "nodes": nodes,
+                "time_ms": round(time_ms, 2),
+                "nps": round(nodes / (time_ms / 1000)) if time_ms else 0,
+                "time_to_depth_ms": {str(d): round(sum(p["time_to_depth_ms"][str(d)] for p in positions), 2)
+                                     for d in range(1, depth + 1)},
+                "leaf_eval_us": round(leaf_eval_us(rules, leaf_positions(fens)), 3),
+                "positions": positions,
+            }
+            if memory:
+                row["peak_memory_kib"] = round(peak_memory_kib(rules, fens, depth, options), 1)
+            results[bot][suite] = row
+            print(f"{bot:7s} {suite:11s} nodes {nodes:9d}  {row['nps']:8d} nps  "
+                  f"leaf {row['leaf_eval_us']:8.2f} us"
+                  + (f"  peak {row['peak_memory_kib']:9.1f} KiB" if memory else ""))
+    return {
+        "meta": {
+            "depth": depth,
+            "engine_options": options,
+            "python": platform.python_version(),
+            "chess": chess.__version__,
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Regressions of `current` against `baseline`; also prints changed node counts."""
+    if current["meta"]["depth"] != baseline["meta"]["depth"] or \
+            current["meta"]["engine_options"] != baseline["meta"]["engine_options"]:
+        print("warning: baseline was run with a different depth or engine options")
+    regressions = []
+    for bot, suites in current["results"].items():
+        for suite, row in suites.items():
+            base = baseline["results"].get(bot, {}).get(suite)
+            if base is None:
+                continue
+            label = f"{bot}/{suite}"
+            if row["nodes"] != base["nodes"]:
+                print(f"note: {label} nodes changed {base['nodes']} -> {row['nodes']} (search behavior differs)")
+            if base["nps"] and row["nps"] < base["nps"] * (1 - threshold):
+                regressions.append(f"{label} nps {base['nps']} -> {row['nps']} ({row['nps'] / base['nps'] - 1:+.1%})")
+            if base["leaf_eval_us"] and row["leaf_eval_us"] > base["leaf_eval_us"] * (1 + threshold):
+                regressions.append(f"{label} leaf eval {base['leaf_eval_us']} -> {row['leaf_eval_us']} us "
+                                   f"({row['leaf_eval_us'] / base['leaf_eval_us'] - 1:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--options", type=json.loads, default={}, help="engine_options as JSON")
+    parser.add_argument("--bots", nargs="+", choices=sorted(REFERENCE_BOTS), default=sorted(REFERENCE_BOTS))
+    parser.add_argument("--suites", nargs="+", choices=list(SUITES), default=list(SUITES))
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    current = run(args.depth, args.options, args.bots, args.suites, memory=not args.no_memory)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"wrote {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        print(f"{'FAILED' if regressions else 'OK'}: {len(regressions)} regressions at {args.threshold:.0%} threshold")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Microbenchmark for Evaluator.evaluate on legacy rule bots.
+
+Checks that the fused rule function scores every position exactly like the
+previous per-rule path, then times both.
+
+    python -m backend.benchmarks.evaluator_bench [--positions N]
+"""
+import argparse
+import time
+import chess
+from ..engine import helpers
+from ..engine.evaluator import Evaluator
+from .positions import random_positions
+
+RULES = [
+    {"name": "Material", "code": "material(board, chess.WHITE)", "weight": 1.0},
+    {"name": "Knights", "code": "piece_count(board, chess.KNIGHT, chess.WHITE)", "weight": 15},
+    {"name": "Bishop pair", "code": "bishop_pair_bonus(board, chess.WHITE)", "weight": 40.0},
+    {"name": "Center", "code": "center_control(board, chess.WHITE)", "weight": 20.0},
+    {"name": "King safety", "code": "len(board.attackers(chess.BLACK, board.king(chess.WHITE)))", "weight": -5.0},
+    {"name": "Check", "code": "is_check(board)", "weight": -30.0},
+    {"name": "Broken", "code": "undefined_name + 1", "weight": 1.0},
+]
+
+
+def reference_evaluate(evaluator: Evaluator, board: chess.Board) -> float:
+    """The per-leaf rule path as it was before rules were fused."""
+    score = 0.0
+    globals_dict = {"chess": chess}
+    locals_dict = {"board": board}
+    for name in dir(helpers):
+        if not name.startswith("_"):
+            locals_dict[name] = getattr(helpers, name)
+
+    for rule in evaluator.compiled_rules:
+        try:
+            result = eval(rule["code"], globals_dict, locals_dict)
+            score += float(result) * rule["weight"]
+        except Exception:
+            pass
+    return score
+
+
+def check_equivalence(evaluator: Evaluator, boards) -> int:
+    mismatches = 0
+    for board in boards:
+        expected = reference_evaluate(evaluator, board)
+        actual = evaluator.evaluate(board)
+        if expected != actual:
+            mismatches += 1
+            print(f"MISMATCH {board.fen()}: reference={expected} fused={actual}")
+    return mismatches
+
+
+def time_per_call(fn, boards, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for board in boards:
+            fn(board)
+        best = min(best, time.perf_counter() - start)
+    return best / len(boards)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--positions", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    boards = random_positions(args.positions, args.seed)
+    evaluator = Evaluator(RULES)
+
+    mismatches = check_equivalence(evaluator, boards)
+    print(f"equivalence: {len(boards) - mismatches}/{len(boards)} positions identical")
+
+    reference = time_per_call(lambda b: reference_evaluate(evaluator, b), boards)
+    fused = time_per_call(evaluator.evaluate, boards)
+    print(f"reference: {reference * 1e6:8.2f} us/eval")
+    print(f"fused:     {fused * 1e6:8.2f} us/eval  ({reference / fused:.1f}x)")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Size and round-trip check for the compact game record (engine/game_record.py).
+
+Plays engine games, encodes each game's moves and search_metadata, and checks
+that decoding gives back the same moves, turns, stats and top moves, with
+scores equal up to the quantization step. Reports stored size against the
+JSON list that used to be stored, and the time to decode a 20-ply window at
+the end of the game.
+
+    python -m backend.benchmarks.game_record_bench [--games N] [--depth D]
+"""
+import argparse
+import json
+import time
+from ..engine.chess_engine import ChessEngine
+from ..engine.game import play_game
+from ..engine.game_record import GameRecord, SCORE_SCALE, encode_game
+
+RULES = [
+    {"name": "material", "code": "material(board)", "weight": 1.0},
+    {"name": "mobility", "code": "mobility(board)", "weight": 0.1},
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=3)
+    parser.add_argument("--depth", type=int, default=2)
+    args = parser.parse_args()
+
+    version = {"rules_json": RULES, "search_depth": args.depth, "engine_options": {"pvs": True}}
+    failures = 0
+    json_bytes = compact_bytes = 0
+    for g in range(args.games):
+        # Different openings: white's first move is forced by the start position
+        start_fen = None if g == 0 else ["rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1",
+                                         "rnbqkbnr/pppppppp/8/8/3P4/8/PPP1PPPP/RNBQKBNR b KQkq - 0 1"][g % 2]
+        game = play_game(ChessEngine.from_version(version), ChessEngine.from_version(version), "A", "B",
+                         start_fen=start_fen, label=f"Game {g}")
+        text = encode_game(game["moves"], game["search_metadata"], start_fen)
+        json_bytes += len(json.dumps(game["search_metadata"]))
+        compact_bytes += len(text)
+
+        record = GameRecord(text)
+        decoded = record.plies()
+        if list(record.moves()) != game["moves"] or len(decoded) != len(game["search_metadata"]):
+            failures += 1
+            print(f"MISMATCH game {g}: moves")
+        for original, ply, uci in zip(game["search_metadata"], decoded, game["moves"]):
+            same = (ply["uci"] == uci and ply["turn"] == original["turn"] and ply["stats"] == original["stats"]
+                    and ply["top_moves"].keys() == original["top_moves"].keys()
+                    and abs(ply["eval"] - original["eval"]) <= 0.5 / SCORE_SCALE
+                    and all(abs(ply["top_moves"][m] - s) <= 1.0 / SCORE_SCALE
+                            for m, s in original["top_moves"].items()))
+            if not same:
+                failures += 1
+                print(f"MISMATCH game {g} ply {ply['move_idx']}")
+
+        start = time.perf_counter()
+        window = GameRecord(text).plies(max(0, len(record) - 20))
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"game {g}: {len(record)} plies, json {len(json.dumps(game['search_metadata']))} B, "
+              f"compact {len(text)} B, last {len(window)} plies decoded in {elapsed:.1f} ms")
+
+    print(f"total json {json_bytes} B, compact {compact_bytes} B ({json_bytes / compact_bytes:.1f}x smaller)")
+    print(f"{'OK' if not failures else 'FAILED'}: {args.games} games, {failures} mismatches")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
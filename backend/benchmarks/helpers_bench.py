@@ -0,0 +1,130 @@
+"""
+Property check and timings for the bitboard helpers.
+
+Compares material, center_control, pawn_structure and threatened_material_change
+against their previous square-by-square implementations on random positions
+(both colors and the side-to-move default), then times old against new.
+
+    python -m backend.benchmarks.helpers_bench [--positions N]
+"""
+import argparse
+import time
+import chess
+from typing import Dict, Optional
+from ..engine import helpers
+from ..engine.helpers import piece_values, CENTER_SQUARES
+from .positions import random_positions
+
+
+def reference_material(board: chess.Board, color: Optional[bool] = None) -> int:
+    if color is None:
+        color = board.turn
+    score = 0
+    for pt, val in piece_values.items():
+        score += (len(board.pieces(pt, color)) - len(board.pieces(pt, not color))) * val
+    return score
+
+
+def reference_center_control(board: chess.Board, color: Optional[bool] = None) -> int:
+    if color is None:
+        color = board.turn
+    score = 0
+    for sq in CENTER_SQUARES:
+        piece = board.piece_at(sq)
+        if piece is not None and piece.color == color:
+            score += 1
+    return score
+
+
+def reference_pawn_structure(board: chess.Board, color: Optional[bool] = None) -> Dict[str, int]:
+    if color is None:
+        color = board.turn
+    files = {f: 0 for f in range(8)}
+    pawns = board.pieces(chess.PAWN, color)
+    passed = 0
+    isolated = 0
+    doubled = 0
+    for sq in pawns:
+        files[chess.square_file(sq)] += 1
+    for file, cnt in files.items():
+        if cnt > 1:
+            doubled += cnt - 1
+    for sq in pawns:
+        file = chess.square_file(sq)
+        rank = chess.square_rank(sq)
+        adjacent = False
+        for df in (-1, 1):
+            nf = file + df
+            if 0 <= nf < 8 and files[nf] > 0:
+                adjacent = True
+        if not adjacent:
+            isolated += 1
+        is_passed = True
+        for ep in board.pieces(chess.PAWN, not color):
+            ef = chess.square_file(ep)
+            er = chess.square_rank(ep)
+            if abs(ef - file) <= 1:
+                if (color == chess.WHITE and er > rank) or (color == chess.BLACK and er < rank):
+                    is_passed = False
+                    break
+        if is_passed:
+            passed += 1
+    return {"passed": passed, "isolated": isolated, "doubled": doubled}
+
+
+def reference_threatened_material_change(board: chess.Board, color: Optional[bool] = None) -> int:
+    if color is None:
+        color = board.turn
+    score = 0
+    for sq in chess.SQUARES:
+        p = board.piece_at(sq)
+        if not p or p.color != color:
+            continue
+        if board.attackers(not color, sq) and not board.attackers(color, sq):
+            score -= piece_values.get(p.piece_type, 0)
+    return score
+
+
+PAIRS = [
+    ("material", reference_material, helpers.material),
+    ("center_control", reference_center_control, helpers.center_control),
+    ("pawn_structure", reference_pawn_structure, helpers.pawn_structure),
+    ("threatened_material_change", reference_threatened_material_change, helpers.threatened_material_change),
+]
+
+
+def time_calls(fn, boards) -> float:
+    start = time.perf_counter()
+    for board in boards:
+        fn(board, chess.WHITE)
+        fn(board, chess.BLACK)
+    return (time.perf_counter() - start) / (2 * len(boards))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--positions", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    boards = random_positions(args.positions, args.seed, max_plies=160)
+    failures = 0
+    for name, reference, fast in PAIRS:
+        for board in boards:
+            for color in (None, chess.WHITE, chess.BLACK):
+                expected = reference(board, color)
+                actual = fast(board, color)
+                if expected != actual:
+                    failures += 1
+                    print(f"MISMATCH {name}({board.fen()!r}, {color}): {expected} != {actual}")
+        old = time_calls(reference, boards)
+        new = time_calls(fast, boards)
+        print(f"{name:28s} old {old * 1e6:7.2f} us  new {new * 1e6:7.2f} us  ({old / new:.1f}x)")
+
+    print(f"{'OK' if not failures else 'FAILED'}: {len(boards)} positions, {failures} mismatches")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Equivalence check and leaf throughput for helpers.mobility.
+
+Compares mobility(board, color) with the previous copy-and-list implementation
+on random positions, then reports leaves per second for mobility and
+evaluate_side (the helper most evaluators call at every leaf) before and
+after, plus the pseudo-legal mobility_breakdown for reference.
+
+    python -m backend.benchmarks.mobility_bench [--positions N]
+"""
+import argparse
+import time
+import chess
+from typing import Optional
+from ..engine import helpers
+from ..engine.helpers import material, center_control, bishop_pair_bonus, pawn_structure
+from .positions import random_positions
+
+
+def reference_mobility(board: chess.Board, color: Optional[bool] = None) -> int:
+    if color is None:
+        return len(list(board.legal_moves))
+    b = board.copy(stack=False)
+    b.turn = color
+    return len(list(b.legal_moves))
+
+
+def reference_evaluate_side(board: chess.Board, color: Optional[bool] = None) -> int:
+    if color is None:
+        color = board.turn
+    s = 0
+    s += material(board, color)
+    s += 10 * reference_mobility(board, color)
+    s += 30 * center_control(board, color)
+    s += 50 * bishop_pair_bonus(board, color)
+    ps = pawn_structure(board, color)
+    s += 30 * ps.get("passed", 0)
+    s -= 40 * ps.get("isolated", 0)
+    return s
+
+
+def leaves_per_second(fn, boards) -> float:
+    start = time.perf_counter()
+    for board in boards:
+        fn(board, chess.WHITE)
+        fn(board, chess.BLACK)
+    return 2 * len(boards) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--positions", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    boards = random_positions(args.positions, args.seed, max_plies=160)
+    failures = 0
+    for board in boards:
+        fen = board.fen()
+        for color in (None, chess.WHITE, chess.BLACK):
+            expected = reference_mobility(board, color)
+            actual = helpers.mobility(board, color)
+            if expected != actual or board.fen() != fen:
+                failures += 1
+                print(f"MISMATCH mobility({fen!r}, {color}): {expected} != {actual}")
+            if reference_evaluate_side(board, color) != helpers.evaluate_side(board, color):
+                failures += 1
+                print(f"MISMATCH evaluate_side({fen!r}, {color})")
+
+    rows = [
+        ("mobility", reference_mobility, helpers.mobility),
+        ("evaluate_side", reference_evaluate_side, helpers.evaluate_side),
+    ]
+    for name, old, new in rows:
+        old_rate = leaves_per_second(old, boards)
+        new_rate = leaves_per_second(new, boards)
+        print(f"{name:18s} old {old_rate:9.0f} leaves/s  new {new_rate:9.0f} leaves/s  ({new_rate / old_rate:.1f}x)")
+    rate = leaves_per_second(helpers.mobility_breakdown, boards)
+    print(f"{'mobility_breakdown':18s} {rate:9.0f} leaves/s (pseudo-legal)")
+
+    print(f"{'OK' if not failures else 'FAILED'}: {len(boards)} positions, {failures} mismatches")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Equivalence check and timings for TrackedBoard.
+
+Plays random games (standard and Chess960, with take-backs and null moves so
+positions repeat) on a TrackedBoard and a plain chess.Board side by side, and
+checks after every move that the incremental hash equals
+chess.polyglot.zobrist_hash and that is_repetition agrees. Then times
+repetition checks and hashing late in a long game.
+
+    python -m backend.benchmarks.tracked_board_bench [--games N]
+"""
+import argparse
+import random
+import time
+import chess
+import chess.polyglot
+from ..engine.tracked_board import TrackedBoard
+
+
+def check_game(rng: random.Random, chess960: bool, plies: int) -> int:
+    if chess960:
+        tracked = TrackedBoard.from_chess960_pos(rng.randrange(960))
+        plain = chess.Board(tracked.fen(), chess960=True)
+    else:
+        tracked = TrackedBoard()
+        plain = chess.Board()
+    failures = 0
+    for ply in range(plies):
+        moves = list(plain.legal_moves)
+        if not moves:
+            break
+        if plain.move_stack and rng.random() < 0.15:
+            tracked.pop()
+            plain.pop()
+        else:
+            move = chess.Move.null() if rng.random() < 0.03 and not plain.is_check() else rng.choice(moves)
+            tracked.push(move)
+            plain.push(move)
+        if tracked.zobrist != chess.polyglot.zobrist_hash(plain):
+            failures += 1
+            print(f"HASH MISMATCH {plain.fen()} after {plain.move_stack[-1:]}")
+        for count in (2, 3):
+            if tracked.is_repetition(count) != plain.is_repetition(count):
+                failures += 1
+                print(f"REPETITION MISMATCH ({count}) {plain.fen()}")
+        if ply % 25 == 0:
+            for copy in (tracked.copy(), tracked.copy(stack=4), TrackedBoard.from_board(plain)):
+                if copy.zobrist != tracked.zobrist or copy.is_repetition(2) != plain.is_repetition(2):
+                    failures += 1
+                    print(f"COPY MISMATCH {plain.fen()}")
+    return failures
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--plies", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = sum(check_game(rng, game % 3 == 0, args.plies) for game in range(args.games))
+    print(f"{'OK' if not failures else 'FAILED'}: {args.games} games, {failures} mismatches")
+
+    # A long game that shuffles knights back and forth, so repetition checks have to look far back
+    plain = chess.Board()
+    shuffle = [chess.Move.from_uci(u) for u in ("g1f3", "g8f6", "f3g1", "f6g8")]
+    for ply in range(120):
+        if ply % 8 == 0:
+            plain.push(next(m for m in plain.legal_moves if plain.piece_type_at(m.from_square) == chess.PAWN))
+        else:
+            plain.push(shuffle[ply % 4] if shuffle[ply % 4] in plain.legal_moves else next(iter(plain.legal_moves)))
+    tracked = TrackedBoard.from_board(plain)
+    move = next(iter(plain.legal_moves))
+    rows = [
+        ("is_repetition", lambda: plain.is_repetition(), lambda: tracked.is_repetition()),
+        ("zobrist hash", lambda: chess.polyglot.zobrist_hash(plain), lambda: tracked.zobrist),
+        ("push + pop", lambda: (plain.push(move), plain.pop()), lambda: (tracked.push(move), tracked.pop())),
+    ]
+    for name, old, new in rows:
+        old_t = timed(old, 5000)
+        new_t = timed(new, 5000)
+        print(f"{name:14s} chess.Board {old_t * 1e6:7.2f} us  TrackedBoard {new_t * 1e6:7.2f} us")
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+Vectorized scoring of legacy rule lists for many boards at once.
+
+A rule expression built only from recognized features is compiled into a
+function over a `Features` table: one row of bitboards per board, with piece
+counts taken as NumPy popcounts. The recognized features are
+    material(board[, color]), piece_count(board, piece_type[, color]),
+    center_control(board[, color]), bishop_pair_bonus(board[, color]),
+    len(board.pieces(piece_type, color))
+where the color is chess.WHITE/BLACK, True/False, board.turn, not board.turn
+or omitted. These can be combined with numeric constants, unary minus and
++, -, *, and / by a nonzero constant. Every other rule is scored per board
+by one fused function that returns each rule's term.
+
+Scores equal Evaluator.evaluate exactly: integer features are only accepted
+while their bound stays below 2**53 (so int64 math and the final float() are
+exact), and the weighted terms are added one rule at a time, in rule order,
+as the per-position sum does.
+
+`child_row` gives the bitboard row after a move without pushing it, so the
+search can score all children of a node from the parent board alone.
+"""
+import ast
+import builtins
+import inspect
+from functools import cached_property
+from typing import Callable, List, Optional, Sequence, Tuple
+import chess
+import numpy as np
+from . import helpers
+
+# Largest integer magnitude that float64 represents exactly
+_EXACT_INT = 2 ** 53
+
+_COLORS = {"WHITE": chess.WHITE, "BLACK": chess.BLACK}
+_PIECE_TYPES = {name.upper(): pt for pt, name in zip(chess.PIECE_TYPES, chess.PIECE_NAMES[1:])}
+
+# Bitboard columns of the features table
+_WHITE_COLUMN = 6
+_BLACK_COLUMN = 7
+_TURN_COLUMN = 8
+
+
+def _popcount(bitboards: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bitboards).astype(np.int64)
+    # NumPy < 2.0: count the bits of each byte
+    bits = np.unpackbits(np.ascontiguousarray(bitboards).view(np.uint8).reshape(*bitboards.shape, 8), axis=-1)
+    return bits.sum(axis=-1, dtype=np.int64)
+
+
+def board_row(b: chess.Board) -> tuple:
+    """The bitboards (and turn) of a board that the features are computed from."""
+    return (b.pawns, b.knights, b.bishops, b.rooks, b.queens, b.kings,
+            b.occupied_co[chess.WHITE], b.occupied_co[chess.BLACK], b.turn)
+
+
+def child_row(board: chess.Board, move: chess.Move) -> tuple:
+    """board_row of the position after the legal `move`, without pushing it."""
+    color = board.turn
+    pieces = [board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings]
+    occupied = [board.occupied_co[chess.BLACK], board.occupied_co[chess.WHITE]]
+    from_bb = chess.BB_SQUARES[move.from_square]
+    to_bb = chess.BB_SQUARES[move.to_square]
+    piece_type = board.piece_type_at(move.from_square)
+
+    if piece_type == chess.KING and board.is_castling(move):
+        rank = chess.square_rank(move.from_square)
+        kingside = chess.square_file(move.to_square) > chess.square_file(move.from_square)
+        # Chess960 moves name the rook's square, standard ones the king's destination
+        rook_from = to_bb if board.rooks & occupied[color] & to_bb else \
+            chess.BB_SQUARES[chess.square(7 if kingside else 0, rank)]
+        king_to = chess.BB_SQUARES[chess.square(6 if kingside else 2, rank)]
+        rook_to = chess.BB_SQUARES[chess.square(5 if kingside else 3, rank)]
+        pieces[chess.KING - 1] = (pieces[chess.KING - 1] & ~from_bb) | king_to
+        pieces[chess.ROOK - 1] = (pieces[chess.ROOK - 1] & ~rook_from) | rook_to
+        occupied[color] = (occupied[color] & ~from_bb & ~rook_from) | king_to | rook_to
+    else:
+        captured = to_bb & occupied[not color]
+        if piece_type == chess.PAWN and board.is_en_passant(move):
+            captured = chess.BB_SQUARES[chess.square(chess.square_file(move.to_square),
+                                                     chess.square_rank(move.from_square))]
+        if captured:
+            for i in range(6):
+                pieces[i] &= ~captured
+            occupied[not color] &= ~captured
+        pieces[piece_type - 1] &= ~from_bb
+        pieces[(move.promotion or piece_type) - 1] |= to_bb
+        occupied[color] = (occupied[color] & ~from_bb) | to_bb
+    return (*pieces, occupied[chess.WHITE], occupied[chess.BLACK], not color)
+
+
+_PIECE_VALUES = np.array([helpers.piece_values[pt] for pt in chess.PIECE_TYPES], dtype=np.int64)
+
+
+class Features:
+    """Bitboard rows of a batch of boards, with features computed on first use."""
+    def __init__(self, rows: List[tuple]):
+        self.size = len(rows)
+        self.bitboards = np.array(rows, dtype=np.uint64).reshape(-1, 9)
+
+    @cached_property
+    def turn(self) -> np.ndarray:
+        return self.bitboards[:, _TURN_COLUMN].astype(bool)
+
+    def side(self, white: np.ndarray, black: np.ndarray, color) -> np.ndarray:
+        """`white` or `black` per board, for a color or "turn"/"opponent"."""
+        if color == "turn":
+            return np.where(self.turn, white, black)
+        if color == "opponent":
+            return np.where(self.turn, black, white)
+        return white if color else black
+
+    def occupied(self, color: bool) -> np.ndarray:
+        return self.bitboards[:, _WHITE_COLUMN if color else _BLACK_COLUMN]
+
+    @cached_property
+    def white_counts(self) -> np.ndarray:
+        # Piece counts per type (columns pawn..king), one popcount for the whole table
+        return _popcount(self.bitboards[:, :6] & self.bitboards[:, _WHITE_COLUMN, None])
+
+    @cached_property
+    def black_counts(self) -> np.ndarray:
+        return _popcount(self.bitboards[:, :6] & self.bitboards[:, _BLACK_COLUMN, None])
+
+    def count(self, piece_type: int, color: bool) -> np.ndarray:
+        return (self.white_counts if color else self.black_counts)[:, piece_type - 1]
+
+    @cached_property
+    def white_material(self) -> np.ndarray:
+        # White minus black, as helpers.material sums it (integer products: exact)
+        return (self.white_counts - self.black_counts) @ _PIECE_VALUES
+
+    def center(self, color: bool) -> np.ndarray:
+        return _popcount(self.occupied(color) & np.uint64(helpers._CENTER_MASK))
+
+
+# Compiled node: (function of Features -> array or scalar, is_int, magnitude bound for ints)
+_Node = Tuple[Callable[[Features], object], bool, float]
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _is_board(node: ast.AST) -> bool:
+    return isinstance(node, ast.Name) and node.id == "board"
+
+
+def _is_turn(node: ast.AST) -> bool:
+    return isinstance(node, ast.Attribute) and _is_board(node.value) and node.attr == "turn"
+
+
+def _chess_constant(node: ast.AST, table: dict):
+    if (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "chess"
+            and node.attr in table):
+        return table[node.attr]
+    raise _Unsupported
+
+
+def _color(node: Optional[ast.AST], optional: bool = True):
+    # None means the side to move only for the helpers' optional color argument; board.pieces rejects it
+    if node is None or (isinstance(node, ast.Constant) and node.value is None):
+        if not optional:
+            raise _Unsupported
+        return "turn"
+    if isinstance(node, ast.Constant) and isinstance(node.value, bool):
+        return node.value
+    if _is_turn(node):
+        return "turn"
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not) and _is_turn(node.operand):
+        return "opponent"
+    return _chess_constant(node, _COLORS)
+
+
+def _piece_type(node: ast.AST) -> int:
+    if isinstance(node, ast.Constant) and type(node.value) is int and node.value in chess.PIECE_TYPES:
+        return node.value
+    return _chess_constant(node, _PIECE_TYPES)
+
+
+def _bind(fn, call: ast.Call) -> dict:
+    if any(isinstance(arg, ast.Starred) for arg in call.args) or any(kw.arg is None for kw in call.keywords):
+        raise _Unsupported
+    try:
+        bound = inspect.signature(fn).bind(*call.args, **{kw.arg: kw.value for kw in call.keywords})
+    except TypeError:
+        raise _Unsupported
+    if not _is_board(bound.arguments.get("board")):
+        raise _Unsupported
+    return bound.arguments
+
+
+def _feature(call: ast.Call) -> _Node:
+    func = call.func
+    if isinstance(func, ast.Name) and func.id == "len" and len(call.args) == 1 and not call.keywords:
+        # len(board.pieces(piece_type, color))
+        inner = call.args[0]
+        if not (isinstance(inner, ast.Call) and isinstance(inner.func, ast.Attribute) and _is_board(inner.func.value)
+                and inner.func.attr == "pieces" and len(inner.args) == 2 and not inner.keywords):
+            raise _Unsupported
+        pt, color = _piece_type(inner.args[0]), _color(inner.args[1], optional=False)
+        return (lambda f: f.side(f.count(pt, chess.WHITE), f.count(pt, chess.BLACK), color)), True, 64
+    if not isinstance(func, ast.Name):
+        raise _Unsupported
+
+    if func.id == "material":
+        color = _color(_bind(helpers.material, call).get("color"))
+        bound = 64 * max(helpers.piece_values.values())
+        return (lambda f: f.side(f.white_material, -f.white_material, color)), True, bound
+    if func.id == "piece_count":
+        args = _bind(helpers.piece_count, call)
+        pt, color = _piece_type(args["piece_type"]), _color(args.get("color"))
+        return (lambda f: f.side(f.count(pt, chess.WHITE), f.count(pt, chess.BLACK), color)), True, 64
+    if func.id == "center_control":
+        color = _color(_bind(helpers.center_control, call).get("color"))
+        return (lambda f: f.side(f.center(chess.WHITE), f.center(chess.BLACK), color)), True, 4
+    if func.id == "bishop_pair_bonus":
+        color = _color(_bind(helpers.bishop_pair_bonus, call).get("color"))
+        def pair(f: Features):
+            has_pair = f.side(f.count(chess.BISHOP, chess.WHITE), f.count(chess.BISHOP, chess.BLACK), color) >= 2
+            return has_pair.astype(np.int64)
+        return pair, True, 1
+    raise _Unsupported
+
+
+def _compile(node: ast.AST) -> _Node:
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = node.value
+        return (lambda f: value), type(value) is int, abs(value) if type(value) is int else 0
+    if isinstance(node, ast.Call):
+        return _feature(node)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand, is_int, bound = _compile(node.operand)
+        if isinstance(node.op, ast.UAdd):
+            return operand, is_int, bound
+        return (lambda f: -operand(f)), is_int, bound
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub, ast.Mult, ast.Div)):
+        left, left_int, left_bound = _compile(node.left)
+        right, right_int, right_bound = _compile(node.right)
+        is_int = left_int and right_int
+        if isinstance(node.op, ast.Div):
+            # Only by a nonzero constant: a zero divisor raises per position but not in NumPy
+            if not (isinstance(node.right, ast.Constant) and node.right.value):
+                raise _Unsupported
+            if (left_int and left_bound >= _EXACT_INT) or (right_int and right_bound >= _EXACT_INT):
+                raise _Unsupported
+            return (lambda f: left(f) / right(f)), False, 0
+        bound = left_bound * right_bound if isinstance(node.op, ast.Mult) else left_bound + right_bound
+        if is_int and bound >= _EXACT_INT:
+            raise _Unsupported
+        if not is_int and ((left_int and left_bound >= _EXACT_INT) or (right_int and right_bound >= _EXACT_INT)):
+            raise _Unsupported
+        if isinstance(node.op, ast.Add):
+            return (lambda f: left(f) + right(f)), is_int, bound
+        if isinstance(node.op, ast.Sub):
+            return (lambda f: left(f) - right(f)), is_int, bound
+        return (lambda f: left(f) * right(f)), is_int, bound
+    raise _Unsupported
+
+
+def vectorize(expr: ast.AST) -> Optional[Callable[[Features], np.ndarray]]:
+    """A function computing `float(expr)` for every board of a Features table, or None if not recognized."""
+    try:
+        fn, _, _ = _compile(expr)
+    except _Unsupported:
+        return None
+    def column(f: Features) -> np.ndarray:
+        value = fn(f)
+        if isinstance(value, np.ndarray):
+            return value.astype(np.float64)
+        # A constant expression
+        return np.full(f.size, value, dtype=np.float64)
+    return column
+
+
+def _fuse_terms(terms: List[Tuple[ast.AST, float]], namespace: dict):
+    """
+    One function returning each rule's term for a board,
+
+        def _terms(board):
+            __t = [0.0] * <n>
+            try: __t[0] = float(<rule>) * <weight>
+            except Exception: pass
+            ...
+            return __t
+
+    so a failing rule contributes 0.0, as it contributes nothing per position.
+    """
+    func = ast.parse(f"def _terms(board):\n    __t = [0.0] * {len(terms)}\n    return __t").body[0]
+    for i, (expr, weight) in enumerate(terms):
+        guarded = ast.parse(f"try:\n    __t[{i}] = float(__expr) * __weight\nexcept Exception:\n    pass").body[0]
+        term = guarded.body[0]
+        term.value.left.args[0] = expr
+        term.value.right = ast.Constant(value=weight)
+        func.body.insert(-1, guarded)
+    module = ast.fix_missing_locations(ast.Module(body=[func], type_ignores=[]))
+    rules_globals = {"__builtins__": builtins, **namespace}
+    exec(compile(module, "<rules>", "exec"), rules_globals)
+    return rules_globals["_terms"]
+
+
+class BatchRules:
+    """A legacy rule list split into vectorized terms and per-board terms, summed in rule order."""
+    def __init__(self, columns: List[Tuple[str, object, float]], per_board):
+        self.columns = columns   # ("vector", fn, weight) or ("board", index into per_board terms, _)
+        self.per_board = per_board
+
+    def entry(self, board: chess.Board) -> tuple:
+        """What scoring needs from one board: its bitboard row and its per-board terms."""
+        return board_row(board), self.per_board(board) if self.per_board is not None else None
+
+    @staticmethod
+    def child_rows(board: chess.Board, moves: Sequence[chess.Move]) -> List[tuple]:
+        return [child_row(board, move) for move in moves]
+
+    def score_rows(self, rows: List[tuple], board_terms: Optional[np.ndarray] = None) -> List[float]:
+        """Scores from bitboard rows, and the per-board terms if any rule needs them."""
+        features = Features(rows)
+        score = np.zeros(len(rows), dtype=np.float64)
+        # Column by column, not a matrix product: the same additions in the same order as per position
+        for kind, fn, weight in self.columns:
+            if kind == "vector":
+                score += fn(features) * weight
+            else:
+                score += board_terms[:, fn]
+        return score.tolist()
+
+    def score_entries(self, entries: List[tuple]) -> List[float]:
+        board_terms = None
+        if self.per_board is not None:
+            board_terms = np.array([terms for _, terms in entries], dtype=np.float64).reshape(len(entries), -1)
+        return self.score_rows([row for row, _ in entries], board_terms)
+
+    def scores(self, boards: Sequence[chess.Board]) -> List[float]:
+        return self.score_entries([self.entry(board) for board in boards])
+
+
+def compile_rules(rules: List[dict], namespace: dict) -> Optional[BatchRules]:
+    """
+    Batch scorer of a legacy rule list, or None when per-position evaluation is as fast:
+    no rule is recognized, or more rules fall back to per-board terms than are vectorized
+    (the per-board pass then costs about as much as evaluate, plus the NumPy overhead).
+    Rules are filtered as Evaluator._fuse_rules does.
+    """
+    columns = []
+    fallback: List[Tuple[ast.AST, float]] = []
+    for rule in rules:
+        try:
+            expr = ast.parse(rule["code"], mode="eval").body
+            weight = rule.get("weight", 1.0)
+        except Exception:
+            continue
+        if not isinstance(weight, (int, float)):
+            continue
+        fn = vectorize(expr)
+        if fn is not None:
+            columns.append(("vector", fn, weight))
+        else:
+            columns.append(("board", len(fallback), weight))
+            fallback.append((expr, weight))
+    vectorized = len(columns) - len(fallback)
+    if not vectorized or len(fallback) > vectorized:
+        return None
+    return BatchRules(columns, _fuse_terms(fallback, namespace) if fallback else None)
@@ -1,30 +1,463 @@
+import math
+import time
 import chess
-from .evaluator import Evaluator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from .evaluator import Evaluator, DEFAULT_EVAL_CACHE_SIZE
+from .transposition import TranspositionTable, DEFAULT_TT_SIZE, EXACT, LOWER, UPPER
+from .move_ordering import ORDERERS, UciOrderer
+from .helpers import piece_values
+from .tracked_board import TrackedBoard, position_key
+
+# Bump whenever a change to the search, the evaluator or the helpers can change
+# the moves a bot plays; cached match results from older versions are then ignored.
+ENGINE_VERSION = 3
+
+# Options a bot version can declare in `bot_versions.engine_options`, with their defaults.
+# Budgets are optional; without any budget the engine searches exactly `search_depth`.
+ENGINE_OPTION_DEFAULTS = {
+    "move_time_ms": None,   # wall-clock budget per move
+    "move_nodes": None,     # node budget per move
+    "game_time_ms": None,   # wall-clock budget for the whole game (exceeding it loses on time)
+    "game_nodes": None,     # node budget for the whole game (exceeding it loses on time)
+    "tt_size": DEFAULT_TT_SIZE,
+    "move_ordering": "uci",        # or "heuristic" (hash move, MVV-LVA, killers, history); see move_ordering.py
+    "measure_ordering": False,     # with "heuristic", also run a UCI-ordered search to report the node reduction
+    "quiescence": False,           # extend captures/promotions past the horizon instead of evaluating
+    "delta_pruning": False,        # in quiescence, skip captures that cannot raise alpha
+    "delta_margin": 200,           # safety margin for delta pruning, in evaluator units
+    # Advanced search; all off by default so existing bots keep their exact behavior
+    "advanced_search": False,      # shorthand for pvs + aspiration_window=50 + null_move + lmr
+    "pvs": False,                  # principal variation search (zero-window scouts, re-search on fail high)
+    "aspiration_window": None,     # half-width of the root window around the previous iteration's score
+    "null_move": False,            # null-move pruning (not in check or in king-and-pawn endings)
+    "lmr": False,                  # late move reductions for quiet moves
+    "workers": None,               # split root moves across this many processes
+    "batch_frontier": False,       # score the children of depth-1 nodes in one call (vectorized rule bots)
+    # Per-move instrumentation in search_metadata stats; off costs nothing
+    "instrument": False,           # evaluate calls, time in evaluate vs the rest of the search
+    "helper_sample_every": None,   # with instrument, time each helper on every Nth evaluate call
+    # Evaluation cache (see Evaluator); on by default only for bots marked pure
+    "pure": False,                 # the evaluation depends on the position only, not on move history
+    "eval_cache_size": None,       # LRU entries; 0 disables, default DEFAULT_EVAL_CACHE_SIZE when pure
+}
+
+# Options that configure the Evaluator rather than the search
+EVALUATOR_OPTIONS = ("pure", "eval_cache_size")
+
+# Settings turned on by `advanced_search` unless given explicitly
+ADVANCED_SEARCH_OPTIONS = {"pvs": True, "aspiration_window": 50, "null_move": True, "lmr": True}
+
+# String options and their allowed values
+ENGINE_OPTION_CHOICES = {
+    "move_ordering": tuple(ORDERERS),
+}
+
+# When only a game budget is set, each move gets remaining / GAME_MOVES_TO_GO
+GAME_MOVES_TO_GO = 30
+
+# Hard limit on quiescence plies below the horizon
+MAX_QUIESCENCE_DEPTH = 16
+
+# Null-move depth reduction, and late move reduction thresholds
+NULL_MOVE_REDUCTION = 2
+LMR_MIN_DEPTH = 3
+LMR_FULL_MOVES = 3
+
+
+def parse_engine_options(options: Optional[dict]) -> dict:
+    """
+    Validate `engine_options` from a bot version and fill in defaults.
+    Raises ValueError on unknown keys or bad values. Apart from EVALUATOR_OPTIONS,
+    the result can be passed to ChessEngine as keyword arguments.
+    """
+    options = options or {}
+    parsed = dict(ENGINE_OPTION_DEFAULTS)
+    for name, value in options.items():
+        if name not in ENGINE_OPTION_DEFAULTS:
+            raise ValueError(f"Unknown engine option: {name}")
+        if value is None:
+            parsed[name] = ENGINE_OPTION_DEFAULTS[name]
+            continue
+        if name in ENGINE_OPTION_CHOICES:
+            if value not in ENGINE_OPTION_CHOICES[name]:
+                raise ValueError(f"Engine option '{name}' must be one of {', '.join(ENGINE_OPTION_CHOICES[name])}")
+            parsed[name] = value
+            continue
+        if isinstance(ENGINE_OPTION_DEFAULTS[name], bool):
+            if not isinstance(value, bool):
+                raise ValueError(f"Engine option '{name}' must be true or false")
+            parsed[name] = value
+            continue
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(f"Engine option '{name}' must be a non-negative integer")
+        if name not in ("tt_size", "eval_cache_size") and value == 0:
+            raise ValueError(f"Engine option '{name}' must be positive")
+        parsed[name] = value
+
+    if parsed.pop("advanced_search"):
+        for name, value in ADVANCED_SEARCH_OPTIONS.items():
+            if options.get(name) is None:
+                parsed[name] = value
+    return parsed
+
+
+def evaluator_cache_size(options: dict) -> int:
+    """Eval cache size for parsed engine options: explicit size, else on only for pure bots."""
+    if options.get("eval_cache_size") is not None:
+        return options["eval_cache_size"]
+    return DEFAULT_EVAL_CACHE_SIZE if options.get("pure") else 0
+
+
+class SearchAborted(Exception):
+    """Raised inside the search when the move budget runs out."""
+
 
 class ChessEngine:
     """
     Chess engine using Negamax with alpha-beta pruning.
+
+    Without a budget the engine searches to a fixed depth. With a time or node
+    budget it deepens iteratively up to `depth` and plays the best move of the
+    last completed iteration.
     """
-    def __init__(self, evaluator: Evaluator, depth: int, repetition_penalty: float = 150.0):
+    def __init__(self, evaluator: Evaluator, depth: int, repetition_penalty: float = 150.0,
+                 tt_size: int = DEFAULT_TT_SIZE, move_time_ms: Optional[int] = None,
+                 move_nodes: Optional[int] = None, game_time_ms: Optional[int] = None,
+                 game_nodes: Optional[int] = None, move_ordering: str = "uci",
+                 measure_ordering: bool = False, quiescence: bool = False,
+                 delta_pruning: bool = False, delta_margin: int = 200, pvs: bool = False,
+                 aspiration_window: Optional[int] = None, null_move: bool = False, lmr: bool = False,
+                 workers: Optional[int] = None, instrument: bool = False,
+                 helper_sample_every: Optional[int] = None, batch_frontier: bool = False):
+        if instrument:
+            # Instrumentation patches the evaluator, which may be shared (version_cache); use a private copy
+            evaluator = evaluator.fork()
         self.evaluator = evaluator
         self.depth = depth
         # Penalty (in same units as evaluator) subtracted from moves that lead to threefold repetition
         self.repetition_penalty = repetition_penalty
+        # Transposition table allocated once per engine (one match); entries only serve the search that stored them
+        self.tt = TranspositionTable(tt_size) if tt_size else None
+        self.move_time_ms = move_time_ms
+        self.move_nodes = move_nodes
+        self.game_time_ms = game_time_ms
+        self.game_nodes = game_nodes
+        # Pluggable move ordering; killers/history are kept on the orderer
+        self.orderer = ORDERERS[move_ordering]()
+        # In UCI order the first of several tied root moves is already the lowest UCI string; any
+        # other order needs the one-ulp root window (see _search_root) to break ties the same way
+        self._root_tie_window = not isinstance(self.orderer, UciOrderer)
+        self.measure_ordering = measure_ordering
+        self.quiescence = quiescence
+        self.delta_pruning = delta_pruning
+        self.delta_margin = delta_margin
+        self.pvs = pvs
+        self.aspiration_window = aspiration_window
+        self.null_move = null_move
+        self.lmr = lmr
+        # Root-parallel search; the process pool is created on first use and kept until close()
+        self.workers = workers if workers and workers > 1 else None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Frontier batching: children of depth-1 nodes are leaves and go to the evaluator together.
+        # Only when the evaluator scores them from bitboards alone; other evaluators keep one
+        # evaluate call per leaf, since scoring children ahead of the alpha-beta comparisons
+        # would only add evaluations. Without quiescence only: with it, leaves are searched further.
+        self.batch_frontier = batch_frontier and not quiescence and evaluator.moves_vectorized
+        # Evaluator counters are per process, so root-parallel workers' evaluations are not included
+        self.instrument = instrument
+        if instrument:
+            evaluator.instrument(helper_sample_every)
+        # Totals across the game, used for per-game budgets
+        self.time_used = 0.0
+        self.nodes_used = 0
+        self.nodes = 0
+        self.qnodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.researches = 0
+        self.null_cutoffs = 0
+        self.frontier_evals = 0
+        self.last_search_stats: dict = {}
+        self._root_ply = 0
+        self._abortable = False
+        self._deadline = float('inf')
+        self._node_limit = float('inf')
+
+    @classmethod
+    def from_version(cls, version: dict, evaluator: Optional[Evaluator] = None) -> "ChessEngine":
+        """Build an engine from a `bot_versions` row."""
+        options = parse_engine_options(version.get("engine_options"))
+        cache_size = evaluator_cache_size(options)
+        for name in EVALUATOR_OPTIONS:
+            options.pop(name)
+        if evaluator is None:
+            evaluator = Evaluator(version["rules_json"], cache_size=cache_size)
+        return cls(evaluator, version["search_depth"], **options)
+
+    def _search_options(self) -> dict:
+        """Constructor arguments that shape the tree below the root (used to build worker engines)."""
+        return {
+            "depth": self.depth,
+            "repetition_penalty": self.repetition_penalty,
+            "tt_size": self.tt.size if self.tt is not None else 0,
+            "move_ordering": self.orderer.name,
+            "quiescence": self.quiescence,
+            "delta_pruning": self.delta_pruning,
+            "delta_margin": self.delta_margin,
+            "pvs": self.pvs,
+            "null_move": self.null_move,
+            "lmr": self.lmr,
+            "batch_frontier": self.batch_frontier,
+        }
+
+    def close(self):
+        """Shut down the root-parallel worker pool, if any."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    @property
+    def has_budget(self) -> bool:
+        return any(v is not None for v in (self.move_time_ms, self.move_nodes, self.game_time_ms, self.game_nodes))
+
+    @property
+    def out_of_time(self) -> bool:
+        """True once the engine has exceeded a per-game budget."""
+        if self.game_time_ms is not None and self.time_used * 1000 > self.game_time_ms:
+            return True
+        if self.game_nodes is not None and self.nodes_used > self.game_nodes:
+            return True
+        return False
+
+    def _set_budget(self, start: float):
+        time_limit = self.move_time_ms / 1000 if self.move_time_ms is not None else None
+        if self.game_time_ms is not None:
+            share = max(self.game_time_ms / 1000 - self.time_used, 0.0) / GAME_MOVES_TO_GO
+            time_limit = share if time_limit is None else min(time_limit, share)
+        node_limit = self.move_nodes
+        if self.game_nodes is not None:
+            share = max(self.game_nodes - self.nodes_used, 0) // GAME_MOVES_TO_GO
+            node_limit = share if node_limit is None else min(node_limit, share)
+        self._deadline = start + time_limit if time_limit is not None else float('inf')
+        self._node_limit = node_limit if node_limit is not None else float('inf')
+
+    def _start_search(self, board: chess.Board):
+        self.nodes = 0
+        self.qnodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.researches = 0
+        self.null_cutoffs = 0
+        self.frontier_evals = 0
+        self._root_ply = len(board.move_stack)
+        self.orderer.new_search()
+        if self.tt is not None:
+            self.tt.new_search()
 
     def get_best_move(self, board: chess.Board) -> tuple[chess.Move, float, dict[str, float]]:
+        """
+        Best move, its score, and a score per root move (`move_evals`, stored as
+        `top_moves`). The best move's score is exact. Any other move is exact only
+        if it reaches the best score; otherwise its value is an upper bound, which
+        depends on move ordering: with move_ordering = "heuristic" these bounds
+        differ from the default UCI-ordered search.
+        """
+        start = time.perf_counter()
+        counters = self.evaluator.counters() if self.instrument else None
+        if not isinstance(board, TrackedBoard):
+            # Incremental hashing makes TT probes and repetition checks O(1)
+            board = TrackedBoard.from_board(board)
+        self._start_search(board)
+
+        aborted = False
+        if self.workers and not self.has_budget:
+            best_move, best_score, move_evals = self._search_root_parallel(board, self.depth)
+            completed_depth = self.depth
+        elif not self.has_budget and self.aspiration_window is None:
+            best_move, best_score, move_evals = self._search_root(board, self.depth)
+            completed_depth = self.depth
+        else:
+            self._set_budget(start)
+            result = None
+            completed_depth = 0
+            for depth in range(1, self.depth + 1):
+                # The first iteration always completes so there is a move to play
+                self._abortable = depth > 1
+                try:
+                    if self.workers:
+                        result = self._search_root_parallel(board, depth)
+                    elif result is not None and self.aspiration_window is not None:
+                        result = self._search_root_aspiration(board, depth, result[1])
+                    else:
+                        result = self._search_root(board, depth)
+                except SearchAborted:
+                    while len(board.move_stack) > self._root_ply:
+                        board.pop()
+                    aborted = True
+                    break
+                completed_depth = depth
+            self._abortable = False
+            best_move, best_score, move_evals = result
+
+        elapsed = time.perf_counter() - start
+        self.time_used += elapsed
+        self.nodes_used += self.nodes
+
+        self.last_search_stats = {
+            "depth": completed_depth,
+            "nodes": self.nodes,
+            "time_ms": round(elapsed * 1000, 1),
+            # Share of beta cutoffs produced by the first move searched (ordering quality)
+            "first_move_cutoff_rate": round(self.first_move_cutoffs / self.cutoffs, 4) if self.cutoffs else 0.0,
+        }
+        if self.quiescence:
+            self.last_search_stats["qnodes"] = self.qnodes
+        if self.pvs or self.lmr or self.aspiration_window is not None:
+            self.last_search_stats["researches"] = self.researches
+        if self.null_move:
+            self.last_search_stats["null_cutoffs"] = self.null_cutoffs
+        if self.batch_frontier:
+            # Leaves scored in frontier batches, including ones a cutoff then skips
+            self.last_search_stats["frontier_evals"] = self.frontier_evals
+        if aborted:
+            self.last_search_stats["aborted"] = True
+        if self.tt is not None:
+            self.last_search_stats.update(self.tt.stats())
+        if self.evaluator.cache is not None:
+            # Cumulative for the match
+            self.last_search_stats["eval_cache"] = self.evaluator.cache_stats()
+        if counters is not None:
+            instrumented = self.evaluator.counters_since(counters)
+            # Move generation, ordering, TT and the rest of the search
+            instrumented["search_ms"] = round(elapsed * 1000 - instrumented["eval_ms"], 2)
+            self.last_search_stats.update(instrumented)
+        if self.workers:
+            self.last_search_stats["workers"] = self.workers
+        elif self.measure_ordering and completed_depth > 0:
+            self.last_search_stats.update(self._measure_node_reduction(board, completed_depth))
+        return best_move, best_score, move_evals
+
+    def _measure_node_reduction(self, board: chess.Board, depth: int) -> dict:
+        """Search the same position with legacy UCI ordering and compare node counts."""
+        baseline = ChessEngine(self.evaluator, depth, self.repetition_penalty,
+                               tt_size=self.tt.size if self.tt is not None else 0, move_ordering=UciOrderer.name,
+                               quiescence=self.quiescence, delta_pruning=self.delta_pruning,
+                               delta_margin=self.delta_margin)
+        baseline.get_best_move(board)
+        return {
+            "baseline_nodes": baseline.nodes,
+            "node_reduction": round(baseline.nodes / self.nodes, 2) if self.nodes else 0.0,
+        }
+
+    def _search_root_parallel(self, board: chess.Board, depth: int) -> tuple[chess.Move, float, dict[str, float]]:
+        """
+        Search the first root move here, then split the remaining root moves across
+        worker processes using its score as alpha. Any move that reaches that score
+        gets an exact value, so the best move and score are the same as the serial
+        search (ties go to the lowest UCI string).
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_root_worker,
+                                             initargs=(self.evaluator.rules, self.evaluator.cache_size,
+                                                       self._search_options()))
+        moves = self.orderer.order(board, list(board.legal_moves), 0)
+        if not moves:
+            return None, float('-inf'), {}
+        scores = {moves[0].uci(): self.search_root_move(board, moves[0], depth)}
+        alpha = scores[moves[0].uci()]
+        moves = moves[1:]
+
+        root = board.root()
+        history = [m.uci() for m in board.move_stack]
+        time_left = None
+        node_limit = None
+        if self._abortable:
+            time_left = self._deadline - time.perf_counter() if self._deadline != float('inf') else None
+            if self._node_limit != float('inf'):
+                node_limit = max(int(self._node_limit - self.nodes) // self.workers, 1)
+        # Deal moves round-robin so each worker gets a share of the promising ones
+        chunks = [moves[i::self.workers] for i in range(self.workers)]
+        futures = [
+            self._pool.submit(_search_root_moves, root.fen(en_passant="fen"), root.chess960, history,
+                              [m.uci() for m in chunk], depth, alpha, time_left, node_limit)
+            for chunk in chunks if chunk
+        ]
+
+        aborted = False
+        for future in futures:
+            result = future.result()
+            self.nodes += result["nodes"]
+            aborted = aborted or result["aborted"]
+            scores.update(result["scores"])
+        if aborted:
+            raise SearchAborted()
+
         best_move = None
         best_score = float('-inf')
-        alpha = float('-inf')
-        beta = float('inf')
-        
         move_evals = {}
+        for uci in sorted(scores):
+            score = scores[uci]
+            move_evals[uci] = score
+            if score > best_score:
+                best_score = score
+                best_move = chess.Move.from_uci(uci)
+        return best_move, best_score, move_evals
 
-        moves = list(board.legal_moves)
-        moves.sort(key=lambda m: m.uci())
+    def search_root_move(self, board: chess.Board, move: chess.Move, depth: int,
+                         alpha: float = float('-inf')) -> float:
+        """Score of a single root move; exact if it is at least `alpha`, otherwise an upper bound."""
+        board.push(move)
+        try:
+            score = -self.negamax(board, depth - 1, float('-inf'), -math.nextafter(alpha, float('-inf')))
+            try:
+                if board.is_repetition():
+                    score -= self.repetition_penalty
+            except Exception:
+                pass
+        finally:
+            board.pop()
+        return score
 
-        for move in moves:
+    def _search_root_aspiration(self, board: chess.Board, depth: int,
+                                previous_score: float) -> tuple[chess.Move, float, dict[str, float]]:
+        """Search a narrow window around the previous iteration's score, widening on failure."""
+        if math.isinf(previous_score):
+            return self._search_root(board, depth)
+        low = previous_score - self.aspiration_window
+        high = previous_score + self.aspiration_window
+        result = self._search_root(board, depth, low, high)
+        if low < result[1] < high:
+            return result
+        self.researches += 1
+        return self._search_root(board, depth)
+
+    def _search_root(self, board: chess.Board, depth: int, alpha: float = float('-inf'),
+                     beta: float = float('inf')) -> tuple[chess.Move, float, dict[str, float]]:
+        best_move = None
+        best_score = float('-inf')
+
+        move_evals = {}
+
+        hash_move = None
+        if self.tt is not None:
+            entry = self.tt.probe(position_key(board))
+            if entry is not None:
+                hash_move = entry[3]
+        moves = self.orderer.order(board, list(board.legal_moves), 0, hash_move)
+
+        for i, move in enumerate(moves):
             board.push(move)
-            score = -self.negamax(board, self.depth - 1, -beta, -alpha)
+            # Lower alpha by one ulp so a move that ties the best score still gets an
+            # exact value; ties then go to the lowest UCI string whatever the order.
+            root_alpha = math.nextafter(alpha, float('-inf')) if self._root_tie_window else alpha
+            if self.pvs and i > 0:
+                score = -self.negamax(board, depth - 1, -math.nextafter(root_alpha, float('inf')), -root_alpha)
+                if root_alpha < score < beta:
+                    self.researches += 1
+                    score = -self.negamax(board, depth - 1, -beta, -root_alpha)
+            else:
+                score = -self.negamax(board, depth - 1, -beta, -root_alpha)
             # Penalize positions that are repeated (threefold repetition) to discourage draws by repetition
             try:
                 if board.is_repetition():
@@ -32,33 +465,106 @@ class ChessEngine:
             except Exception:
                 pass
             board.pop()
-            
+
             move_evals[move.uci()] = score
 
-            if score > best_score:
+            if score > best_score or (score == best_score and move.uci() < best_move.uci()):
                 best_score = score
                 best_move = move
-            
+
             alpha = max(alpha, score)
             if alpha >= beta:
-                # To show a "tree" or all options, we don't break on the top level
-                pass
-        
+                # To show a "tree" or all options, we don't break on the top level,
+                # except when an aspiration window failed high and will be re-searched
+                if beta != float('inf'):
+                    break
+
         return best_move, best_score, move_evals
 
-    def negamax(self, board: chess.Board, depth: int, alpha: float, beta: float) -> float:
-        if depth == 0 or board.is_game_over():
+    def _check_budget(self):
+        if self.nodes >= self._node_limit or (self.nodes & 255 == 0 and time.perf_counter() > self._deadline):
+            raise SearchAborted()
+
+    def negamax(self, board: chess.Board, depth: int, alpha: float, beta: float, allow_null: bool = True) -> float:
+        self.nodes += 1
+        if self._abortable:
+            self._check_budget()
+
+        if depth == 0:
+            if self.quiescence:
+                return self.quiesce(board, alpha, beta, 0)
             # Return evaluation from the perspective of the side to move
             score = self.evaluator.evaluate(board)
             return score if board.turn == chess.WHITE else -score
 
+        # Only entries searched to exactly this depth are reused, so scores stay
+        # identical to a plain fixed-depth search.
+        key = None
+        hash_move = None
+        if self.tt is not None:
+            key = position_key(board)
+            entry = self.tt.probe(key)
+            if entry is not None:
+                tt_depth, tt_score, tt_bound, hash_move = entry
+                if tt_depth == depth:
+                    if tt_bound == EXACT:
+                        return tt_score
+                    if tt_bound == LOWER and tt_score >= beta:
+                        return tt_score
+                    if tt_bound == UPPER and tt_score <= alpha:
+                        return tt_score
+
+        if board.is_game_over():
+            score = self.evaluator.evaluate(board)
+            return score if board.turn == chess.WHITE else -score
+
+        in_check = (self.null_move or self.lmr) and board.is_check()
+
+        # Null-move pruning: if passing still fails high, the position is good enough
+        if (self.null_move and allow_null and depth > NULL_MOVE_REDUCTION and not in_check
+                and beta != float('inf') and self._has_non_pawn_material(board)):
+            board.push(chess.Move.null())
+            score = -self.negamax(board, depth - 1 - NULL_MOVE_REDUCTION, -beta,
+                                  -math.nextafter(beta, float('-inf')), allow_null=False)
+            board.pop()
+            if score >= beta:
+                self.null_cutoffs += 1
+                return score
+
+        alpha_orig = alpha
         max_score = float('-inf')
-        moves = list(board.legal_moves)
-        moves.sort(key=lambda m: m.uci())
+        best_move = None
+        ply = len(board.move_stack) - self._root_ply
+        moves = self.orderer.order(board, list(board.legal_moves), ply, hash_move)
 
-        for move in moves:
+        batch_leaves = depth == 1 and self.batch_frontier and len(moves) > 2
+        leaf_scores = None
+
+        for i, move in enumerate(moves):
+            if batch_leaves and i == 1:
+                # The children are leaves. Most cutoffs come from the first move; once it has
+                # not cut off, score the remaining children at once, then compare as before.
+                leaf_scores = [None] + self.evaluator.evaluate_moves(board, moves[1:])
+                self.frontier_evals += len(moves) - 1
+            reduction = 0
+            if (self.lmr and i >= LMR_FULL_MOVES and depth >= LMR_MIN_DEPTH and not in_check
+                    and not move.promotion and not board.is_capture(move) and not board.gives_check(move)):
+                reduction = 1
             board.push(move)
-            score = -self.negamax(board, depth - 1, -beta, -alpha)
+            if leaf_scores is not None:
+                score = self._frontier_leaf(board, leaf_scores[i], i, alpha, beta)
+            elif i == 0 or not (self.pvs or reduction):
+                score = -self.negamax(board, depth - 1, -beta, -alpha)
+            else:
+                # Scout with a zero window (PVS) and/or reduced depth (LMR), re-search if it beats alpha
+                scout_beta = math.nextafter(alpha, float('inf')) if self.pvs else beta
+                score = -self.negamax(board, depth - 1 - reduction, -scout_beta, -alpha)
+                if reduction and score > alpha:
+                    self.researches += 1
+                    score = -self.negamax(board, depth - 1, -scout_beta, -alpha)
+                if self.pvs and alpha < score < beta:
+                    self.researches += 1
+                    score = -self.negamax(board, depth - 1, -beta, -alpha)
             # Penalize repetition at deeper search as well
             try:
                 if board.is_repetition():
@@ -67,9 +573,127 @@ class ChessEngine:
                 pass
             board.pop()
 
-            max_score = max(max_score, score)
+            if score > max_score:
+                max_score = score
+                best_move = move
             alpha = max(alpha, score)
             if alpha >= beta:
+                self.cutoffs += 1
+                if i == 0:
+                    self.first_move_cutoffs += 1
+                self.orderer.record_cutoff(board, move, ply, depth)
                 break
-        
+
+        if key is not None:
+            if max_score <= alpha_orig:
+                bound = UPPER
+            elif max_score >= beta:
+                bound = LOWER
+            else:
+                bound = EXACT
+            self.tt.store(key, depth, max_score, bound, best_move)
+
         return max_score
+
+    def _frontier_leaf(self, board: chess.Board, score: float, i: int, alpha: float, beta: float) -> float:
+        """
+        What the loop in negamax gets from searching the leaf `board` with a
+        precomputed evaluation, counting the same nodes and PVS re-searches.
+        (LMR never reduces at depth 1.)
+        """
+        self.nodes += 1
+        if self._abortable:
+            self._check_budget()
+        score = -score if board.turn == chess.WHITE else score
+        if self.pvs and i > 0 and alpha < score < beta:
+            # The zero-window scout returned the exact leaf score; the re-search finds it again
+            self.researches += 1
+            self.nodes += 1
+            if self._abortable:
+                self._check_budget()
+        return score
+
+    @staticmethod
+    def _has_non_pawn_material(board: chess.Board) -> bool:
+        # Positions with only king and pawns are prone to zugzwang, where passing is not a lower bound
+        own = board.occupied_co[board.turn]
+        return bool(own & ~(board.pawns | board.kings))
+
+    def quiesce(self, board: chess.Board, alpha: float, beta: float, qdepth: int) -> float:
+        """
+        Search captures and promotions past the horizon so the leaf evaluation is
+        taken in a quiet position. The side to move may always stand pat.
+        """
+        if qdepth:
+            self.nodes += 1
+            if self._abortable:
+                self._check_budget()
+        self.qnodes += 1
+
+        score = self.evaluator.evaluate(board)
+        stand_pat = score if board.turn == chess.WHITE else -score
+        if stand_pat >= beta or qdepth >= MAX_QUIESCENCE_DEPTH:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        max_score = stand_pat
+
+        # Captures (incl. capture-promotions) and quiet promotions
+        moves = list(board.generate_legal_captures())
+        promo_rank = chess.BB_RANK_7 if board.turn == chess.WHITE else chess.BB_RANK_2
+        pawns = board.pawns & board.occupied_co[board.turn] & promo_rank
+        if pawns:
+            moves.extend(m for m in board.generate_legal_moves(pawns, ~board.occupied) if m.promotion)
+        ply = len(board.move_stack) - self._root_ply
+        moves = self.orderer.order(board, moves, ply)
+
+        for move in moves:
+            if self.delta_pruning:
+                gain = piece_values[board.piece_type_at(move.to_square) or chess.PAWN] if board.is_capture(move) else 0
+                if move.promotion:
+                    gain += piece_values[move.promotion] - piece_values[chess.PAWN]
+                if stand_pat + gain + self.delta_margin <= alpha:
+                    continue
+            board.push(move)
+            score = -self.quiesce(board, -beta, -alpha, qdepth + 1)
+            board.pop()
+
+            if score > max_score:
+                max_score = score
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        return max_score
+
+
+# Root-parallel workers: each process builds its engine once and keeps it (and its
+# transposition table) for as long as the pool lives.
+_worker_engine: Optional[ChessEngine] = None
+
+
+def _init_root_worker(rules: list, cache_size: int, options: dict):
+    global _worker_engine
+    _worker_engine = ChessEngine(Evaluator(rules, cache_size=cache_size), **options)
+
+
+def _search_root_moves(root_fen: str, chess960: bool, history: list, moves: list, depth: int,
+                       alpha: float, time_left: Optional[float], node_limit: Optional[int]) -> dict:
+    engine = _worker_engine
+    board = TrackedBoard(root_fen, chess960=chess960)
+    for uci in history:
+        board.push_uci(uci)
+
+    engine._start_search(board)
+    engine._abortable = time_left is not None or node_limit is not None
+    engine._deadline = time.perf_counter() + time_left if time_left is not None else float('inf')
+    engine._node_limit = node_limit if node_limit is not None else float('inf')
+    scores = {}
+    aborted = False
+    try:
+        for uci in moves:
+            scores[uci] = engine.search_root_move(board, chess.Move.from_uci(uci), depth, alpha)
+    except SearchAborted:
+        aborted = True
+    finally:
+        engine._abortable = False
+    return {"scores": scores, "nodes": engine.nodes, "aborted": aborted}
@@ -1,6 +1,28 @@
+import ast
+import builtins
+import inspect
+import time
 import chess
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence
 from . import helpers
+from .lru import LRUCache
+from .tracked_board import position_key
+
+DEFAULT_EVAL_CACHE_SIZE = 1 << 16
+
+
+def _helper_namespace() -> dict:
+    """Names available to rule expressions and scripts: `chess` plus every public helper."""
+    namespace: dict = {"chess": chess}
+    for name in dir(helpers):
+        if not name.startswith("_"):
+            namespace[name] = getattr(helpers, name)
+    return namespace
+
+
+def _helper_functions() -> Dict[str, object]:
+    return {name: fn for name, fn in vars(helpers).items()
+            if not name.startswith("_") and inspect.isfunction(fn) and fn.__module__ == helpers.__name__}
 
 
 class Evaluator:
@@ -9,26 +31,52 @@ class Evaluator:
     If a bot version contains a `script` entry, the script is executed (unsafely)
     and its `evaluate(board)` function (or expression) is used as the board score.
     Otherwise, legacy `code` expressions with `weight` are used.
+
+    With `cache_size` > 0, scores are memoized in an LRU keyed by the position's
+    Zobrist hash. Only enable it for evaluations that depend on the position
+    alone: helpers such as `repetition_count` and `history_fens` also look at
+    the move history, which the key does not cover.
+
+    `instrument()` turns on call counting and timing (see `counters`); until
+    then `evaluate` carries no instrumentation cost at all.
+
+    `evaluate_batch(boards)` scores many boards at once with the same results.
+    Legacy rules recognized by `batch_eval` are computed with NumPy for the
+    whole batch; everything else is evaluated position by position.
+    `evaluate_moves(board, moves)` does the same for the children of a node.
     """
-    def __init__(self, rules: List[Dict]):
+    def __init__(self, rules: List[Dict], cache_size: int = 0, script_code=None):
         self.rules = rules or []
+        self.cache_size = cache_size
+        self.cache = LRUCache(cache_size) if cache_size else None
         self.compiled_rules = []
         self.script_callable = None
+        self.script_error: Optional[str] = None
+        self.rules_callable = None
+        # Built once; evaluation never rebuilds or copies it
+        self.namespace = _helper_namespace()
+        # Every globals dict rule code runs in, so sampled calls can swap in timed helpers
+        self._globals = [self.namespace]
+        self.instrumented = False
+        self._batch_rules = None
+        self._batch_compiled = False
+        # Compiled script module, reused by fork()
+        self.script_code = script_code
 
         # Detect script-style rules first
-        if len(self.rules) > 0 and isinstance(self.rules[0], dict) and "script" in self.rules[0]:
+        if self.is_script:
             src = self.rules[0]["script"]
-            namespace: dict = {"chess": chess, "helpers": helpers}
-            # Provide short helpers directly
-            for name in dir(helpers):
-                if not name.startswith("_"):
-                    namespace[name] = getattr(helpers, name)
+            namespace: dict = {"helpers": helpers, **self.namespace}
 
+            self._globals.append(namespace)
             try:
-                exec(src, namespace)
-            except Exception:
+                if self.script_code is None:
+                    self.script_code = compile(src, "<string>", "exec")
+                exec(self.script_code, namespace)
+            except Exception as e:
                 # Compilation errors will be raised at evaluation time or earlier in upload endpoints
                 self.script_callable = None
+                self.script_error = str(e)
                 return
 
             # Preferred: evaluate(board) function
@@ -38,8 +86,9 @@ class Evaluator:
                 # No evaluate found; attempt to compile as single expression
                 try:
                     expr = compile(src, "<string>", "eval")
+                    expr_globals = self.namespace
                     def _expr_eval(board: chess.Board):
-                        return eval(expr, {"chess": chess, **{k: getattr(helpers, k) for k in dir(helpers) if not k.startswith("_")}}, {"board": board})
+                        return eval(expr, expr_globals, {"board": board})
                     self.script_callable = _expr_eval
                 except Exception:
                     self.script_callable = None
@@ -54,8 +103,253 @@ class Evaluator:
                 except Exception:
                     # skip invalid rules
                     pass
+            self.rules_callable = self._fuse_rules()
+
+    @property
+    def is_script(self) -> bool:
+        return len(self.rules) > 0 and isinstance(self.rules[0], dict) and "script" in self.rules[0]
+
+    def fork(self) -> "Evaluator":
+        """
+        A new Evaluator for the same rules, with its own script namespace, eval
+        cache and counters. A script's compiled code is reused, so only its module
+        body runs again; module-level state (dicts, counters) starts fresh.
+        """
+        return Evaluator(self.rules, cache_size=self.cache_size, script_code=self.script_code)
+
+    def _fuse_rules(self):
+        """
+        Compile all weighted rule expressions into a single function
+
+            def _rules(board):
+                score = 0.0
+                try: score += float(<rule 1>) * <weight 1>
+                except Exception: pass
+                ...
+                return score
+
+        so a leaf costs one call. Rules are summed in order and a failing rule
+        contributes nothing, as with per-rule evaluation.
+        """
+        func = ast.parse("def _rules(board):\n    __score = 0.0\n    return __score").body[0]
+        terms = []
+        for rule in self.rules:
+            try:
+                expr = ast.parse(rule["code"], mode="eval").body
+                weight = rule.get("weight", 1.0)
+            except Exception:
+                continue
+            if not isinstance(weight, (int, float)):
+                # float(...) * weight would raise on every call
+                continue
+            guarded = ast.parse("try:\n    __score += float(__expr) * __weight\nexcept Exception:\n    pass").body[0]
+            term = guarded.body[0]
+            term.value.left.args[0] = expr
+            term.value.right = ast.Constant(value=weight)
+            terms.append(guarded)
+        func.body[1:1] = terms
+        module = ast.fix_missing_locations(ast.Module(body=[func], type_ignores=[]))
+        rules_globals = {"__builtins__": builtins, **self.namespace}
+        self._globals.append(rules_globals)
+        try:
+            exec(compile(module, "<rules>", "exec"), rules_globals)
+        except Exception:
+            return None
+        return rules_globals["_rules"]
 
     def evaluate(self, board: chess.Board) -> float:
+        if self.cache is None:
+            return self._evaluate(board)
+        key = position_key(board)
+        score = self.cache.get(key)
+        if score is None:
+            score = self._evaluate(board)
+            self.cache.put(key, score)
+        return score
+
+    def evaluate_batch(self, boards: Sequence[chess.Board]) -> List[float]:
+        """Scores of `boards`, identical to calling `evaluate` on each in turn."""
+        if self.cache is None:
+            return self._evaluate_batch(boards)
+        keys = [position_key(board) for board in boards]
+        scores = [self.cache.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            for i, score in zip(missing, self._evaluate_batch([boards[i] for i in missing])):
+                scores[i] = score
+                self.cache.put(keys[i], score)
+        return scores
+
+    def _evaluate_batch(self, boards: Sequence[chess.Board]) -> List[float]:
+        batch_rules = self._batch()
+        if batch_rules is None or not boards:
+            return [self._evaluate(board) for board in boards]
+        return batch_rules.scores(boards)
+
+    def _batch(self):
+        """The vectorized form of the rules (batch_eval.BatchRules), or None."""
+        if not self._batch_compiled:
+            self._batch_compiled = True
+            # Only fused legacy rules; scripts and unfusable rule lists stay per position
+            if self.rules_callable is not None:
+                try:
+                    from .batch_eval import compile_rules
+                    self._batch_rules = compile_rules(self.rules, self.namespace)
+                except ImportError:
+                    # NumPy is not installed
+                    self._batch_rules = None
+        return self._batch_rules
+
+    @property
+    def moves_vectorized(self) -> bool:
+        """True when `evaluate_moves` scores children from their bitboards alone (all rules vectorized, no cache)."""
+        batch_rules = self._batch()
+        return batch_rules is not None and batch_rules.per_board is None and self.cache is None
+
+    def evaluate_moves(self, board: chess.Board, moves: Sequence[chess.Move]) -> List[float]:
+        """
+        Scores of the positions after each of `moves`, identical to pushing each
+        move and calling `evaluate`. Vectorized rules score them as one batch;
+        when every rule is vectorized and there is no cache, the children's
+        bitboards are derived from the moves without pushing them. Otherwise
+        this is one `evaluate` call per move.
+        """
+        batch_rules = self._batch()
+        if batch_rules is None:
+            scores = []
+            for move in moves:
+                board.push(move)
+                scores.append(self.evaluate(board))
+                board.pop()
+            return scores
+
+        start = time.perf_counter() if self.instrumented else 0.0
+        if self.moves_vectorized:
+            # The children's bitboards are enough
+            scores = batch_rules.score_rows(batch_rules.child_rows(board, moves))
+        else:
+            scores = self._evaluate_moves_pushed(batch_rules, board, moves)
+        if self.instrumented:
+            # Counted like the evaluate calls this replaces (helpers are not sampled)
+            self.eval_calls += len(moves)
+            self.eval_time += time.perf_counter() - start
+        return scores
+
+    def _evaluate_moves_pushed(self, batch_rules, board: chess.Board, moves: Sequence[chess.Move]) -> List[float]:
+        # Per-board rule terms and cache keys need the child position itself
+        scores: List[Optional[float]] = [None] * len(moves)
+        pending = []
+        entries = []
+        keys = []
+        for i, move in enumerate(moves):
+            board.push(move)
+            if self.cache is not None:
+                key = position_key(board)
+                score = self.cache.get(key)
+                if score is not None:
+                    scores[i] = score
+                    board.pop()
+                    continue
+                keys.append(key)
+            pending.append(i)
+            entries.append(batch_rules.entry(board))
+            board.pop()
+        if entries:
+            for n, (i, score) in enumerate(zip(pending, batch_rules.score_entries(entries))):
+                scores[i] = score
+                if self.cache is not None:
+                    self.cache.put(keys[n], score)
+        return scores
+
+    def instrument(self, sample_every: Optional[int] = None):
+        """
+        Count evaluate calls and the time spent in them. With `sample_every` = N,
+        every Nth call also times each helper the rules call directly. Calling
+        it again only changes the sampling; counters keep running. Boards
+        scored through `evaluate_batch` are counted, but helpers are not sampled.
+        """
+        self.sample_every = sample_every or 0
+        if self.instrumented:
+            return
+        self.instrumented = True
+        self.eval_calls = 0
+        self.eval_time = 0.0
+        self.sampled_calls = 0
+        self.helper_stats: Dict[str, list] = {}  # name -> [calls, seconds], sampled calls only
+        self._plain_helpers = _helper_functions()
+        self._timed_helpers = {name: self._timed(name, fn) for name, fn in self._plain_helpers.items()}
+        # Shadow the class methods for this instance only
+        self.evaluate = self._instrumented_evaluate
+        self.evaluate_batch = self._instrumented_evaluate_batch
+
+    def _timed(self, name: str, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                entry = self.helper_stats.setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += time.perf_counter() - start
+        return timed
+
+    def _swap_helpers(self, current: dict, replacement: dict):
+        # Only names still bound to the helper: a script may define its own function of that name
+        for namespace in self._globals:
+            for name, fn in replacement.items():
+                if namespace.get(name) is current[name]:
+                    namespace[name] = fn
+
+    def _instrumented_evaluate(self, board: chess.Board) -> float:
+        self.eval_calls += 1
+        sampled = self.sample_every and self.eval_calls % self.sample_every == 0
+        if sampled:
+            self.sampled_calls += 1
+            self._swap_helpers(self._plain_helpers, self._timed_helpers)
+        start = time.perf_counter()
+        try:
+            return Evaluator.evaluate(self, board)
+        finally:
+            self.eval_time += time.perf_counter() - start
+            if sampled:
+                self._swap_helpers(self._timed_helpers, self._plain_helpers)
+
+    def _instrumented_evaluate_batch(self, boards: Sequence[chess.Board]) -> List[float]:
+        self.eval_calls += len(boards)
+        start = time.perf_counter()
+        try:
+            return Evaluator.evaluate_batch(self, boards)
+        finally:
+            self.eval_time += time.perf_counter() - start
+
+    def counters(self) -> Optional[tuple]:
+        """Snapshot of the instrumentation counters (None if not instrumented), for `counters_since`."""
+        if not self.instrumented:
+            return None
+        return self.eval_calls, self.eval_time, self.sampled_calls, {k: tuple(v) for k, v in self.helper_stats.items()}
+
+    def counters_since(self, snapshot: tuple) -> dict:
+        """Evaluate calls, time in evaluate and sampled helper costs since `snapshot`."""
+        calls, eval_time, sampled, helper_stats = snapshot
+        stats = {
+            "eval_calls": self.eval_calls - calls,
+            "eval_ms": round((self.eval_time - eval_time) * 1000, 2),
+        }
+        if self.sampled_calls > sampled:
+            stats["sampled_evals"] = self.sampled_calls - sampled
+            helper_deltas = {}
+            for name, (n, seconds) in self.helper_stats.items():
+                n0, seconds0 = helper_stats.get(name, (0, 0.0))
+                if n > n0:
+                    helper_deltas[name] = {"calls": n - n0, "ms": round((seconds - seconds0) * 1000, 3)}
+            # Most expensive first
+            stats["helpers"] = dict(sorted(helper_deltas.items(), key=lambda item: -item[1]["ms"]))
+        return stats
+
+    def cache_stats(self) -> Optional[dict]:
+        return self.cache.stats() if self.cache is not None else None
+
+    def _evaluate(self, board: chess.Board) -> float:
         if self.script_callable:
             try:
                 # Call script-provided evaluator directly
@@ -63,20 +357,15 @@ class Evaluator:
             except Exception:
                 return 0.0
 
-        # Legacy evaluation path
-        score = 0.0
-        globals_dict = {"chess": chess}
-        # inject helpers as locals to make them readily available for expressions
-        locals_dict = {"board": board}
-        for name in dir(helpers):
-            if not name.startswith("_"):
-                locals_dict[name] = getattr(helpers, name)
+        if self.rules_callable is not None:
+            return self.rules_callable(board)
 
+        # Fallback if the rules could not be fused: evaluate them one by one
+        score = 0.0
         for rule in self.compiled_rules:
             try:
-                result = eval(rule["code"], globals_dict, locals_dict)
+                result = eval(rule["code"], self.namespace, {"board": board})
                 score += float(result) * rule["weight"]
             except Exception:
                 pass
-
         return score
@@ -0,0 +1,106 @@
+import chess
+import chess.pgn
+from typing import Callable, Optional
+from .chess_engine import ChessEngine
+from .tracked_board import TrackedBoard
+
+
+def play_game(engine_white: ChessEngine, engine_black: ChessEngine, white_name: str, black_name: str,
+              start_fen: Optional[str] = None, label: str = "Game",
+              on_move: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Play one engine-vs-engine game and return
+    `{"result", "termination", "pgn", "moves", "search_metadata", "plies"}`.
+
+    `result` is "1-0", "0-1" or "1/2-1/2". A side that exceeds its per-game
+    budget loses on time ("timeout"), or draws if the opponent has
+    insufficient material.
+
+    `on_move`, if given, receives each ply as it is played: its search
+    metadata plus `uci`, `san`, the `fen` after the move and `white_eval`,
+    the White-perspective score that goes into the PGN comment.
+    """
+    board = TrackedBoard(start_fen) if start_fen else TrackedBoard()
+    game = chess.pgn.Game()
+    if start_fen:
+        game.setup(board)
+    game.headers["White"] = white_name
+    game.headers["Black"] = black_name
+    node = game
+
+    # Game loop
+    move_count = 0
+    search_metadata = []
+    flagged = None  # color that ran out of its game budget
+
+    while not board.is_game_over():
+        current_engine = engine_white if board.turn == chess.WHITE else engine_black
+        # get_best_move now returns (move, score, metadata)
+        move, score, metadata = current_engine.get_best_move(board)
+
+        if move is None:
+            print(f"{label}: Engine returned no move. Ending.")
+            break
+
+        if current_engine.out_of_time:
+            flagged = board.turn
+            print(f"{label}: {'white' if flagged == chess.WHITE else 'black'} exceeded its game budget.")
+            break
+
+        # Store metadata for this move
+        step = {
+            "move_idx": move_count,
+            "turn": "white" if board.turn == chess.WHITE else "black",
+            "eval": score,
+            "top_moves": metadata,
+            # Node counts and transposition table usage for this search
+            "stats": dict(current_engine.last_search_stats)
+        }
+        search_metadata.append(step)
+
+        san = board.san(move) if on_move is not None else None
+        board.push(move)
+        # Standard eval is from White's perspective
+        eval_score = score if board.turn == chess.BLACK else -score
+        node = node.add_main_variation(move)
+        node.comment = f"eval: {eval_score:.2f}"
+        if on_move is not None:
+            on_move({**step, "uci": move.uci(), "san": san, "fen": board.fen(), "white_eval": eval_score})
+
+        move_count += 1
+        if move_count % 10 == 0:
+            print(f"{label}: {move_count} moves played... Sample Eval: {eval_score:.2f}")
+
+    # Result determination
+    result = board.result()
+    if flagged is not None:
+        # Loss on time, unless the opponent could never deliver mate
+        if board.has_insufficient_material(not flagged):
+            result = "1/2-1/2"
+        else:
+            result = "0-1" if flagged == chess.WHITE else "1-0"
+        game.headers["Termination"] = "time forfeit"
+    game.headers["Result"] = result
+
+    termination = "checkmate"
+    if flagged is not None:
+        termination = "timeout"
+    elif board.is_stalemate():
+        termination = "stalemate"
+    elif board.is_insufficient_material():
+        termination = "insufficient material"
+    elif board.is_fifty_moves():
+        termination = "fifty-move rule"
+    elif board.can_claim_threefold_repetition() or board.is_repetition():
+        termination = "threefold repetition"
+    elif result == "1/2-1/2":
+        termination = "draw"
+
+    return {
+        "result": result,
+        "termination": termination,
+        "pgn": str(game),
+        "moves": [move.uci() for move in board.move_stack],
+        "search_metadata": search_metadata,
+        "plies": move_count,
+    }
@@ -0,0 +1,196 @@
+"""
+Compact storage of a game's moves and per-ply search metadata.
+
+The JSON form of `search_metadata` repeats every root move's UCI string and a
+full float for every ply. Here each column is stored on its own and zlib'd:
+
+  - moves: the played move as an index (one byte) into the position's legal
+    moves sorted by UCI
+  - evals: the score of each ply, quantized to 1/SCORE_SCALE, as zigzag varints
+  - top moves: a count per ply. When it covers every legal move the indices are
+    implied (sorted order); otherwise they are listed. Then each score as a
+    quantized difference from the ply's eval.
+  - stats: the per-ply search stats as JSON columns (key -> list of values)
+
+Scores lose precision beyond 1/SCORE_SCALE and are clamped to +-SCORE_LIMIT.
+Everything else round-trips exactly. Moves decode by replaying the game, so
+the moves are decoded once per record; reading plies [start, stop) then only
+builds top moves and stats for the requested plies. The result is base64 text for a TEXT column.
+"""
+import base64
+import json
+import math
+import struct
+import zlib
+from typing import List, Optional, Tuple
+import chess
+
+MAGIC = b"MMG"
+FORMAT_VERSION = 1
+SCORE_SCALE = 100
+SCORE_LIMIT = 1e15
+_SECTIONS = 5  # moves, evals, top counts, top moves, stats
+
+
+def _quantize(score: float) -> int:
+    if math.isnan(score):
+        return 0
+    return round(max(-SCORE_LIMIT, min(SCORE_LIMIT, score)) * SCORE_SCALE)
+
+
+def _write_varint(out: bytearray, value: int):
+    # Zigzag, then 7 bits per byte
+    value = -2 * value - 1 if value < 0 else 2 * value
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (value >> 1) ^ -(value & 1), pos
+
+
+def _sorted_legal(board: chess.Board) -> List[str]:
+    return sorted(move.uci() for move in board.legal_moves)
+
+
+def encode_game(moves: List[str], search_metadata: List[dict], start_fen: Optional[str] = None) -> str:
+    """Encode a game's UCI moves and its `search_metadata` (one entry per move) as base64 text."""
+    board = chess.Board(start_fen) if start_fen else chess.Board()
+    move_column = bytearray()
+    evals = bytearray()
+    top_counts = bytearray()
+    top_moves = bytearray()
+    stats_keys: List[str] = []
+    stats_columns: dict = {}
+
+    for ply, (uci, step) in enumerate(zip(moves, search_metadata)):
+        legal = _sorted_legal(board)
+        index = {u: i for i, u in enumerate(legal)}
+        move_column.append(index[uci])
+        base = _quantize(step["eval"])
+        _write_varint(evals, base)
+
+        top = step.get("top_moves") or {}
+        complete = len(top) == len(legal)
+        _write_varint(top_counts, len(top) if complete else -len(top) - 1)
+        entries = sorted(top.items(), key=lambda item: index[item[0]])
+        if not complete:
+            for u, _ in entries:
+                top_moves.append(index[u])
+        for _, score in entries:
+            _write_varint(top_moves, _quantize(score) - base)
+
+        for key, value in (step.get("stats") or {}).items():
+            if key not in stats_columns:
+                stats_keys.append(key)
+                stats_columns[key] = [None] * ply
+            stats_columns[key].append(value)
+        for key in stats_keys:
+            if len(stats_columns[key]) == ply:
+                stats_columns[key].append(None)
+        board.push(chess.Move.from_uci(uci))
+
+    stats = json.dumps({key: stats_columns[key] for key in stats_keys}, separators=(",", ":")).encode()
+    fen = (start_fen or "").encode()
+    out = bytearray(MAGIC)
+    out.append(FORMAT_VERSION)
+    _write_varint(out, len(move_column))
+    _write_varint(out, len(fen))
+    out += fen
+    for section in (move_column, evals, top_counts, top_moves, stats):
+        packed = zlib.compress(bytes(section), 9)
+        out += struct.pack("<I", len(packed))
+        out += packed
+    return base64.b64encode(bytes(out)).decode("ascii")
+
+
+class GameRecord:
+    """A decoded header over the encoded sections; plies are built on request."""
+    def __init__(self, text: str):
+        data = base64.b64decode(text)
+        if data[:3] != MAGIC or data[3] != FORMAT_VERSION:
+            raise ValueError("not an encoded game record")
+        self.plies_total, pos = _read_varint(data, 4)
+        fen_len, pos = _read_varint(data, pos)
+        self.start_fen = data[pos:pos + fen_len].decode() or None
+        pos += fen_len
+        self._sections = []
+        for _ in range(_SECTIONS):
+            (size,) = struct.unpack_from("<I", data, pos)
+            pos += 4
+            self._sections.append(data[pos:pos + size])
+            pos += size
+        self._unpacked: dict = {}
+        self._moves: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return self.plies_total
+
+    def _section(self, i: int) -> bytes:
+        if i not in self._unpacked:
+            self._unpacked[i] = zlib.decompress(self._sections[i])
+        return self._unpacked[i]
+
+    def moves(self) -> List[str]:
+        """The played moves in UCI, decoded once by replaying the game."""
+        if self._moves is None:
+            board = chess.Board(self.start_fen) if self.start_fen else chess.Board()
+            self._moves = []
+            for index in self._section(0):
+                uci = _sorted_legal(board)[index]
+                self._moves.append(uci)
+                board.push(chess.Move.from_uci(uci))
+        return self._moves
+
+    def plies(self, start: int = 0, stop: Optional[int] = None) -> List[dict]:
+        """`search_metadata` entries for plies [start, stop), each with its played `uci`."""
+        stop = self.plies_total if stop is None else min(stop, self.plies_total)
+        start = max(0, start)
+        if start >= stop:
+            return []
+        moves = self.moves()
+        evals, counts, top = self._section(1), self._section(2), self._section(3)
+        stats = json.loads(self._section(4))
+
+        board = chess.Board(self.start_fen) if self.start_fen else chess.Board()
+        eval_pos = count_pos = top_pos = 0
+        result = []
+        for ply in range(stop):
+            base, eval_pos = _read_varint(evals, eval_pos)
+            count, count_pos = _read_varint(counts, count_pos)
+            complete = count >= 0
+            if not complete:
+                count = -count - 1
+            if complete:
+                indices = range(count)
+            else:
+                indices = top[top_pos:top_pos + count]
+                top_pos += count
+            scores = []
+            for _ in range(count):
+                delta, top_pos = _read_varint(top, top_pos)
+                scores.append(delta)
+            if ply >= start:
+                # Legal moves are only generated for the requested plies
+                legal = _sorted_legal(board)
+                result.append({
+                    "move_idx": ply,
+                    "turn": "white" if board.turn == chess.WHITE else "black",
+                    "uci": moves[ply],
+                    "eval": base / SCORE_SCALE,
+                    "top_moves": {legal[i]: (base + d) / SCORE_SCALE for i, d in zip(indices, scores)},
+                    "stats": {key: column[ply] for key, column in stats.items() if column[ply] is not None},
+                })
+            board.push(chess.Move.from_uci(moves[ply]))
+        return result
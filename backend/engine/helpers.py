@@ -1,5 +1,6 @@
 import chess
 from typing import List, Dict, Optional
+from .tracked_board import TrackedBoard as _TrackedBoard
 
 piece_values = {
     chess.PAWN: 100,
@@ -11,7 +12,30 @@ piece_values = {
 }
 
 CENTER_SQUARES = [chess.E4, chess.D4, chess.E5, chess.D5]
+_CENTER_MASK = chess.BB_E4 | chess.BB_D4 | chess.BB_E5 | chess.BB_D5
 
+# Bitboard tables for pawn structure
+_ADJACENT_FILES = [
+    (chess.BB_FILES[f - 1] if f > 0 else 0) | (chess.BB_FILES[f + 1] if f < 7 else 0)
+    for f in range(8)
+]
+
+
+def _front_spans(color: bool) -> List[int]:
+    # Same and adjacent files, strictly ahead of each square from `color`'s point of view
+    spans = []
+    for sq in chess.SQUARES:
+        file = chess.square_file(sq)
+        rank = chess.square_rank(sq)
+        ranks = range(rank + 1, 8) if color == chess.WHITE else range(0, rank)
+        ahead = 0
+        for r in ranks:
+            ahead |= chess.BB_RANKS[r]
+        spans.append((chess.BB_FILES[file] | _ADJACENT_FILES[file]) & ahead)
+    return spans
+
+
+_FRONT_SPAN = [_front_spans(chess.BLACK), _front_spans(chess.WHITE)]
 
 def fen(board: chess.Board) -> str:
     return board.fen()
@@ -22,18 +46,117 @@ def material(board: chess.Board, color: Optional[bool] = None) -> int:
         color = board.turn
     score = 0
     for pt, val in piece_values.items():
-        score += (len(board.pieces(pt, color)) - len(board.pieces(pt, not color))) * val
+        score += (chess.popcount(board.pieces_mask(pt, color)) - chess.popcount(board.pieces_mask(pt, not color))) * val
     return score
 
 
-def mobility(board: chess.Board, color: Optional[bool] = None) -> int:
+def mobility(board: chess.Board, color: Optional[bool] = None, legal: bool = True) -> int:
     if color is None:
         # mobility of side to move
-        return len(list(board.legal_moves))
-    # mobility for a particular color: generate moves by making a copy and forcing turn
-    b = board.copy(stack=False)
-    b.turn = color
-    return len(list(b.legal_moves))
+        color = board.turn
+    if not legal:
+        return sum(mobility_breakdown(board, color).values())
+    # Count moves for `color` by switching the side to move in place; no copy, no move list
+    turn = board.turn
+    board.turn = color
+    try:
+        return _legal_move_count(board)
+    finally:
+        board.turn = turn
+
+
+def _pawn_move_count(pawns: int, color: bool, empty: int, enemy: int, allowed: int) -> int:
+    # Pushes and captures (without en passant) landing in `allowed`; promotions count four times
+    if color == chess.WHITE:
+        single = (pawns << 8) & empty
+        double = ((single & chess.BB_RANK_3) << 8) & empty
+        captures = (((pawns & ~chess.BB_FILE_A) << 7) & enemy, ((pawns & ~chess.BB_FILE_H) << 9) & enemy)
+        back_rank = chess.BB_RANK_8
+    else:
+        single = (pawns >> 8) & empty
+        double = ((single & chess.BB_RANK_6) >> 8) & empty
+        captures = (((pawns & ~chess.BB_FILE_A) >> 9) & enemy, ((pawns & ~chess.BB_FILE_H) >> 7) & enemy)
+        back_rank = chess.BB_RANK_1
+    count = 0
+    for targets in (single, double) + captures:
+        targets &= allowed
+        count += chess.popcount(targets) + 3 * chess.popcount(targets & back_rank)
+    return count
+
+
+def _legal_move_count(board: chess.Board) -> int:
+    """Number of legal moves for the side to move, counted on bitboards."""
+    color = board.turn
+    king = board.king(color)
+    if king is None or board.is_check():
+        return sum(1 for _ in board.generate_legal_moves())
+    own = board.occupied_co[color]
+    enemy = board.occupied_co[not color]
+    occupied = board.occupied
+
+    # Own pieces pinned to the king may only move along the pin line
+    pinned = 0
+    snipers = (((chess.BB_RANK_ATTACKS[king][0] | chess.BB_FILE_ATTACKS[king][0]) & (board.rooks | board.queens))
+               | (chess.BB_DIAG_ATTACKS[king][0] & (board.bishops | board.queens))) & enemy
+    for sniper in chess.scan_forward(snipers):
+        blockers = chess.between(king, sniper) & occupied
+        if blockers and not blockers & (blockers - 1):
+            pinned |= blockers & own
+
+    count = 0
+    for sq in chess.scan_forward(own & ~board.pawns & ~board.kings):
+        targets = board.attacks_mask(sq) & ~own
+        if pinned & chess.BB_SQUARES[sq]:
+            targets &= chess.ray(king, sq)
+        count += chess.popcount(targets)
+
+    # Not in check, so a king step is legal exactly when the target is not attacked
+    for sq in chess.scan_forward(chess.BB_KING_ATTACKS[king] & ~own):
+        if not board.attackers_mask(not color, sq):
+            count += 1
+
+    pawns = board.pawns & own
+    empty = ~occupied & chess.BB_ALL
+    count += _pawn_move_count(pawns & ~pinned, color, empty, enemy, chess.BB_ALL)
+    for sq in chess.scan_forward(pawns & pinned):
+        count += _pawn_move_count(chess.BB_SQUARES[sq], color, empty, enemy, chess.ray(king, sq))
+
+    count += sum(1 for _ in board.generate_legal_ep())
+    count += sum(1 for _ in board.generate_castling_moves())
+    return count
+
+
+def mobility_breakdown(board: chess.Board, color: Optional[bool] = None) -> Dict[str, int]:
+    """
+    Pseudo-legal move counts per piece type, read off the attack bitboards.
+    Pins, checks and castling are ignored and a promotion counts as one move.
+    En passant counts only for the side to move.
+    """
+    if color is None:
+        color = board.turn
+    own = board.occupied_co[color]
+    empty = ~board.occupied & chess.BB_ALL
+    pawns = board.pawns & own
+    if color == chess.WHITE:
+        single = (pawns << 8) & empty
+        double = ((single & chess.BB_RANK_3) << 8) & empty
+    else:
+        single = (pawns >> 8) & empty
+        double = ((single & chess.BB_RANK_6) >> 8) & empty
+    targets = board.occupied_co[not color]
+    if board.ep_square is not None and color == board.turn:
+        targets |= chess.BB_SQUARES[board.ep_square]
+    pawn_attacks = chess.BB_PAWN_ATTACKS[color]
+    count = chess.popcount(single) + chess.popcount(double)
+    for sq in chess.scan_forward(pawns):
+        count += chess.popcount(pawn_attacks[sq] & targets)
+    counts = {"pawn": count}
+    for pt in (chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING):
+        count = 0
+        for sq in chess.scan_forward(board.pieces_mask(pt, color)):
+            count += chess.popcount(board.attacks_mask(sq) & ~own)
+        counts[chess.piece_name(pt)] = count
+    return counts
 
 
 def piece_count(board: chess.Board, piece_type: int, color: Optional[bool] = None) -> int:
@@ -64,21 +187,21 @@ def is_stalemate(board: chess.Board) -> bool:
 
 
 def history_fens(board: chess.Board, n: Optional[int] = None) -> List[str]:
-    # Reconstruct positions from the starting position by replaying the move stack
-    b = chess.Board()
+    # Walk back from the current position on a copy instead of replaying the game
+    b = board.copy()
     fens = [b.fen()]
-    for mv in board.move_stack:
-        b.push(mv)
+    while b.move_stack and (not n or len(fens) < n):
+        b.pop()
         fens.append(b.fen())
-    if n is not None:
-        return fens[-n:]
+    fens.reverse()
     return fens
 
 
 def repetition_count(board: chess.Board) -> int:
-    current = board.fen()
-    fens = history_fens(board)
-    return fens.count(current)
+    # Occurrences of the current position in the game so far (same rules as board.is_repetition)
+    if not isinstance(board, _TrackedBoard):
+        board = _TrackedBoard.from_board(board)
+    return board.repetition_count()
 
 
 def last_move(board: chess.Board) -> Optional[str]:
@@ -90,16 +213,8 @@ def last_move(board: chess.Board) -> Optional[str]:
 def center_control(board: chess.Board, color: Optional[bool] = None) -> int:
     if color is None:
         color = board.turn
-    score = 0
-    for sq in CENTER_SQUARES:
-        piece = board.piece_at(sq)
-        if piece is not None and piece.color == color:
-            score += 1
-        # also count attacks
-        if color == board.turn:
-            if any(True for _ in board.attackers(color, sq)):
-                score += 0
-    return score
+    # Own pieces standing on the four center squares
+    return chess.popcount(board.occupied_co[color] & _CENTER_MASK)
 
 
 def bishop_pair_bonus(board: chess.Board, color: Optional[bool] = None) -> int:
@@ -111,39 +226,23 @@ def bishop_pair_bonus(board: chess.Board, color: Optional[bool] = None) -> int:
 def pawn_structure(board: chess.Board, color: Optional[bool] = None) -> Dict[str, int]:
     if color is None:
         color = board.turn
-    files = {f: 0 for f in range(8)}
-    pawns = board.pieces(chess.PAWN, color)
+    pawns = board.pawns & board.occupied_co[color]
+    enemy_pawns = board.pawns & board.occupied_co[not color]
     passed = 0
     isolated = 0
     doubled = 0
-    for sq in pawns:
-        file = chess.square_file(sq)
-        files[file] += 1
-    for file, cnt in files.items():
-        if cnt > 1:
-            doubled += cnt - 1
-    for sq in pawns:
-        file = chess.square_file(sq)
-        rank = chess.square_rank(sq)
-        # isolated
-        adjacent = False
-        for df in (-1, 1):
-            nf = file + df
-            if 0 <= nf < 8 and files[nf] > 0:
-                adjacent = True
-        if not adjacent:
-            isolated += 1
-        # passed pawn: no enemy pawns in front on same or adjacent files
-        is_passed = True
-        enemy_pawns = board.pieces(chess.PAWN, not color)
-        for ep in enemy_pawns:
-            ef = chess.square_file(ep)
-            er = chess.square_rank(ep)
-            if abs(ef - file) <= 1:
-                if (color == chess.WHITE and er > rank) or (color == chess.BLACK and er < rank):
-                    is_passed = False
-                    break
-        if is_passed:
+    for file, file_mask in enumerate(chess.BB_FILES):
+        cnt = chess.popcount(pawns & file_mask)
+        if not cnt:
+            continue
+        doubled += cnt - 1
+        # isolated: no friendly pawns on adjacent files
+        if not pawns & _ADJACENT_FILES[file]:
+            isolated += cnt
+    # passed pawn: no enemy pawns in front on same or adjacent files
+    front_span = _FRONT_SPAN[color]
+    for sq in chess.scan_forward(pawns):
+        if not enemy_pawns & front_span[sq]:
             passed += 1
     return {"passed": passed, "isolated": isolated, "doubled": doubled}
 
@@ -161,15 +260,18 @@ def distance_to_promotion(board: chess.Board, square: int) -> int:
 def threatened_material_change(board: chess.Board, color: Optional[bool] = None) -> int:
     if color is None:
         color = board.turn
+    own = board.occupied_co[color]
+    # Union of attack sets per side (a piece's attack set includes squares of its own pieces it defends)
+    attacked = 0
+    for sq in chess.scan_forward(board.occupied_co[not color]):
+        attacked |= board.attacks_mask(sq)
+    defended = 0
+    for sq in chess.scan_forward(own):
+        defended |= board.attacks_mask(sq)
     score = 0
-    for sq in chess.SQUARES:
-        p = board.piece_at(sq)
-        if not p or p.color != color:
-            continue
-        attackers = board.attackers(not color, sq)
-        if attackers and not board.attackers(color, sq):
-            # piece attacked and not defended
-            score -= piece_values.get(p.piece_type, 0)
+    # pieces attacked and not defended
+    for sq in chess.scan_forward(own & attacked & ~defended):
+        score -= piece_values.get(board.piece_type_at(sq), 0)
     return score
 
 
@@ -0,0 +1,67 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with hit/miss/eviction counters.
+
+    Safe to share between threads: every operation holds the cache's lock.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = max(1, int(maxsize))
+        self.data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            try:
+                value = self.data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            if len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            return self.data.pop(key, default)
+
+    def pop_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove every key for which `predicate(key)` is true; returns how many were removed."""
+        with self._lock:
+            keys = [key for key in self.data if predicate(key)]
+            for key in keys:
+                del self.data[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self.data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "size": len(self.data),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,99 @@
+import chess
+from typing import List, Optional
+
+# Ordering bands; higher is searched first
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 24
+PROMOTION_SCORE = 1 << 23
+KILLER_SCORES = (1 << 22, (1 << 22) - 1)
+HISTORY_MAX = (1 << 21)
+
+MAX_PLY = 128
+
+
+def _tiebreak(move: chess.Move) -> int:
+    # Deterministic, string-free tie-break: by from-square, to-square, promotion piece
+    return (move.from_square << 9) | (move.to_square << 3) | (move.promotion or 0)
+
+
+class UciOrderer:
+    """Legacy ordering: moves sorted by their UCI string."""
+    name = "uci"
+
+    def new_search(self):
+        pass
+
+    def order(self, board: chess.Board, moves: List[chess.Move], ply: int,
+              hash_move: Optional[chess.Move] = None) -> List[chess.Move]:
+        moves.sort(key=lambda m: m.uci())
+        return moves
+
+    def record_cutoff(self, board: chess.Board, move: chess.Move, ply: int, depth: int):
+        pass
+
+
+class MoveOrderer:
+    """
+    Move ordering for alpha-beta: hash move first, then captures by MVV-LVA,
+    promotions, killer moves, and finally quiet moves by history heuristic.
+    Ties are broken by from/to square so the order is reproducible.
+
+    Opt-in (engine_options.move_ordering = "heuristic"); the gain depends on
+    the evaluation. At depth 3 on the benchmark suites, bots scored from
+    White's point of view search 1.4-5.7x fewer nodes than in UCI order (52x in
+    one tactical position). Bots scored from the side to move, like the example
+    bots, range from 0.2x (five times the nodes) to 5.5x, and search more nodes
+    in most middlegames. Check a bot with measure_ordering before enabling it.
+    """
+    name = "heuristic"
+
+    def __init__(self):
+        self.killers: list = [[None, None] for _ in range(MAX_PLY)]
+        # history[color * 4096 + from * 64 + to]
+        self.history: list = [0] * (2 * 64 * 64)
+
+    def new_search(self):
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        # Age history so older searches count less
+        self.history = [h >> 1 for h in self.history]
+
+    def score(self, board: chess.Board, move: chess.Move, ply: int, hash_move: Optional[chess.Move]) -> int:
+        if move == hash_move:
+            return HASH_MOVE_SCORE
+        if board.is_capture(move):
+            victim = board.piece_type_at(move.to_square) or chess.PAWN  # en passant
+            attacker = board.piece_type_at(move.from_square)
+            return CAPTURE_SCORE + victim * 16 - attacker + (move.promotion or 0) * 256
+        if move.promotion:
+            return PROMOTION_SCORE + move.promotion
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if move == killers[0]:
+                return KILLER_SCORES[0]
+            if move == killers[1]:
+                return KILLER_SCORES[1]
+        return self.history[(board.turn << 12) | (move.from_square << 6) | move.to_square]
+
+    def order(self, board: chess.Board, moves: List[chess.Move], ply: int,
+              hash_move: Optional[chess.Move] = None) -> List[chess.Move]:
+        scored = [(-self.score(board, m, ply, hash_move), _tiebreak(m), m) for m in moves]
+        scored.sort(key=lambda t: (t[0], t[1]))
+        return [t[2] for t in scored]
+
+    def record_cutoff(self, board: chess.Board, move: chess.Move, ply: int, depth: int):
+        """Remember a quiet move that caused a beta cutoff."""
+        if move.promotion or board.is_capture(move):
+            return
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        idx = (board.turn << 12) | (move.from_square << 6) | move.to_square
+        self.history[idx] = min(self.history[idx] + depth * depth, HISTORY_MAX)
+
+
+ORDERERS = {
+    "heuristic": MoveOrderer,
+    "uci": UciOrderer,
+}
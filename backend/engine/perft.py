@@ -0,0 +1,145 @@
+"""
+Perft and divide: move generation correctness and throughput.
+
+perft(board, depth) counts the leaf nodes of the full legal move tree. The
+standard suites have published counts, so any board layer (chess.Board,
+TrackedBoard, or a future faster one registered in BOARD_TYPES) can be
+checked against them. The last ply is bulk-counted by a leaf counter:
+python-chess's `legal_moves.count()`, or `helpers.mobility`, whose bitboard
+count the search uses. `divide` gives per-root-move counts for tracking down
+a mismatch, and can split the root moves across processes for deep runs.
+
+    python -m backend.engine.perft [--board tracked] [--counter mobility] [--max-depth 4] [--workers 4]
+    python -m backend.engine.perft --fen "<fen>" --depth 3 --divide
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+import chess
+from . import helpers
+from .tracked_board import TrackedBoard
+
+BOARD_TYPES: Dict[str, type] = {
+    "chess": chess.Board,
+    "tracked": TrackedBoard,
+}
+
+LEAF_COUNTERS: Dict[str, Callable[[chess.Board], int]] = {
+    "legal_moves": lambda board: board.legal_moves.count(),
+    "mobility": helpers.mobility,
+}
+
+# FEN and known node counts for depth 1, 2, ... (chessprogramming.org "Perft Results")
+STANDARD_SUITE = [
+    ("startpos", chess.STARTING_FEN,
+     [20, 400, 8902, 197281, 4865609, 119060324]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603, 193690690]),
+    ("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624, 11030083]),
+    ("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333, 15833292]),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487, 89941194]),
+    ("position6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594, 164075551]),
+]
+
+
+def perft(board: chess.Board, depth: int, leaf_counter: Optional[Callable[[chess.Board], int]] = None) -> int:
+    """Leaf nodes of the legal move tree `depth` plies deep."""
+    if depth <= 0:
+        return 1
+    if depth == 1:
+        return leaf_counter(board) if leaf_counter is not None else board.legal_moves.count()
+    nodes = 0
+    for move in list(board.legal_moves):
+        board.push(move)
+        nodes += perft(board, depth - 1, leaf_counter)
+        board.pop()
+    return nodes
+
+
+def _divide_move(fen: str, chess960: bool, board_type: str, counter: str, uci: str, depth: int) -> int:
+    board = BOARD_TYPES[board_type](fen, chess960=chess960)
+    board.push_uci(uci)
+    return perft(board, depth - 1, LEAF_COUNTERS[counter])
+
+
+def divide(fen: str, depth: int, board_type: str = "chess", counter: str = "legal_moves",
+           workers: Optional[int] = None, chess960: bool = False) -> Dict[str, int]:
+    """Leaf count below each root move (UCI), optionally with the root moves split across processes.
+
+    Depth 0 has no root moves to divide, so it returns {}.
+    """
+    board = BOARD_TYPES[board_type](fen, chess960=chess960)
+    if depth <= 0:
+        return {}
+    moves = sorted(move.uci() for move in board.legal_moves)
+    if depth == 1:
+        return {uci: 1 for uci in moves}
+    if not workers or workers <= 1:
+        return {uci: _divide_move(fen, chess960, board_type, counter, uci, depth) for uci in moves}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {uci: pool.submit(_divide_move, fen, chess960, board_type, counter, uci, depth) for uci in moves}
+        return {uci: future.result() for uci, future in futures.items()}
+
+
+def run_suite(board_type: str, counter: str, max_depth: int, workers: Optional[int] = None,
+              suite: Optional[List[tuple]] = None) -> bool:
+    """Check every suite position up to `max_depth`; prints nodes/sec and returns True if all counts match."""
+    ok = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, expected in suite or STANDARD_SUITE:
+        for depth in range(1, min(max_depth, len(expected)) + 1):
+            start = time.perf_counter()
+            if workers and workers > 1 and depth >= 3:
+                nodes = sum(divide(fen, depth, board_type, counter, workers).values())
+            else:
+                nodes = perft(BOARD_TYPES[board_type](fen), depth, LEAF_COUNTERS[counter])
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+            match = nodes == expected[depth - 1]
+            ok = ok and match
+            print(f"{name:10s} depth {depth}  {nodes:>11d}  {'ok' if match else f'MISMATCH (expected {expected[depth - 1]})'}"
+                  f"  {elapsed:8.3f}s  {nodes / elapsed if elapsed else 0:12.0f} nodes/s")
+    print(f"{'OK' if ok else 'FAILED'}: {board_type} board, {counter} leaf count, "
+          f"{total_nodes} nodes in {total_time:.2f}s ({total_nodes / total_time if total_time else 0:.0f} nodes/s)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--board", choices=list(BOARD_TYPES), default="chess")
+    parser.add_argument("--counter", choices=list(LEAF_COUNTERS), default="legal_moves")
+    parser.add_argument("--max-depth", type=int, default=3, help="suite depth limit")
+    parser.add_argument("--workers", type=int, default=None, help="split root moves across processes")
+    parser.add_argument("--fen", help="run a single position instead of the suite")
+    parser.add_argument("--depth", type=int, default=3, help="depth for --fen")
+    parser.add_argument("--divide", action="store_true", help="with --fen, print the count below each root move")
+    parser.add_argument("--chess960", action="store_true")
+    args = parser.parse_args()
+    if args.fen and args.depth < 1:
+        parser.error("--depth must be at least 1")
+
+    if args.fen:
+        start = time.perf_counter()
+        counts = divide(args.fen, args.depth, args.board, args.counter, args.workers, args.chess960)
+        elapsed = time.perf_counter() - start
+        if args.divide:
+            for uci, nodes in counts.items():
+                print(f"{uci}: {nodes}")
+        nodes = sum(counts.values())
+        print(f"nodes {nodes}  {elapsed:.3f}s  {nodes / elapsed if elapsed else 0:.0f} nodes/s")
+        return
+    if not run_suite(args.board, args.counter, args.max_depth, args.workers):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import chess
+import chess.polyglot
+from typing import Union
+
+_ARRAY = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+_TURN_KEY = _ARRAY[780]
+
+
+def _castling_key(board: chess.Board) -> int:
+    key = 0
+    if board.has_kingside_castling_rights(chess.WHITE):
+        key ^= _ARRAY[768]
+    if board.has_queenside_castling_rights(chess.WHITE):
+        key ^= _ARRAY[769]
+    if board.has_kingside_castling_rights(chess.BLACK):
+        key ^= _ARRAY[770]
+    if board.has_queenside_castling_rights(chess.BLACK):
+        key ^= _ARRAY[771]
+    return key
+
+
+def _piece_key(board: chess.BaseBoard) -> int:
+    key = 0
+    for pivot, squares in enumerate(board.occupied_co):
+        for square in chess.scan_forward(squares):
+            key ^= _ARRAY[64 * ((board.piece_type_at(square) - 1) * 2 + pivot) + square]
+    return key
+
+
+class TrackedBoard(chess.Board):
+    """
+    `chess.Board` that keeps the Polyglot Zobrist hash of the current position
+    up to date on every push/pop, plus a count of how often each position has
+    occurred in the game so far.
+
+    `zobrist` always equals `chess.polyglot.zobrist_hash(board)`, and
+    `is_repetition()` / `repetition_count()` are dictionary lookups instead of
+    replaying the move stack. Positions reached since the root (the first
+    position of `move_stack`) are counted; moves before the root are unknown,
+    as for `chess.Board`.
+
+    Only push/pop and the `set_*`/`reset`/`clear` methods keep the hash in
+    sync. Assigning `turn`, `castling_rights` or `ep_square` directly does not.
+    """
+
+    def clear_stack(self) -> None:
+        super().clear_stack()
+        self._reset_tracking()
+
+    def _reset_tracking(self):
+        self._piece_key = _piece_key(self)
+        # One entry per position: (piece key, raw castling rights, castling key, zobrist, repetition key)
+        self._keys: list = []
+        self._counts: dict = {}
+        self._record(self.castling_rights, _castling_key(self))
+
+    def _record(self, castling_rights: int, castling_key: int):
+        key = self._piece_key ^ castling_key
+        if self.turn == chess.WHITE:
+            key ^= _TURN_KEY
+        rep_key = key
+        ep_square = self.ep_square
+        if ep_square:
+            # Polyglot hashes the ep file when a pawn could capture pseudo-legally;
+            # repetitions only count it when the capture is legal, like is_repetition().
+            ep_mask = chess.shift_down(chess.BB_SQUARES[ep_square]) if self.turn == chess.WHITE \
+                else chess.shift_up(chess.BB_SQUARES[ep_square])
+            if (chess.shift_left(ep_mask) | chess.shift_right(ep_mask)) & self.pawns & self.occupied_co[self.turn]:
+                key ^= _ARRAY[772 + chess.square_file(ep_square)]
+                if self.has_legal_en_passant():
+                    rep_key = key
+        self._keys.append((self._piece_key, castling_rights, castling_key, key, rep_key))
+        self._counts[rep_key] = self._counts.get(rep_key, 0) + 1
+
+    @property
+    def zobrist(self) -> int:
+        return self._keys[-1][3]
+
+    def push(self, move: chess.Move) -> None:
+        black, white = self.occupied_co
+        before = (self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings)
+        super().push(move)
+
+        # XOR out/in every piece whose square changed; covers captures, en passant,
+        # promotions and (Chess960) castling without special cases
+        key = self._piece_key
+        new_black, new_white = self.occupied_co
+        after = (self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings)
+        changed = (white ^ new_white) | (black ^ new_black)
+        for i in range(6):
+            old = before[i]
+            new = after[i]
+            if old == new and not old & changed:
+                continue
+            base = 128 * i
+            for square in chess.scan_forward((old & black) ^ (new & new_black)):
+                key ^= _ARRAY[base + square]
+            for square in chess.scan_forward((old & white) ^ (new & new_white)):
+                key ^= _ARRAY[base + 64 + square]
+        self._piece_key = key
+
+        _, castling_rights, castling_key, _, _ = self._keys[-1]
+        if self.castling_rights != castling_rights:
+            castling_rights = self.castling_rights
+            castling_key = _castling_key(self)
+        self._record(castling_rights, castling_key)
+
+    def pop(self) -> chess.Move:
+        move = super().pop()
+        rep_key = self._keys.pop()[4]
+        count = self._counts[rep_key] - 1
+        if count:
+            self._counts[rep_key] = count
+        else:
+            del self._counts[rep_key]
+        self._piece_key = self._keys[-1][0]
+        return move
+
+    def repetition_count(self) -> int:
+        """How many times the current position has occurred, including now."""
+        return self._counts[self._keys[-1][4]]
+
+    def is_repetition(self, count: int = 3) -> bool:
+        return self._counts[self._keys[-1][4]] >= count
+
+    def copy(self, *, stack: Union[bool, int] = True) -> "TrackedBoard":
+        board = super().copy(stack=stack)
+        if stack is True or (stack and stack >= len(self.move_stack)):
+            board._piece_key = self._piece_key
+            board._keys = list(self._keys)
+            board._counts = dict(self._counts)
+        else:
+            board._rebuild_tracking()
+        return board
+
+    def _rebuild_tracking(self):
+        # Rewind to the root and replay, recording every position on the way
+        moves = []
+        while self.move_stack:
+            moves.append(chess.Board.pop(self))
+        self._reset_tracking()
+        for move in reversed(moves):
+            self.push(move)
+
+    @classmethod
+    def from_board(cls, board: chess.Board) -> "TrackedBoard":
+        """Tracked copy of `board`, including its move stack."""
+        tracked = cls(board.root().fen(en_passant="fen"), chess960=board.chess960)
+        for move in board.move_stack:
+            tracked.push(move)
+        return tracked
+
+
+def position_key(board: chess.Board) -> int:
+    """Polyglot Zobrist hash of the position; O(1) for a TrackedBoard."""
+    if isinstance(board, TrackedBoard):
+        return board.zobrist
+    return chess.polyglot.zobrist_hash(board)
@@ -0,0 +1,74 @@
+import chess
+from typing import Optional, Tuple
+
+# Bound types stored alongside a score
+EXACT = 0
+LOWER = 1  # score is a lower bound (search failed high)
+UPPER = 2  # score is an upper bound (search failed low)
+
+DEFAULT_TT_SIZE = 1 << 16
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table keyed by Zobrist hash.
+
+    Each slot holds one entry `(key, depth, score, bound, best_move, generation)`.
+    Replacement policy: an occupied slot is overwritten when the new entry was
+    searched at least as deep, or when the old entry belongs to an earlier search
+    (a previous move of the match).
+
+    Probes only return entries of the current search. Scores depend on the game
+    history (repetition penalty, helpers such as `repetition_count`), which the
+    key does not cover, so an entry stored under one move's history must not be
+    reused at the next move. `new_search` thus empties the table logically
+    without reallocating it.
+    """
+    def __init__(self, size: int = DEFAULT_TT_SIZE):
+        self.size = max(1, int(size))
+        self.slots: list = [None] * self.size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self):
+        """Start a new root search; older entries are no longer returned and are replaced first."""
+        self.generation += 1
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def probe(self, key: int) -> Optional[Tuple[int, float, int, Optional[chess.Move]]]:
+        self.probes += 1
+        entry = self.slots[key % self.size]
+        if entry is None or entry[0] != key or entry[5] != self.generation:
+            return None
+        self.hits += 1
+        return entry[1], entry[2], entry[3], entry[4]
+
+    def store(self, key: int, depth: int, score: float, bound: int, best_move: Optional[chess.Move]):
+        idx = key % self.size
+        old = self.slots[idx]
+        if old is not None and old[5] == self.generation and old[1] > depth:
+            return
+        self.slots[idx] = (key, depth, score, bound, best_move, self.generation)
+        self.stores += 1
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.generation = 0
+
+    def fill_permille(self) -> int:
+        # Sample the first slots like UCI engines do for `hashfull`
+        sample = self.slots[:1000]
+        return sum(1 for e in sample if e is not None and e[5] == self.generation) * 1000 // max(1, len(sample))
+
+    def stats(self) -> dict:
+        return {
+            "tt_probes": self.probes,
+            "tt_hits": self.hits,
+            "tt_hit_rate": round(self.hits / self.probes, 4) if self.probes else 0.0,
+            "tt_stores": self.stores,
+            "tt_fill_permille": self.fill_permille(),
+        }
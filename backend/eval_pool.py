@@ -0,0 +1,153 @@
+"""
+Parallel evaluation of large position sets for `/api/bots/eval_batch`.
+
+Positions are read lazily (a JSON list or the lines of an uploaded EPD/FEN
+file), grouped into chunks and scored in a spawn process pool. Each process
+compiles the bot's script once. Results come back as they finish, one dict
+per position, so the endpoint can stream them as NDJSON. A bad position is
+reported with an `error` and never stops the rest, even one whose script
+crashes the process (see `evaluate_positions`).
+"""
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+import chess
+from .engine.evaluator import Evaluator
+
+EVAL_CHUNK_SIZE = 256
+CHUNKS_IN_FLIGHT_PER_WORKER = 4  # bounds memory: input is read only as fast as it is scored
+MAX_CHUNK_ATTEMPTS = 2  # a chunk whose process died is retried once, then run alone and split
+
+# Per-process state: the bot's compiled evaluate(board)
+_evaluate = None
+
+
+def parse_position(line: str) -> chess.Board:
+    """A board from a FEN (4 or 6 fields) or an EPD line with opcodes."""
+    fields = line.split()
+    if len(fields) == 6 and fields[4].isdigit() and fields[5].isdigit():
+        return chess.Board(line)
+    board, _ = chess.Board.from_epd(line)
+    return board
+
+
+def read_positions(file: BinaryIO) -> Iterator[Tuple[int, str]]:
+    """(line index, text) for each position line of an EPD/FEN file; blank and `#` lines are skipped."""
+    for index, raw in enumerate(file):
+        line = raw.decode("utf-8", errors="replace").strip()
+        if line and not line.startswith("#"):
+            yield index, line
+
+
+def _init_eval_worker(rules_json: list):
+    global _evaluate
+    _evaluate = Evaluator(rules_json).script_callable
+
+
+def evaluate_chunk(chunk: List[Tuple[int, str]]) -> List[dict]:
+    results = []
+    for index, text in chunk:
+        try:
+            results.append({"index": index, "fen": text, "score": float(_evaluate(parse_position(text)))})
+        except Exception as e:
+            results.append({"index": index, "fen": text, "error": f"{type(e).__name__}: {e}"})
+    return results
+
+
+def _chunks(positions: Iterable[Tuple[int, str]], size: int) -> Iterator[List[Tuple[int, str]]]:
+    chunk = []
+    for item in positions:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _pool(rules_json: list, workers: int) -> ProcessPoolExecutor:
+    # Spawn, not fork: the API process runs threads
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_eval_worker, initargs=(rules_json,))
+
+
+def evaluate_positions(rules_json: list, positions: Iterable[Tuple[int, str]], workers: Optional[int] = None,
+                       chunk_size: int = EVAL_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Score `positions` across a process pool, yielding results in completion order.
+
+    When a script crashes its process, every chunk in flight fails with it. The
+    pool is replaced and those chunks are resubmitted. A chunk that breaks the
+    pool again is run alone and split in halves until the position that kills
+    the process is isolated; only that position is reported as failed.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    state = {"pool": _pool(rules_json, workers), "generation": 0}  # generation: bumped when the pool is replaced
+
+    def replace_pool():
+        state["pool"].shutdown(wait=False, cancel_futures=True)
+        state["pool"] = _pool(rules_json, workers)
+        state["generation"] += 1
+
+    def submit(chunk: list, attempts: int, alone: bool):
+        try:
+            future = state["pool"].submit(evaluate_chunk, chunk)
+        except BrokenProcessPool:
+            # A script crashed its process; carry on with a fresh pool
+            replace_pool()
+            future = state["pool"].submit(evaluate_chunk, chunk)
+        pending[future] = (chunk, attempts + 1, alone, state["generation"])
+
+    try:
+        chunks = _chunks(positions, max(1, chunk_size))
+        retry: deque = deque()    # (chunk, attempts) to resubmit before reading more input
+        suspects: deque = deque()  # chunks that broke the pool twice, run one at a time
+        pending = {}
+        exhausted = False
+        while True:
+            if suspects:
+                # Nothing else in flight, so a crash can only come from this chunk
+                if not pending:
+                    submit(suspects.popleft(), 0, True)
+            else:
+                while len(pending) < workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                    if retry:
+                        chunk, attempts = retry.popleft()
+                    else:
+                        chunk, attempts = (None, 0) if exhausted else (next(chunks, None), 0)
+                        if chunk is None:
+                            exhausted = True
+                            break
+                    submit(chunk, attempts, False)
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk, attempts, alone, generation = pending.pop(future)
+                try:
+                    results = future.result()
+                except BrokenProcessPool:
+                    if generation == state["generation"]:
+                        replace_pool()
+                    if not alone:
+                        if attempts < MAX_CHUNK_ATTEMPTS:
+                            retry.append((chunk, attempts))
+                        else:
+                            suspects.append(chunk)
+                        continue
+                    if len(chunk) > 1:
+                        half = len(chunk) // 2
+                        suspects.extend([chunk[:half], chunk[half:]])
+                        continue
+                    results = [{"index": index, "fen": text, "error": "evaluation process died"}
+                               for index, text in chunk]
+                except Exception as e:
+                    results = [{"index": index, "fen": text, "error": f"{type(e).__name__}: {e}"}
+                               for index, text in chunk]
+                yield from results
+    finally:
+        # Also reached when the client disconnects and the stream is closed early
+        state["pool"].shutdown(wait=False, cancel_futures=True)
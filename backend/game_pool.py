@@ -0,0 +1,120 @@
+"""
+Process pool for batches of engine games (gauntlets, tournaments).
+
+Each process receives the `bot_versions` rows once, compiles each version's
+Evaluator on first use and keeps it for every later game, including the eval
+cache of pure bots. Scripts not marked pure get a fork of it per game (see
+Evaluator.fork), so module-level script state does not carry over. Engines, and
+so their transposition tables, are fresh for every game, as in a single match.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional
+from .engine.chess_engine import ChessEngine, parse_engine_options, evaluator_cache_size
+from .engine.evaluator import Evaluator
+from .engine.game import play_game
+
+MAX_GAME_ATTEMPTS = 2  # a game whose process died is retried once
+
+# Per-process state: version rows and their compiled evaluators
+_versions: dict = {}
+_evaluators: dict = {}
+
+
+def _init_game_worker(versions: dict):
+    global _versions
+    _versions = versions
+    _evaluators.clear()
+
+
+def _evaluator_for(version_id: str) -> Evaluator:
+    row = _versions[version_id]
+    options = parse_engine_options(row.get("engine_options"))
+    evaluator = _evaluators.get(version_id)
+    if evaluator is None:
+        evaluator = Evaluator(row["rules_json"], cache_size=evaluator_cache_size(options))
+        _evaluators[version_id] = evaluator
+    if evaluator.is_script and not options["pure"]:
+        return evaluator.fork()
+    return evaluator
+
+
+def play_scheduled_game(spec: dict) -> dict:
+    """Play `spec` (`white`, `black` version ids, optional `opening` FEN) and return it with the outcome."""
+    white = ChessEngine.from_version(_versions[spec["white"]], _evaluator_for(spec["white"]))
+    black = ChessEngine.from_version(_versions[spec["black"]], _evaluator_for(spec["black"]))
+    try:
+        game = play_game(white, black, spec["white"], spec["black"], start_fen=spec.get("opening"),
+                         label=f"Game {spec['game']}")
+    finally:
+        white.close()
+        black.close()
+    return {
+        **spec,
+        "result": game["result"],
+        "termination": game["termination"],
+        "plies": game["plies"],
+        "pgn": game["pgn"],
+    }
+
+
+class GamePool:
+    """
+    Play game specs in parallel. A game that raises, or whose process dies,
+    is reported with an `error` instead of a result. Failures never stop the
+    rest of the batch.
+    """
+    def __init__(self, versions: dict, workers: Optional[int] = None):
+        self.versions = versions
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawn, not fork: the API process runs threads
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=_init_game_worker, initargs=(self.versions,))
+        return self._executor
+
+    def run(self, specs: List[dict], on_result: Callable[[dict], None]):
+        """Play all `specs`, calling `on_result` in this process as each game finishes."""
+        attempts = {spec["game"]: 0 for spec in specs}
+        pending = list(specs)
+        while pending:
+            pool = self._pool()
+            futures = {}
+            for spec in pending:
+                attempts[spec["game"]] += 1
+                futures[pool.submit(play_scheduled_game, spec)] = spec
+            pending = []
+            broken = False
+            for future in as_completed(futures):
+                spec = futures[future]
+                try:
+                    game = future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    if attempts[spec["game"]] < MAX_GAME_ATTEMPTS:
+                        pending.append(spec)
+                        continue
+                    game = {**spec, "error": "game process died"}
+                except Exception as e:
+                    game = {**spec, "error": f"{type(e).__name__}: {e}"}
+                on_result(game)
+            if broken:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self) -> "GamePool":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,111 @@
+"""
+Gauntlets: one bot version plays a batch of games against a list of opponents.
+
+Colors alternate game by game. With a set of starting positions (FENs), each
+opening is played twice, once with each color. Games run in a GamePool, which
+compiles each version's Evaluator once per process.
+
+Each finished game is written to `gauntlet_games`; the `gauntlets` row only
+carries the running totals (games played, score, summary).
+"""
+from typing import Dict, List, Optional
+from .database import get_supabase_client
+from .game_pool import GamePool
+
+MAX_GAUNTLET_GAMES = 400
+
+
+def build_schedule(version_id: str, opponent_ids: List[str], games_per_opponent: int,
+                   openings: Optional[List[str]] = None) -> List[dict]:
+    """One entry per game: the version takes white in even games and black in odd ones."""
+    schedule = []
+    for opponent in opponent_ids:
+        for i in range(games_per_opponent):
+            opening = openings[(i // 2) % len(openings)] if openings else None
+            white, black = (version_id, opponent) if i % 2 == 0 else (opponent, version_id)
+            schedule.append({"game": len(schedule), "opponent": opponent, "white": white, "black": black,
+                             "opening": opening})
+    return schedule
+
+
+def game_score(version_id: str, game: dict) -> float:
+    """Points the gauntlet version earned in a finished game."""
+    if game.get("result") == "1/2-1/2":
+        return 0.5
+    if game.get("result") not in ("1-0", "0-1"):
+        # Failed or unfinished game (an engine returned no move)
+        return 0.0
+    return 1.0 if (game["result"] == "1-0") == (game["white"] == version_id) else 0.0
+
+
+def summarize(version_id: str, games: List[dict]) -> dict:
+    def tally(subset: List[dict]) -> dict:
+        scores = [game_score(version_id, g) for g in subset]
+        wins = scores.count(1.0)
+        draws = scores.count(0.5)
+        score = sum(scores)
+        return {
+            "games": len(subset),
+            "wins": wins,
+            "draws": draws,
+            "losses": len(subset) - wins - draws,
+            "score": score,
+            "score_pct": round(100 * score / len(subset), 1) if subset else 0.0,
+        }
+
+    played = [g for g in games if "error" not in g]
+    summary = tally(played)
+    summary["failed"] = len(games) - len(played)
+    by_opponent: Dict[str, List[dict]] = {}
+    for game in played:
+        by_opponent.setdefault(game["opponent"], []).append(game)
+    summary["per_opponent"] = {opponent: tally(subset) for opponent, subset in by_opponent.items()}
+    return summary
+
+
+def run_gauntlet_task(gauntlet_id: str, version_id: str, versions: dict, schedule: List[dict],
+                      workers: Optional[int] = None):
+    supabase = get_supabase_client()
+    supabase.table("gauntlets").update({"status": "running"}).eq("id", gauntlet_id).execute()
+
+    games = []
+
+    def record(game: dict):
+        if "error" not in game:
+            game["score"] = game_score(version_id, game)
+        else:
+            print(f"Gauntlet {gauntlet_id}: game {game['game']} failed: {game['error']}")
+        # One row per game; the PGN lives only there
+        supabase.table("gauntlet_games").insert({
+            "gauntlet_id": gauntlet_id,
+            "game_index": game["game"],
+            "opponent": game["opponent"],
+            "white_version": game["white"],
+            "black_version": game["black"],
+            "opening": game["opening"],
+            "result": game.get("result"),
+            "termination": game.get("termination"),
+            "plies": game.get("plies"),
+            "score": game.get("score"),
+            "pgn": game.get("pgn"),
+            "error": game.get("error"),
+        }).execute()
+        games.append({key: value for key, value in game.items() if key != "pgn"})
+        summary = summarize(version_id, games)
+        supabase.table("gauntlets").update({
+            "games_played": len(games),
+            "score": summary["score"],
+            "summary": summary,
+        }).eq("id", gauntlet_id).execute()
+        print(f"Gauntlet {gauntlet_id}: {len(games)}/{len(schedule)} games, score {summary['score']}")
+
+    try:
+        with GamePool(versions, workers) as pool:
+            pool.run(schedule, record)
+
+        supabase.table("gauntlets").update({"status": "completed"}).eq("id", gauntlet_id).execute()
+    except Exception as e:
+        import traceback
+        supabase.table("gauntlets").update({"status": "failed"}).eq("id", gauntlet_id).execute()
+        print(f"Gauntlet {gauntlet_id} failed with error: {e}")
+        traceback.print_exc()
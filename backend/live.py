@@ -0,0 +1,83 @@
+"""
+In-process pub/sub of running matches, for the live stream endpoint.
+
+`trigger_match` opens a channel; `run_match_task` publishes a "start" event,
+one "move" event per ply and a final "end" event. Every event is numbered and
+buffered, so a viewer who joins late (or reconnects with Last-Event-ID) first
+receives what it missed and then follows live. Games run on background
+threads and subscribers are asyncio queues, so events are handed over with
+`call_soon_threadsafe`.
+
+Only matches played by this process are live. Matches run by queue workers
+(EXTERNAL_MATCH_WORKERS) have no channel here; viewers see them once they
+finish. A finished channel is kept for LIVE_RETENTION_SECONDS.
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+LIVE_RETENTION_SECONDS = 120
+
+
+class _Channel:
+    def __init__(self):
+        self.events: List[dict] = []
+        self.subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self.ended_at: Optional[float] = None
+
+
+_lock = threading.Lock()
+_channels: Dict[str, _Channel] = {}
+
+
+def _purge_expired():
+    now = time.monotonic()
+    for match_id in [m for m, c in _channels.items()
+                     if c.ended_at is not None and now - c.ended_at > LIVE_RETENTION_SECONDS]:
+        del _channels[match_id]
+
+
+def open_channel(match_id: str):
+    with _lock:
+        _purge_expired()
+        _channels.setdefault(match_id, _Channel())
+
+
+def publish(match_id: str, event: str, data: dict):
+    """Buffer an event and hand it to every subscriber; a no-op for matches without a channel."""
+    with _lock:
+        channel = _channels.get(match_id)
+        if channel is None or channel.ended_at is not None:
+            return
+        entry = {"id": len(channel.events), "event": event, "data": data}
+        channel.events.append(entry)
+        if event == "end":
+            channel.ended_at = time.monotonic()
+        subscribers = list(channel.subscribers.items())
+    for queue, loop in subscribers:
+        loop.call_soon_threadsafe(queue.put_nowait, entry)
+
+
+def subscribe(match_id: str, after: int = -1) -> Optional[Tuple[List[dict], asyncio.Queue]]:
+    """
+    Buffered events numbered above `after`, and a queue of later ones.
+    Returns None if the match is not live in this process. Call from the event loop.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    with _lock:
+        _purge_expired()
+        channel = _channels.get(match_id)
+        if channel is None:
+            return None
+        backlog = channel.events[max(after, -1) + 1:]
+        if channel.ended_at is None:
+            channel.subscribers[queue] = asyncio.get_running_loop()
+    return backlog, queue
+
+
+def unsubscribe(match_id: str, queue: asyncio.Queue):
+    with _lock:
+        channel = _channels.get(match_id)
+        if channel is not None:
+            channel.subscribers.pop(queue, None)
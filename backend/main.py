@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .api import bots, matches
+from .api import bots, matches, gauntlets, tournaments
 
 app = FastAPI(title="MiniMaxing API")
 
@@ -16,6 +16,8 @@ app.add_middleware(
 # Include routers
 app.include_router(bots.router, prefix="/api/bots", tags=["bots"])
 app.include_router(matches.router, prefix="/api/matches", tags=["matches"])
+app.include_router(gauntlets.router, prefix="/api/gauntlets", tags=["gauntlets"])
+app.include_router(tournaments.router, prefix="/api/tournaments", tags=["tournaments"])
 
 @app.get("/")
 async def root():
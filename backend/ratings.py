@@ -0,0 +1,168 @@
+"""
+Ratings for bot versions.
+
+Incremental: `rate_match(match_id)` applies one Elo update when a match
+completes. It calls the `apply_match_rating` RPC, which locks both versions,
+so concurrent workers cannot lose updates. It fills `matches.elo_delta_a/b`,
+adds two `elo_history` rows and moves `bot_versions.rating`.
+
+Bulk: `recompute_ratings()` reads every match once and computes the ratings
+in memory, then stores them with a single `bulk_write_ratings` call.
+  - "elo" replays the matches in order with the same update, rebuilding
+    deltas and history.
+  - "bradley_terry" fits all results at once (BayesElo-style: draws count
+    half, plus a small prior). It sets the ratings only and leaves deltas
+    and history as they are.
+
+    python -m backend.ratings --method elo
+"""
+import argparse
+import time
+from typing import Dict, List, Tuple
+from .database import get_supabase_client
+
+DEFAULT_RATING = 1200.0
+K_FACTOR = 32.0
+METHODS = ("elo", "bradley_terry")
+
+PAGE_SIZE = 1000
+BT_PRIOR_GAMES = 2.0      # virtual draws against an average opponent, keeps unbeaten/winless versions finite
+BT_MAX_ITERATIONS = 1000
+BT_TOLERANCE = 1e-9
+
+
+def expected_score(rating_a: float, rating_b: float) -> float:
+    return 1.0 / (1.0 + 10 ** ((rating_b - rating_a) / 400.0))
+
+
+def winner_score(winner: str) -> float:
+    """Score of bot A for a `matches.winner` value."""
+    return {"A": 1.0, "B": 0.0}.get(winner, 0.5)
+
+
+def rate_match(match_id: str, k: float = K_FACTOR):
+    """Apply the Elo update for one completed match (no-op if it is already rated)."""
+    supabase = get_supabase_client()
+    res = supabase.rpc("apply_match_rating", {"p_match_id": match_id, "p_k": k, "p_default": DEFAULT_RATING}).execute()
+    return res.data[0] if res.data else None
+
+
+def fetch_matches() -> List[dict]:
+    """All decided matches in play order, paged so large tables come back complete."""
+    supabase = get_supabase_client()
+    matches = []
+    start = 0
+    while True:
+        page = supabase.table("matches").select("id, bot_a_version, bot_b_version, winner, created_at") \
+            .not_.is_("winner", "null").order("created_at").order("id") \
+            .range(start, start + PAGE_SIZE - 1).execute().data or []
+        matches.extend(page)
+        if len(page) < PAGE_SIZE:
+            return matches
+        start += PAGE_SIZE
+
+
+def replay_elo(matches: List[dict], k: float = K_FACTOR) -> Tuple[Dict[str, float], Dict[str, int], List[dict], List[dict]]:
+    """Sequential Elo over `matches`; returns (ratings, games, match deltas, history rows)."""
+    ratings: Dict[str, float] = {}
+    games: Dict[str, int] = {}
+    deltas = []
+    history = []
+    for m in matches:
+        a, b = m["bot_a_version"], m["bot_b_version"]
+        if a == b:
+            deltas.append({"id": m["id"], "elo_delta_a": 0.0, "elo_delta_b": 0.0})
+            continue
+        ra = ratings.get(a, DEFAULT_RATING)
+        rb = ratings.get(b, DEFAULT_RATING)
+        delta = k * (winner_score(m["winner"]) - expected_score(ra, rb))
+        ratings[a] = ra + delta
+        ratings[b] = rb - delta
+        games[a] = games.get(a, 0) + 1
+        games[b] = games.get(b, 0) + 1
+        deltas.append({"id": m["id"], "elo_delta_a": delta, "elo_delta_b": -delta})
+        history.append({"bot_version_id": a, "match_id": m["id"], "elo_before": ra, "elo_after": ra + delta,
+                        "created_at": m["created_at"]})
+        history.append({"bot_version_id": b, "match_id": m["id"], "elo_before": rb, "elo_after": rb - delta,
+                        "created_at": m["created_at"]})
+    return ratings, games, deltas, history
+
+
+def fit_bradley_terry(matches: List[dict]) -> Tuple[Dict[str, float], Dict[str, int]]:
+    """
+    Maximum-likelihood Bradley-Terry strengths by the MM algorithm, vectorized
+    over all pairs, returned on the Elo scale with the average at DEFAULT_RATING.
+    """
+    import numpy as np
+
+    ids = sorted({m[side] for m in matches for side in ("bot_a_version", "bot_b_version")})
+    index = {vid: i for i, vid in enumerate(ids)}
+    n = len(ids)
+    if n == 0:
+        return {}, {}
+    rated = [m for m in matches if m["bot_a_version"] != m["bot_b_version"]]
+    a = np.array([index[m["bot_a_version"]] for m in rated], dtype=np.int64)
+    b = np.array([index[m["bot_b_version"]] for m in rated], dtype=np.int64)
+    score_a = np.array([winner_score(m["winner"]) for m in rated], dtype=np.float64)
+
+    # Wins (draws count half) and games per player; the prior adds draws against a strength-1 opponent
+    wins = np.bincount(a, score_a, n) + np.bincount(b, 1.0 - score_a, n) + BT_PRIOR_GAMES / 2
+    games = np.bincount(a, minlength=n) + np.bincount(b, minlength=n)
+
+    strength = np.ones(n)
+    for _ in range(BT_MAX_ITERATIONS):
+        inv = 1.0 / (strength[a] + strength[b])
+        denom = np.bincount(a, inv, n) + np.bincount(b, inv, n) + BT_PRIOR_GAMES / (strength + 1.0)
+        updated = wins / denom
+        updated /= np.exp(np.mean(np.log(updated)))
+        converged = np.max(np.abs(np.log(updated) - np.log(strength))) < BT_TOLERANCE
+        strength = updated
+        if converged:
+            break
+
+    elo = 400.0 * np.log10(strength)
+    elo += DEFAULT_RATING - elo.mean()
+    return ({vid: float(elo[i]) for vid, i in index.items()},
+            {vid: int(games[i]) for vid, i in index.items()})
+
+
+def recompute_ratings(method: str = "elo", k: float = K_FACTOR) -> dict:
+    """Rebuild every version's rating from the full `matches` table with one bulk write."""
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}")
+    start = time.perf_counter()
+    matches = fetch_matches()
+    fetched = time.perf_counter()
+
+    params = {"p_default": DEFAULT_RATING, "p_match_deltas": None, "p_history": None}
+    if method == "elo":
+        ratings, games, deltas, history = replay_elo(matches, k)
+        params["p_match_deltas"] = deltas
+        params["p_history"] = history
+    else:
+        ratings, games = fit_bradley_terry(matches)
+    params["p_ratings"] = [{"id": vid, "rating": r, "rated_games": games.get(vid, 0)} for vid, r in ratings.items()]
+    computed = time.perf_counter()
+
+    get_supabase_client().rpc("bulk_write_ratings", params).execute()
+    done = time.perf_counter()
+    return {
+        "method": method,
+        "matches": len(matches),
+        "versions": len(ratings),
+        "fetch_ms": round((fetched - start) * 1000, 1),
+        "compute_ms": round((computed - fetched) * 1000, 1),
+        "write_ms": round((done - computed) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--method", choices=METHODS, default="elo")
+    parser.add_argument("--k", type=float, default=K_FACTOR)
+    args = parser.parse_args()
+    print(recompute_ratings(args.method, args.k))
+
+
+if __name__ == "__main__":
+    main()
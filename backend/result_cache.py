@@ -0,0 +1,72 @@
+"""
+Cache of finished match results.
+
+Engine games are deterministic: the same two evaluators, depths and engine
+options replay the same game move for move. A result is therefore keyed by
+both sides' `rules_hash`, `search_depth` and parsed `engine_options`, plus
+ENGINE_VERSION. Re-running a pairing, or a pairing of clones with identical
+rules, returns the stored PGN, winner and metadata instead of playing again.
+
+Games with wall-clock budgets depend on machine load, and root-parallel games
+with node budgets depend on how moves are spread across processes. Neither
+is cached.
+"""
+import hashlib
+import io
+import json
+import chess.pgn
+from typing import Optional
+from .database import get_supabase_client
+from .engine.chess_engine import ENGINE_VERSION, parse_engine_options
+
+
+def _side_key(version: dict) -> Optional[dict]:
+    options = parse_engine_options(version.get("engine_options"))
+    if options["move_time_ms"] is not None or options["game_time_ms"] is not None:
+        return None
+    if options["workers"] and (options["move_nodes"] is not None or options["game_nodes"] is not None):
+        return None
+    return {"rules_hash": version["rules_hash"], "search_depth": version["search_depth"], "engine_options": options}
+
+
+def result_cache_key(white: dict, black: dict) -> Optional[str]:
+    """Cache key for a game between two `bot_versions` rows, or None if its result is not reproducible."""
+    white_key = _side_key(white)
+    black_key = _side_key(black)
+    if white_key is None or black_key is None:
+        return None
+    payload = json.dumps({"engine_version": ENGINE_VERSION, "white": white_key, "black": black_key}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def lookup(cache_key: str) -> Optional[dict]:
+    supabase = get_supabase_client()
+    res = supabase.table("match_result_cache").select("*").eq("cache_key", cache_key).execute()
+    if not res.data:
+        return None
+    entry = res.data[0]
+    supabase.table("match_result_cache").update({"hits": entry["hits"] + 1}).eq("cache_key", cache_key).execute()
+    return entry
+
+
+def store(cache_key: str, match_id: str, winner: str, termination: str, pgn: str, game_data: str):
+    get_supabase_client().table("match_result_cache").upsert({
+        "cache_key": cache_key,
+        "engine_version": ENGINE_VERSION,
+        "source_match_id": match_id,
+        "winner": winner,
+        "termination_reason": termination,
+        "pgn": pgn,
+        "game_data": game_data,
+        "hits": 0,
+    }).execute()
+
+
+def relabel_pgn(pgn: str, white_name: str, black_name: str) -> str:
+    """The cached PGN with the player headers of the match it is replayed for."""
+    game = chess.pgn.read_game(io.StringIO(pgn))
+    if game is None:
+        return pgn
+    game.headers["White"] = white_name
+    game.headers["Black"] = black_name
+    return str(game)
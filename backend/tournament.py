@@ -0,0 +1,240 @@
+"""
+Round-robin and Swiss tournaments between bot versions.
+
+A round robin schedules every game up front (circle method), so all of them
+run in parallel on the GamePool. A Swiss tournament pairs each round from the
+standings after the previous one. Players with equal points meet, rematches
+are avoided while possible, and with an odd field the lowest-ranked player
+without a bye gets one (worth a win). Each pairing plays `games_per_pairing`
+games with alternating colors.
+
+Games that fail are recorded with their error and do not count. Standings are
+updated and written after every game.
+"""
+import math
+from typing import Dict, List, Optional, Set, Tuple
+from .database import get_supabase_client
+from .game_pool import GamePool
+
+FORMATS = ("round_robin", "swiss")
+MAX_TOURNAMENT_PLAYERS = 100
+# Opponents tried by the rematch-free Swiss pairing search before it falls back to top-down pairing
+PAIRING_SEARCH_LIMIT = 20000
+
+
+def round_robin_rounds(players: List[str]) -> List[List[Tuple[str, str]]]:
+    """Circle method: n-1 rounds (n if odd) in which everyone meets everyone once."""
+    field = list(players)
+    if len(field) % 2:
+        field.append(None)  # bye
+    n = len(field)
+    rounds = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            a, b = field[i], field[n - 1 - i]
+            if a is not None and b is not None:
+                # Alternate who is listed first (plays white first) from round to round
+                pairs.append((a, b) if (r + i) % 2 == 0 else (b, a))
+        rounds.append(pairs)
+        field = [field[0]] + [field[-1]] + field[1:-1]
+    return rounds
+
+
+def default_swiss_rounds(player_count: int) -> int:
+    # Enough rounds to separate a single winner
+    return max(1, math.ceil(math.log2(max(player_count, 2))))
+
+
+def max_swiss_rounds(player_count: int) -> int:
+    # Beyond this, some rounds cannot avoid rematches
+    return max(1, player_count - 1)
+
+
+def swiss_pairings(players: List[str], points: Dict[str, float], met: Set[frozenset],
+                   had_bye: Set[str]) -> Tuple[List[Tuple[str, str]], Optional[str]]:
+    """Pair players by score (ties in seed order); returns (pairs, bye)."""
+    seed = {p: i for i, p in enumerate(players)}
+    ranked = sorted(players, key=lambda p: (-points[p], seed[p]))
+    bye = None
+    if len(ranked) % 2:
+        bye = next((p for p in reversed(ranked) if p not in had_bye), ranked[-1])
+        ranked.remove(bye)
+    pairs = _pair_without_rematches(ranked, met, [PAIRING_SEARCH_LIMIT])
+    if pairs is None:
+        # No rematch-free pairing found within the search limit
+        pairs = _pair_top_down(ranked, met)
+    return pairs, bye
+
+
+def _pair_without_rematches(ranked: List[str], met: Set[frozenset],
+                            budget: List[int]) -> Optional[List[Tuple[str, str]]]:
+    # Pair the top player with the highest-ranked opponent not met yet, backtracking if the rest cannot be paired.
+    # `budget` counts down the tries; the search gives up (None) when it runs out.
+    if not ranked:
+        return []
+    first = ranked[0]
+    for i in range(1, len(ranked)):
+        if frozenset((first, ranked[i])) in met:
+            continue
+        budget[0] -= 1
+        if budget[0] < 0:
+            return None
+        rest = _pair_without_rematches(ranked[1:i] + ranked[i + 1:], met, budget)
+        if rest is not None:
+            return [(first, ranked[i])] + rest
+        if budget[0] < 0:
+            return None
+    return None
+
+
+def _pair_top_down(ranked: List[str], met: Set[frozenset]) -> List[Tuple[str, str]]:
+    # Each player in rank order takes the highest-ranked opponent not met yet, or the next one if all were met
+    pairs = []
+    left = list(ranked)
+    while left:
+        first = left.pop(0)
+        i = next((i for i, p in enumerate(left) if frozenset((first, p)) not in met), 0)
+        pairs.append((first, left.pop(i)))
+    return pairs
+
+
+class Standings:
+    """Points per version, updated one game at a time, with Buchholz and Sonneborn-Berger tiebreaks."""
+    def __init__(self, players: List[str]):
+        self.players = list(players)
+        self.rows = {p: {"version_id": p, "played": 0, "wins": 0, "draws": 0, "losses": 0, "byes": 0, "points": 0.0}
+                     for p in players}
+        self.whites = {p: 0 for p in players}
+        # (player, opponent, points scored) for each game, used by the tiebreaks
+        self.scores: List[Tuple[str, str, float]] = []
+
+    def add_game(self, white: str, black: str, result: str):
+        white_points = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}.get(result)
+        if white_points is None:
+            return
+        for player, opponent, pts in ((white, black, white_points), (black, white, 1.0 - white_points)):
+            row = self.rows[player]
+            row["played"] += 1
+            row["points"] += pts
+            row["wins" if pts == 1.0 else "draws" if pts == 0.5 else "losses"] += 1
+            self.scores.append((player, opponent, pts))
+
+    def add_bye(self, player: str):
+        self.rows[player]["byes"] += 1
+        self.rows[player]["points"] += 1.0
+
+    def points(self) -> Dict[str, float]:
+        return {p: row["points"] for p, row in self.rows.items()}
+
+    def table(self) -> List[dict]:
+        points = self.points()
+        buchholz = {p: 0.0 for p in self.players}
+        sonneborn_berger = {p: 0.0 for p in self.players}
+        for player, opponent, pts in self.scores:
+            buchholz[player] += points[opponent]
+            sonneborn_berger[player] += pts * points[opponent]
+        seed = {p: i for i, p in enumerate(self.players)}
+        table = [{**self.rows[p], "buchholz": buchholz[p], "sonneborn_berger": sonneborn_berger[p]}
+                 for p in self.players]
+        table.sort(key=lambda r: (-r["points"], -r["sonneborn_berger"], -r["buchholz"], seed[r["version_id"]]))
+        for rank, row in enumerate(table, 1):
+            row["rank"] = rank
+        return table
+
+
+def pairing_games(pairs: List[Tuple[str, str]], round_no: int, games_per_pairing: int,
+                  openings: List[str], first_game: int, whites: Optional[Dict[str, int]] = None) -> List[dict]:
+    """Game specs for one round; with `whites`, the player with fewer whites so far starts with white."""
+    specs = []
+    for pair_idx, (a, b) in enumerate(pairs):
+        if whites is not None and whites[b] < whites[a]:
+            a, b = b, a
+        for i in range(games_per_pairing):
+            opening = openings[(pair_idx + i // 2) % len(openings)] if openings else None
+            white, black = (a, b) if i % 2 == 0 else (b, a)
+            specs.append({"game": first_game + len(specs), "round": round_no, "white": white, "black": black,
+                          "opening": opening})
+            if whites is not None:
+                whites[white] += 1
+    return specs
+
+
+def games_total(fmt: str, player_count: int, rounds: int, games_per_pairing: int) -> int:
+    if fmt == "round_robin":
+        return player_count * (player_count - 1) // 2 * games_per_pairing
+    return rounds * (player_count // 2) * games_per_pairing
+
+
+def run_tournament_task(tournament_id: str, fmt: str, players: List[str], versions: dict, rounds: int,
+                        games_per_pairing: int, openings: List[str], workers: Optional[int] = None):
+    supabase = get_supabase_client()
+    supabase.table("tournaments").update({"status": "running"}).eq("id", tournament_id).execute()
+
+    standings = Standings(players)
+    counters = {"played": 0, "failed": 0}
+
+    def record(game: dict):
+        supabase.table("tournament_games").insert({
+            "tournament_id": tournament_id,
+            "round": game["round"],
+            "game_index": game["game"],
+            "white_version": game["white"],
+            "black_version": game["black"],
+            "opening": game["opening"],
+            "result": game.get("result"),
+            "termination": game.get("termination"),
+            "plies": game.get("plies"),
+            "pgn": game.get("pgn"),
+            "error": game.get("error"),
+        }).execute()
+        if "error" in game:
+            counters["failed"] += 1
+            print(f"Tournament {tournament_id}: game {game['game']} failed: {game['error']}")
+        else:
+            counters["played"] += 1
+            standings.add_game(game["white"], game["black"], game["result"])
+        supabase.table("tournaments").update({
+            "games_played": counters["played"],
+            "games_failed": counters["failed"],
+            "standings": standings.table(),
+        }).eq("id", tournament_id).execute()
+
+    try:
+        with GamePool(versions, workers) as pool:
+            if fmt == "round_robin":
+                # Rounds are independent, so all games are scheduled at once
+                all_rounds = round_robin_rounds(players)
+                specs = []
+                for round_no, pairs in enumerate(all_rounds, 1):
+                    specs += pairing_games(pairs, round_no, games_per_pairing, openings, len(specs))
+                supabase.table("tournaments").update({"current_round": len(all_rounds)}).eq("id", tournament_id).execute()
+                pool.run(specs, record)
+            else:
+                rounds = min(rounds, max_swiss_rounds(len(players)))
+                met: Set[frozenset] = set()
+                had_bye: Set[str] = set()
+                next_game = 0
+                for round_no in range(1, rounds + 1):
+                    pairs, bye = swiss_pairings(players, standings.points(), met, had_bye)
+                    if bye is not None:
+                        had_bye.add(bye)
+                        standings.add_bye(bye)
+                    met.update(frozenset(p) for p in pairs)
+                    specs = pairing_games(pairs, round_no, games_per_pairing, openings, next_game, standings.whites)
+                    next_game += len(specs)
+                    supabase.table("tournaments").update({
+                        "current_round": round_no,
+                        "standings": standings.table(),
+                    }).eq("id", tournament_id).execute()
+                    print(f"Tournament {tournament_id}: round {round_no}/{rounds}, {len(pairs)} pairings"
+                          + (f", bye for {bye}" if bye else ""))
+                    pool.run(specs, record)
+
+        supabase.table("tournaments").update({"status": "completed"}).eq("id", tournament_id).execute()
+        print(f"Tournament {tournament_id} finished: {counters['played']} games, {counters['failed']} failed")
+    except Exception as e:
+        import traceback
+        supabase.table("tournaments").update({"status": "failed"}).eq("id", tournament_id).execute()
+        print(f"Tournament {tournament_id} failed with error: {e}")
+        traceback.print_exc()
@@ -0,0 +1,69 @@
+"""
+Process-wide caches of `bot_versions` rows and their compiled Evaluators.
+
+A version row is fetched from Supabase once. Its Evaluator (the compiled
+script, or the fused rule function, plus the eval cache of pure bots) is built
+once per (version id, rules_hash). Rule and pure evaluators are shared by every
+match and eval_batch request in this process. Any other script keeps
+module-level state, such as dicts or counters, inside its namespace. Each caller
+therefore gets a fork: the compiled code is reused and the module body runs
+again. Both caches are bounded LRUs, each guarded by its own lock.
+
+Versions are immutable once they have matches. `update_version` and
+`delete_version` call `invalidate` for the API process. A match that fails
+invalidates its versions too, because a version without matches can still be
+edited while a queue worker holds it. Gauntlets and tournaments store no
+`matches` rows, though, so their versions stay editable. A queue worker process
+never sees `update_version`, so it keeps serving the old row until that row is
+evicted or the worker restarts.
+"""
+from typing import Optional
+from .database import get_supabase_client
+from .engine.chess_engine import parse_engine_options, evaluator_cache_size
+from .engine.evaluator import Evaluator
+from .engine.lru import LRUCache
+
+VERSION_CACHE_SIZE = 512
+EVALUATOR_CACHE_SIZE = 32  # each pure bot's evaluator carries its own eval cache
+
+_versions = LRUCache(VERSION_CACHE_SIZE)
+_evaluators = LRUCache(EVALUATOR_CACHE_SIZE)
+
+
+def get_version(version_id: str) -> Optional[dict]:
+    """The `bot_versions` row for `version_id`, or None if there is none."""
+    row = _versions.get(version_id)
+    if row is not None:
+        return row
+    res = get_supabase_client().table("bot_versions").select("*").eq("id", version_id).single().execute()
+    if not res.data:
+        return None
+    _versions.put(version_id, res.data)
+    return res.data
+
+
+def get_evaluator(version: dict) -> Evaluator:
+    """
+    The compiled Evaluator for a `bot_versions` row, built on first use. Scripts
+    not marked pure get their own fork on every call.
+    """
+    key = (version["id"], version["rules_hash"])
+    options = parse_engine_options(version.get("engine_options"))
+    evaluator = _evaluators.get(key)
+    if evaluator is None:
+        # Compile outside the lock; if two threads race, the last one built is kept
+        evaluator = Evaluator(version["rules_json"], cache_size=evaluator_cache_size(options))
+        _evaluators.put(key, evaluator)
+    if evaluator.is_script and not options["pure"]:
+        return evaluator.fork()
+    return evaluator
+
+
+def invalidate(version_id: str):
+    """Forget a version's row and every Evaluator compiled for it."""
+    _versions.pop(version_id)
+    _evaluators.pop_matching(lambda key: key[0] == version_id)
+
+
+def cache_stats() -> dict:
+    return {"versions": _versions.stats(), "evaluators": _evaluators.stats()}
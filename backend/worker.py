@@ -0,0 +1,170 @@
+"""
+Standalone match worker.
+
+Claims `queued` rows from `match_queue` (highest priority first, then oldest)
+and plays them in a process pool, so matches no longer run inside the API
+process. Start as many workers as you like, on one machine or several, and
+run the API with EXTERNAL_MATCH_WORKERS=1 so it only queues matches:
+
+    python -m backend.worker --processes 4
+
+While a job runs, the worker refreshes its `heartbeat_at`. Every worker also
+puts `running` jobs whose heartbeat has gone stale (crashed or killed
+workers) back in the queue, and marks them failed after --max-attempts claims.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from .database import get_supabase_client
+from .api.matches import run_match_task
+
+DEFAULT_POLL_INTERVAL = 2.0        # seconds between queue polls when idle
+DEFAULT_HEARTBEAT_INTERVAL = 10.0  # seconds between heartbeats of running jobs
+DEFAULT_STALE_AFTER = 120          # seconds without heartbeat before a running job is reclaimed
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class MatchWorker:
+    def __init__(self, processes: int = 1, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL, stale_after: int = DEFAULT_STALE_AFTER,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, worker_id: Optional[str] = None):
+        self.processes = max(1, processes)
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.supabase = get_supabase_client()
+        self.running: dict = {}  # future -> match id
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._done = threading.Event()  # stops heartbeats once no game is left
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # Spawn, not fork: each game process opens its own database connection
+        return ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"))
+
+    def claim(self) -> Optional[dict]:
+        res = self.supabase.rpc("claim_match_job", {"p_worker_id": self.worker_id}).execute()
+        return res.data[0] if res.data else None
+
+    def reclaim_stale(self) -> int:
+        res = self.supabase.rpc("reclaim_stale_match_jobs", {
+            "p_stale_seconds": self.stale_after,
+            "p_max_attempts": self.max_attempts,
+        }).execute()
+        return res.data or 0
+
+    def _heartbeat_loop(self):
+        while not self._done.wait(self.heartbeat_interval):
+            with self._lock:
+                job_ids = list(self.running.values())
+            if not job_ids:
+                continue
+            try:
+                self.supabase.rpc("heartbeat_match_jobs", {"p_worker_id": self.worker_id, "p_job_ids": job_ids}).execute()
+            except Exception as e:
+                print(f"Worker {self.worker_id}: heartbeat failed: {e}")
+
+    def _reap(self, done):
+        for future in done:
+            with self._lock:
+                match_id = self.running.pop(future)
+            try:
+                future.result()
+            except BrokenProcessPool:
+                # The game process died; the job stops heartbeating and is reclaimed later
+                print(f"Worker {self.worker_id}: process running match {match_id} died")
+            except Exception as e:
+                print(f"Worker {self.worker_id}: match {match_id} raised {e}")
+
+    def stop(self, *_):
+        self._stop.set()
+
+    def run(self):
+        print(f"Worker {self.worker_id} started with {self.processes} process(es)")
+        self._pool = self._new_pool()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="match-heartbeat", daemon=True)
+        heartbeat.start()
+        last_reclaim = 0.0
+        try:
+            while not self._stop.is_set():
+                if self.running:
+                    done, _ = wait(list(self.running), timeout=0)
+                    self._reap(done)
+                now = time.monotonic()
+                if now - last_reclaim >= self.stale_after / 2:
+                    last_reclaim = now
+                    try:
+                        reclaimed = self.reclaim_stale()
+                        if reclaimed:
+                            print(f"Worker {self.worker_id}: requeued {reclaimed} stale job(s)")
+                    except Exception as e:
+                        print(f"Worker {self.worker_id}: reclaim failed: {e}")
+
+                claimed = False
+                while len(self.running) < self.processes and not self._stop.is_set():
+                    try:
+                        job = self.claim()
+                    except Exception as e:
+                        print(f"Worker {self.worker_id}: claim failed: {e}")
+                        break
+                    if job is None:
+                        break
+                    claimed = True
+                    print(f"Worker {self.worker_id}: claimed match {job['id']} (priority {job['priority']})")
+                    args = (run_match_task, job["id"], job["bot_a_version"], job["bot_b_version"], self.worker_id,
+                            job.get("force", False), job.get("profile", False))
+                    try:
+                        future = self._pool.submit(*args)
+                    except BrokenProcessPool:
+                        self._pool = self._new_pool()
+                        future = self._pool.submit(*args)
+                    with self._lock:
+                        self.running[future] = job["id"]
+
+                if not claimed:
+                    if self.running:
+                        # Wake up as soon as a game finishes, or poll again
+                        done, _ = wait(list(self.running), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                        self._reap(done)
+                    else:
+                        self._stop.wait(self.poll_interval)
+        finally:
+            # Finish the games in progress (still heartbeating) before exiting
+            print(f"Worker {self.worker_id}: stopping, waiting for {len(self.running)} running match(es)")
+            self._pool.shutdown(wait=True)
+            self._reap(list(self.running))
+            self._done.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=int(os.environ.get("MATCH_WORKER_PROCESSES", os.cpu_count() or 1)),
+                        help="games played in parallel (default: MATCH_WORKER_PROCESSES or CPU count)")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument("--heartbeat-interval", type=float, default=DEFAULT_HEARTBEAT_INTERVAL)
+    parser.add_argument("--stale-after", type=int, default=DEFAULT_STALE_AFTER,
+                        help="seconds without heartbeat before a running job is requeued")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    parser.add_argument("--worker-id", default=None)
+    args = parser.parse_args()
+
+    worker = MatchWorker(args.processes, args.poll_interval, args.heartbeat_interval, args.stale_after,
+                         args.max_attempts, args.worker_id)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -29,6 +29,11 @@ CREATE TABLE bot_versions (
     rules_json JSONB NOT NULL,
     rules_hash TEXT NOT NULL,
     search_depth INT NOT NULL DEFAULT 3,
+    -- Engine settings, e.g. {"move_time_ms": 2000, "game_time_ms": 120000}
+    engine_options JSONB NOT NULL DEFAULT '{}'::jsonb,
+    -- Maintained by backend/ratings.py
+    rating FLOAT DEFAULT 1200.0 NOT NULL,
+    rated_games INT DEFAULT 0 NOT NULL,
     created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
 );
 
@@ -43,6 +48,8 @@ CREATE TABLE matches (
     winner TEXT CHECK (winner IN ('A', 'B', 'draw')),
     termination_reason TEXT CHECK (termination_reason IN ('checkmate', 'timeout', 'illegal', 'draw', 'stalemate', 'insufficient material', 'fifty-move rule', 'threefold repetition')),
     pgn TEXT,
+    -- Moves and per-ply search metadata, compact encoding (backend/engine/game_record.py)
+    game_data TEXT,
     elo_delta_a FLOAT,
     elo_delta_b FLOAT,
     created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
@@ -55,9 +62,143 @@ CREATE TABLE match_queue (
     bot_b_version UUID NOT NULL REFERENCES bot_versions(id),
     status TEXT CHECK (status IN ('queued', 'running', 'completed', 'failed')) DEFAULT 'queued' NOT NULL,
     priority INT DEFAULT 0 NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    -- Set by the worker that claimed the job (backend/worker.py)
+    worker_id TEXT,
+    started_at TIMESTAMPTZ,
+    heartbeat_at TIMESTAMPTZ,
+    attempts INT DEFAULT 0 NOT NULL,
+    force BOOLEAN DEFAULT FALSE NOT NULL,  -- play even if match_result_cache has this pairing
+    profile BOOLEAN DEFAULT FALSE NOT NULL -- play under cProfile with per-move instrumentation
+);
+
+CREATE INDEX match_queue_claim_idx ON match_queue (priority DESC, created_at) WHERE status = 'queued';
+
+-- Atomically claim the next queued job (highest priority, then oldest) for a worker.
+-- SKIP LOCKED lets any number of workers poll concurrently without claiming the same row.
+CREATE OR REPLACE FUNCTION public.claim_match_job(p_worker_id TEXT)
+RETURNS SETOF match_queue AS $$
+    UPDATE match_queue
+    SET status = 'running', worker_id = p_worker_id, started_at = NOW(), heartbeat_at = NOW(), attempts = attempts + 1
+    WHERE id = (
+        SELECT id FROM match_queue
+        WHERE status = 'queued'
+        ORDER BY priority DESC, created_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING *;
+$$ LANGUAGE sql;
+
+-- Refresh the heartbeat of jobs a worker is still running
+CREATE OR REPLACE FUNCTION public.heartbeat_match_jobs(p_worker_id TEXT, p_job_ids UUID[])
+RETURNS INT AS $$
+    WITH touched AS (
+        UPDATE match_queue SET heartbeat_at = NOW()
+        WHERE id = ANY(p_job_ids) AND worker_id = p_worker_id AND status = 'running'
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INT FROM touched;
+$$ LANGUAGE sql;
+
+-- Requeue running jobs whose worker stopped sending heartbeats; give up after p_max_attempts
+CREATE OR REPLACE FUNCTION public.reclaim_stale_match_jobs(p_stale_seconds INT, p_max_attempts INT)
+RETURNS INT AS $$
+    WITH reclaimed AS (
+        UPDATE match_queue
+        SET status = CASE WHEN attempts >= p_max_attempts THEN 'failed' ELSE 'queued' END,
+            worker_id = NULL
+        WHERE status = 'running'
+          AND COALESCE(heartbeat_at, created_at) < NOW() - make_interval(secs => p_stale_seconds)
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INT FROM reclaimed;
+$$ LANGUAGE sql;
+
+-- MATCH RESULT CACHE: deterministic games keyed by both sides' rules_hash, depth,
+-- engine options and ENGINE_VERSION (backend/result_cache.py)
+CREATE TABLE match_result_cache (
+    cache_key TEXT PRIMARY KEY,
+    engine_version INT NOT NULL,
+    source_match_id UUID REFERENCES matches(id) ON DELETE SET NULL,
+    winner TEXT CHECK (winner IN ('A', 'B', 'draw')),
+    termination_reason TEXT,
+    pgn TEXT,
+    game_data TEXT,
+    hits INT DEFAULT 0 NOT NULL,
     created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
 );
 
+-- GAUNTLETS: one version against a list of opponents (backend/gauntlet.py)
+CREATE TABLE gauntlets (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    version_id UUID NOT NULL REFERENCES bot_versions(id) ON DELETE CASCADE,
+    opponents UUID[] NOT NULL,
+    games_per_opponent INT NOT NULL DEFAULT 2,
+    openings JSONB NOT NULL DEFAULT '[]'::jsonb,  -- starting FENs, each played with both colors
+    status TEXT CHECK (status IN ('queued', 'running', 'completed', 'failed')) DEFAULT 'queued' NOT NULL,
+    games_total INT NOT NULL,
+    games_played INT DEFAULT 0 NOT NULL,
+    score FLOAT,                                   -- points for version_id (win 1, draw 0.5)
+    summary JSONB,                                 -- totals and per-opponent breakdown
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
+);
+
+CREATE TABLE gauntlet_games (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    gauntlet_id UUID NOT NULL REFERENCES gauntlets(id) ON DELETE CASCADE,
+    game_index INT NOT NULL,
+    opponent UUID NOT NULL REFERENCES bot_versions(id),
+    white_version UUID NOT NULL REFERENCES bot_versions(id),
+    black_version UUID NOT NULL REFERENCES bot_versions(id),
+    opening TEXT,
+    result TEXT CHECK (result IN ('1-0', '0-1', '1/2-1/2', '*')),  -- NULL when the game failed
+    termination TEXT,
+    plies INT,
+    score FLOAT,                                   -- points for the gauntlet version
+    pgn TEXT,
+    error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
+);
+
+CREATE INDEX gauntlet_games_gauntlet_idx ON gauntlet_games (gauntlet_id, game_index);
+
+-- TOURNAMENTS: round robin or Swiss between bot versions (backend/tournament.py)
+CREATE TABLE tournaments (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    name TEXT,
+    format TEXT CHECK (format IN ('round_robin', 'swiss')) NOT NULL,
+    version_ids UUID[] NOT NULL,
+    rounds INT,                                    -- Swiss only
+    games_per_pairing INT NOT NULL DEFAULT 2,
+    openings JSONB NOT NULL DEFAULT '[]'::jsonb,
+    status TEXT CHECK (status IN ('queued', 'running', 'completed', 'failed')) DEFAULT 'queued' NOT NULL,
+    current_round INT DEFAULT 0 NOT NULL,
+    games_total INT NOT NULL,
+    games_played INT DEFAULT 0 NOT NULL,
+    games_failed INT DEFAULT 0 NOT NULL,
+    standings JSONB NOT NULL DEFAULT '[]'::jsonb,  -- ranked rows, rewritten after every game
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
+);
+
+CREATE TABLE tournament_games (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    tournament_id UUID NOT NULL REFERENCES tournaments(id) ON DELETE CASCADE,
+    round INT NOT NULL,
+    game_index INT NOT NULL,
+    white_version UUID NOT NULL REFERENCES bot_versions(id),
+    black_version UUID NOT NULL REFERENCES bot_versions(id),
+    opening TEXT,
+    result TEXT CHECK (result IN ('1-0', '0-1', '1/2-1/2', '*')),  -- NULL when the game failed
+    termination TEXT,
+    plies INT,
+    pgn TEXT,
+    error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
+);
+
+CREATE INDEX tournament_games_tournament_idx ON tournament_games (tournament_id, game_index);
+
 -- ELO HISTORY
 CREATE TABLE elo_history (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -68,6 +209,93 @@ CREATE TABLE elo_history (
     created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
 );
 
+-- RATINGS (backend/ratings.py)
+-- Elo update for one finished match. Both versions are locked (in id order) so
+-- matches finishing at the same time cannot overwrite each other's update.
+CREATE OR REPLACE FUNCTION public.apply_match_rating(p_match_id UUID, p_k FLOAT, p_default FLOAT DEFAULT 1200.0)
+RETURNS TABLE (elo_delta_a FLOAT, elo_delta_b FLOAT) AS $$
+DECLARE
+    m matches%ROWTYPE;
+    ra FLOAT;
+    rb FLOAT;
+    delta FLOAT;
+BEGIN
+    SELECT * INTO m FROM matches WHERE id = p_match_id FOR UPDATE;
+    IF NOT FOUND OR m.winner IS NULL OR m.elo_delta_a IS NOT NULL THEN
+        RETURN;
+    END IF;
+    IF m.bot_a_version = m.bot_b_version THEN
+        UPDATE matches SET elo_delta_a = 0, elo_delta_b = 0 WHERE id = p_match_id;
+        RETURN QUERY SELECT 0::FLOAT, 0::FLOAT;
+        RETURN;
+    END IF;
+
+    PERFORM 1 FROM bot_versions WHERE id IN (m.bot_a_version, m.bot_b_version) ORDER BY id FOR UPDATE;
+    SELECT COALESCE(rating, p_default) INTO ra FROM bot_versions WHERE id = m.bot_a_version;
+    SELECT COALESCE(rating, p_default) INTO rb FROM bot_versions WHERE id = m.bot_b_version;
+
+    delta := p_k * ((CASE m.winner WHEN 'A' THEN 1.0 WHEN 'B' THEN 0.0 ELSE 0.5 END)
+                    - 1.0 / (1.0 + power(10.0, (rb - ra) / 400.0)));
+
+    UPDATE bot_versions SET rating = ra + delta, rated_games = rated_games + 1 WHERE id = m.bot_a_version;
+    UPDATE bot_versions SET rating = rb - delta, rated_games = rated_games + 1 WHERE id = m.bot_b_version;
+    UPDATE matches SET elo_delta_a = delta, elo_delta_b = -delta WHERE id = p_match_id;
+    INSERT INTO elo_history (bot_version_id, match_id, elo_before, elo_after)
+    VALUES (m.bot_a_version, p_match_id, ra, ra + delta), (m.bot_b_version, p_match_id, rb, rb - delta);
+    -- A user's global rating is their best bot version
+    UPDATE profiles p SET rating_global = best.rating
+    FROM (
+        SELECT b.user_id, MAX(v.rating) AS rating
+        FROM bots b JOIN bot_versions v ON v.bot_id = b.id
+        WHERE b.user_id IN (
+            SELECT b2.user_id FROM bots b2 JOIN bot_versions v2 ON v2.bot_id = b2.id
+            WHERE v2.id IN (m.bot_a_version, m.bot_b_version)
+        )
+        GROUP BY b.user_id
+    ) best
+    WHERE p.id = best.user_id;
+
+    RETURN QUERY SELECT delta, -delta;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Store a full rating recompute in one transaction. Versions missing from
+-- p_ratings go back to p_default. When given, match deltas are updated and
+-- elo_history is replaced.
+CREATE OR REPLACE FUNCTION public.bulk_write_ratings(p_ratings JSONB, p_default FLOAT DEFAULT 1200.0,
+                                                     p_match_deltas JSONB DEFAULT NULL, p_history JSONB DEFAULT NULL)
+RETURNS VOID AS $$
+BEGIN
+    UPDATE bot_versions SET rating = p_default, rated_games = 0 WHERE true;
+    UPDATE bot_versions v SET rating = r.rating, rated_games = r.rated_games
+    FROM jsonb_to_recordset(p_ratings) AS r(id UUID, rating FLOAT, rated_games INT)
+    WHERE v.id = r.id;
+
+    IF p_match_deltas IS NOT NULL THEN
+        UPDATE matches m SET elo_delta_a = d.elo_delta_a, elo_delta_b = d.elo_delta_b
+        FROM jsonb_to_recordset(p_match_deltas) AS d(id UUID, elo_delta_a FLOAT, elo_delta_b FLOAT)
+        WHERE m.id = d.id;
+    END IF;
+
+    IF p_history IS NOT NULL THEN
+        DELETE FROM elo_history WHERE true;
+        INSERT INTO elo_history (bot_version_id, match_id, elo_before, elo_after, created_at)
+        SELECT h.bot_version_id, h.match_id, h.elo_before, h.elo_after, h.created_at
+        FROM jsonb_to_recordset(p_history)
+            AS h(bot_version_id UUID, match_id UUID, elo_before FLOAT, elo_after FLOAT, created_at TIMESTAMPTZ);
+    END IF;
+
+    -- A user's global rating is their best bot version
+    UPDATE profiles p SET rating_global = best.rating
+    FROM (
+        SELECT b.user_id, MAX(v.rating) AS rating
+        FROM bots b JOIN bot_versions v ON v.bot_id = b.id
+        GROUP BY b.user_id
+    ) best
+    WHERE p.id = best.user_id;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Row Level Security (RLS)
 ALTER TABLE profiles ENABLE ROW LEVEL SECURITY;
 ALTER TABLE bots ENABLE ROW LEVEL SECURITY;
@@ -75,6 +303,11 @@ ALTER TABLE bot_versions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE matches ENABLE ROW LEVEL SECURITY;
 ALTER TABLE match_queue ENABLE ROW LEVEL SECURITY;
 ALTER TABLE elo_history ENABLE ROW LEVEL SECURITY;
+ALTER TABLE gauntlets ENABLE ROW LEVEL SECURITY;
+ALTER TABLE gauntlet_games ENABLE ROW LEVEL SECURITY;
+ALTER TABLE match_result_cache ENABLE ROW LEVEL SECURITY;
+ALTER TABLE tournaments ENABLE ROW LEVEL SECURITY;
+ALTER TABLE tournament_games ENABLE ROW LEVEL SECURITY;
 
 -- Policies
 -- Profiles: Everyone can read, owners can update
@@ -98,6 +331,17 @@ CREATE POLICY "Matches are viewable by everyone" ON matches FOR SELECT USING (tr
 -- Match Queue: Read by everyone, workers can update (simplified for now)
 CREATE POLICY "Match queue is viewable by everyone" ON match_queue FOR SELECT USING (true);
 
+-- Match result cache: Everyone can read, written by the backend
+CREATE POLICY "Match result cache is viewable by everyone" ON match_result_cache FOR SELECT USING (true);
+
+-- Gauntlets: Everyone can read
+CREATE POLICY "Gauntlets are viewable by everyone" ON gauntlets FOR SELECT USING (true);
+CREATE POLICY "Gauntlet games are viewable by everyone" ON gauntlet_games FOR SELECT USING (true);
+
+-- Tournaments: Everyone can read
+CREATE POLICY "Tournaments are viewable by everyone" ON tournaments FOR SELECT USING (true);
+CREATE POLICY "Tournament games are viewable by everyone" ON tournament_games FOR SELECT USING (true);
+
 -- Automated Profile Creation on Signup
 CREATE OR REPLACE FUNCTION public.handle_new_user()
 RETURNS trigger AS $$